@@ -1,56 +1,212 @@
 # Import standard libraries
-from langgraph.prebuilt import ToolNode
-from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, ToolMessage
-from langchain_mcp_adapters.client import MultiServerMCPClient
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import List, Optional
+from langchain_core.messages import AIMessage, AIMessageChunk, SystemMessage, HumanMessage, ToolMessage
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import InMemorySaver
 
 # Import custom modules
+from utils.checkpointer import BoundedMemorySaver, open_sqlite_saver
+from utils.history import HistoryCompactor
 from utils.llm import get_llm
+from utils.mcp_servers import load_server_groups
 from utils.models import GraphState, InvokeResponse
 from utils.prompt import get_agentprompt
+from utils.response_cache import AgentResponseCache, repos_in
+from utils.router import FastPathRouter, Route
+from utils.tracing import get_tracer
 
 class ReactGraphAgent:
-    def __init__(self, logger: logging.Logger):
+    def __init__(
+        self,
+        logger: logging.Logger,
+        history_compactor: Optional[HistoryCompactor] = None,
+        response_cache: Optional[AgentResponseCache] = None,
+    ):
         self.llm = get_llm()
         self.tools = None
         self.logger = logger
         self.agent_graph = None
-        self.tool_node_instance = None
-        self.agent_prompt = self._get_agent_prompt()
+        self.tools_by_name = {}
+        # MCP servers by name, each with its replicas and their persistent sessions
+        self.mcp_servers = load_server_groups()
+        # Concurrency limit and per-call timeout of the tool calls of one agent turn
+        self.tool_concurrency = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+        self.tool_timeout = float(os.getenv("AGENT_TOOL_TIMEOUT", "90"))
+        # Optional fast path answering literal queries without the LLM
+        self.router = FastPathRouter() if os.getenv("AGENT_FAST_PATH", "0") == "1" else None
+        self.llm_with_tools = None
+        self._tools_signature = None
+        self.checkpointer = None
+        self._checkpoint_conn = None
+        self.agent_prompt = get_agentprompt()
+        # Fits the history sent to the LLM into a token budget; None sends the full history
+        self.history_compactor = history_compactor if history_compactor is not None else HistoryCompactor.from_env()
+        # Serves repeated questions without LLM or GitHub calls; None disables it
+        self.response_cache = response_cache if response_cache is not None else AgentResponseCache.from_env()
 
     async def get_tools(self):
         try:
-            client = MultiServerMCPClient(
-                {
-                    "math": {
-                        "transport": "streamable_http",
-                        "url": "http://127.0.0.1:9002/mcp/",
-                    }
-                }
-            )
-            self.tools = await client.get_tools()
+            loaded = await asyncio.gather(*(server.load_tools() for server in self.mcp_servers.values()), return_exceptions=True)
+            tools = []
+            for name, server_tools in zip(self.mcp_servers, loaded):
+                if isinstance(server_tools, Exception):
+                    # Keep the tools of the servers that answered
+                    self.logger.error(f"Error getting tools from MCP server '{name}': {server_tools}")
+                    continue
+                for tool in server_tools:
+                    if tool.name in {known.name for known in tools}:
+                        self.logger.warning(f"Tool '{tool.name}' of MCP server '{name}' is shadowed by another server's tool.")
+                        continue
+                    tools.append(tool)
+            if all(isinstance(server_tools, Exception) for server_tools in loaded):
+                raise RuntimeError(f"No MCP server answered: {loaded[0]}")
+            self.tools = tools
             self.logger.info(f"Tools available to the agent: {len(self.tools) if self.tools else 0} tools loaded")
+            return self.tools
         except Exception as e:
             self.logger.error(f"Error getting tools: {e}", exc_info=True)
             self.tools = []
             raise RuntimeError(f"Tool loading failed: {str(e)}")
 
+    @staticmethod
+    def _signature(tools: List) -> str:
+        """
+        Fingerprints the names, descriptions and argument schemas of a tool list.
+        """
+        described = [
+            (tool.name, tool.description, tool.args_schema if isinstance(tool.args_schema, dict) else tool.args)
+            for tool in tools or []
+        ]
+        return hashlib.sha1(json.dumps(sorted(described, key=lambda item: item[0]), default=str).encode()).hexdigest()
+
+    def _bind_tools(self):
+        """
+        Builds the tool-bound LLM and the tool lookup once for the current tool list,
+        so that tool schemas are not re-serialized on every LLM turn.
+        """
+        if not self.tools:
+            self.logger.warning("No tools available for the agent to use.")
+            self.llm_with_tools = self.llm
+        else:
+            self.llm_with_tools = self.llm.bind_tools(self.tools)
+        self.tools_by_name = {tool.name: tool for tool in self.tools or []}
+        self._tools_signature = self._signature(self.tools)
+
+    async def refresh_tools(self) -> bool:
+        """
+        Reloads the tool list from the MCP server and rebinds the LLM if it changed.
+        Keeps the current tools if the server cannot be reached.
+        Returns True if the tools were rebound.
+        """
+        current_tools = self.tools
+        try:
+            tools = await self.get_tools()
+        except RuntimeError:
+            self.tools = current_tools
+            raise
+        if not tools:
+            self.logger.warning("MCP server returned no tools, keeping the current tools.")
+            self.tools = current_tools
+            return False
+        if self._signature(tools) == self._tools_signature:
+            self.tools = current_tools
+            return False
+        self._bind_tools()
+        if self.response_cache:
+            # Answers may depend on tools that changed
+            self.response_cache.invalidate()
+        self.logger.info(f"Tool list changed, rebound {len(self.tools)} tools.")
+        return True
+
+    async def _run_tool_call(self, tool_call: dict, slots: asyncio.Semaphore) -> ToolMessage:
+        """
+        Runs one tool call with the per-call timeout. Failures are returned as error tool messages
+        so that the other calls of the turn still report their results.
+        """
+        name = tool_call["name"]
+        tool = self.tools_by_name.get(name)
+        if tool is None:
+            return ToolMessage(content=f"Error: unknown tool '{name}'.", name=name, tool_call_id=tool_call["id"], status="error")
+        with get_tracer().span("tool.call", {"tool.name": name}) as span:
+            async with slots:
+                try:
+                    return await asyncio.wait_for(tool.ainvoke({**tool_call, "type": "tool_call"}), timeout=self.tool_timeout)
+                except asyncio.TimeoutError as e:
+                    self.logger.warning(f"Tool '{name}' timed out after {self.tool_timeout}s.")
+                    content = f"Error: tool '{name}' timed out after {self.tool_timeout}s."
+                    span.record_error(e)
+                except Exception as e:
+                    self.logger.error(f"Error running tool '{name}': {e}", exc_info=True)
+                    content = f"Error: tool '{name}' failed: {str(e)}"
+                    span.record_error(e)
+        return ToolMessage(content=content, name=name, tool_call_id=tool_call["id"], status="error")
+
     async def _tool_execution_node(self, state: GraphState) -> dict:
         self.logger.info("Entering custom tool execution node...")
         try:
-            if not self.tool_node_instance:
-                self.tool_node_instance = ToolNode(self.tools)
             messages = state.get("messages", [])
             if not messages:
                 self.logger.warning("No messages to process in tool node.")
                 return {"messages": [AIMessage(content="No tool calls to process.")]}
-            tool_output_dict = await self.tool_node_instance.ainvoke({"messages": messages})
-            self.logger.info(f"Tool output dict: {tool_output_dict}")
-            return tool_output_dict
+            tool_calls = getattr(messages[-1], "tool_calls", None) or []
+            # Run the independent calls of this turn concurrently; gather keeps the order of the calls
+            slots = asyncio.Semaphore(self.tool_concurrency)
+            tool_messages = await asyncio.gather(*(self._run_tool_call(tool_call, slots) for tool_call in tool_calls))
+            failed = sum(1 for message in tool_messages if message.status == "error")
+            self.logger.info(f"Executed {len(tool_messages)} tool call(s), {failed} failed.")
+            return {"messages": list(tool_messages)}
         except Exception as e:
             self.logger.error(f"Error in custom tool execution node: {e}", exc_info=True)
-            return {"messages": [AIMessage(content=f"An error occurred during tool execution: {str(e)}")]}
+            return {"messages": [AIMessage(content=f"An error occurred during tool execution: {str(e)}", response_metadata={"error": True})]}
+
+    def _fast_path_route(self, state: GraphState) -> Optional[Route]:
+        """
+        Returns the fast path route of the latest user message, if it matches one of the available tools.
+        """
+        messages = state.get("messages", [])
+        if not self.router or not messages or not isinstance(messages[-1], HumanMessage):
+            return None
+        route = self.router.match(messages[-1].content)
+        if route and route.tool_name in self.tools_by_name:
+            return route
+        return None
+
+    def _route(self, state: GraphState) -> str:
+        try:
+            if self._fast_path_route(state):
+                self.logger.info("Query matched a fast path intent, skipping the LLM.")
+                return "fast_path"
+            return "agent"
+        except Exception as e:
+            self.logger.error(f"Error routing query: {str(e)}", exc_info=True)
+            return "agent"
+
+    async def _fast_path(self, state: GraphState) -> dict:
+        try:
+            route = self._fast_path_route(state)
+            tool_call = {"name": route.tool_name, "args": route.args, "id": f"fast_path_{uuid.uuid4().hex}"}
+            result = await self._run_tool_call(tool_call, asyncio.Semaphore(1))
+            answer = self.router.render(route, result.content) if result.status != "error" else None
+            if answer is None:
+                self.logger.info(f"Fast path could not answer with '{route.tool_name}', falling back to the agent.")
+                return {}
+            return {"messages": [AIMessage(content=answer)]}
+        except Exception as e:
+            self.logger.error(f"Error in fast path node: {str(e)}", exc_info=True)
+            return {}
+
+    def _after_fast_path(self, state: GraphState) -> str:
+        messages = state.get("messages", [])
+        # The fast path answered if it appended an AI message, else the agent takes over
+        if messages and isinstance(messages[-1], AIMessage):
+            return END
+        return "agent"
 
     def _should_continue(self, state: GraphState) -> str:
         try:
@@ -74,34 +230,78 @@ class ReactGraphAgent:
             if not messages:
                 self.logger.error("No messages in state for agent to process.")
                 return {"messages": [AIMessage(content="I don't see any messages to respond to.")]}
-            if not self.tools:
-                self.logger.warning("No tools available for the agent to use.")
-                llm_with_tools = self.llm
-            else:
-                llm_with_tools = self.llm.bind_tools(self.tools)
+            if not self.llm_with_tools:
+                self._bind_tools()
             self.logger.info(f"Processing {len(messages)} messages with the agent.")
+            if self.history_compactor:
+                messages, stats = self.history_compactor.compact(messages)
+                if stats.tokens_trimmed:
+                    self.logger.info(
+                        f"Compacted history from {stats.tokens_before} to {stats.tokens_after} tokens "
+                        f"({stats.elided_tool_outputs} tool outputs elided, {stats.dropped_messages} messages dropped)."
+                    )
             full_message_history = [SystemMessage(content=self.agent_prompt)] + messages
-            response = await llm_with_tools.ainvoke(full_message_history)
+            with get_tracer().span("llm.call", {"llm.messages": len(full_message_history)}) as span:
+                response = await self.llm_with_tools.ainvoke(full_message_history)
+                usage = response.usage_metadata or {}
+                span.set_attributes({
+                    "llm.model": response.response_metadata.get("model_name"),
+                    "llm.input_tokens": usage.get("input_tokens"),
+                    "llm.output_tokens": usage.get("output_tokens"),
+                    "llm.total_tokens": usage.get("total_tokens"),
+                    "llm.tool_calls": len(response.tool_calls),
+                })
             self.logger.info("Agent response generated successfully.")
             return {"messages": [response]}
         except Exception as e:
             self.logger.error(f"Error in agent node: {str(e)}", exc_info=True)
-            return {"messages": [AIMessage(content="I encountered an error while processing your request. Please try again.")]}
+            return {"messages": [AIMessage(content="I encountered an error while processing your request. Please try again.", response_metadata={"error": True})]}
+
+    async def _create_checkpointer(self):
+        """
+        Creates the durable SQLite checkpointer if AGENT_CHECKPOINT_DB is set,
+        else a bounded in-memory checkpointer.
+        """
+        checkpoint_db = os.getenv("AGENT_CHECKPOINT_DB")
+        if checkpoint_db:
+            checkpointer, self._checkpoint_conn = await open_sqlite_saver(checkpoint_db)
+            self.logger.info(f"Using durable checkpoints at {checkpoint_db}.")
+            return checkpointer
+        checkpointer = BoundedMemorySaver.from_env()
+        self.logger.info(
+            f"Using in-memory checkpoints for at most {checkpointer.max_threads} threads "
+            f"and {checkpointer.max_bytes} bytes."
+        )
+        return checkpointer
+
+    @staticmethod
+    def _traced(name: str, node):
+        """
+        Wraps a graph node so that each of its runs is recorded as a span.
+        """
+        # Keeps the node's signature, from which LangGraph infers its input schema
+        @functools.wraps(node)
+        async def run(state):
+            with get_tracer().span(f"graph.{name}", {"graph.node": name}):
+                return await node(state)
+        return run
 
     async def _compile_agent(self):
         try:
             workflow = StateGraph(GraphState)
-            workflow.add_node("agent", self._agent)
-            workflow.add_node("tools", self._tool_execution_node)
-            workflow.add_edge(START, "agent")
+            workflow.add_node("agent", self._traced("agent", self._agent))
+            workflow.add_node("tools", self._traced("tools", self._tool_execution_node))
+            workflow.add_node("fast_path", self._traced("fast_path", self._fast_path))
+            workflow.add_conditional_edges(START, self._route, {"fast_path": "fast_path", "agent": "agent"})
+            workflow.add_conditional_edges("fast_path", self._after_fast_path, {"agent": "agent", END: END})
             workflow.add_conditional_edges(
                 "agent",
                 self._should_continue,
                 {"tools": "tools", END: END}
             )
             workflow.add_edge("tools", "agent")
-            memory_store = InMemorySaver()
-            self.agent_graph = workflow.compile(checkpointer=memory_store)
+            self.checkpointer = await self._create_checkpointer()
+            self.agent_graph = workflow.compile(checkpointer=self.checkpointer)
             self.logger.info("Agent graph compiled successfully.")
         except Exception as e:
             self.logger.error(f"Error compiling agent: {str(e)}", exc_info=True)
@@ -110,17 +310,98 @@ class ReactGraphAgent:
     async def initiate(self):
         try:
             self.logger.info("Initializing agent...")
+            for server in self.mcp_servers.values():
+                await server.start()
             await self.get_tools()
             if not self.tools:
                 raise RuntimeError("No tools available for the agent to use after loading.")
-            self.tool_node_instance = ToolNode(self.tools)
-            self.logger.info("Tool node instantiated successfully.")
+            self._bind_tools()
+            self.logger.info("Tools bound successfully.")
             await self._compile_agent()
             self.logger.info("Agent initialized successfully.")
         except Exception as e:
             self.logger.error(f"Error initializing agent: {str(e)}", exc_info=True)
             raise RuntimeError(f"Agent initialization failed: {str(e)}")
 
+    async def close(self):
+        """
+        Releases the resources held by the agent.
+        """
+        for server in self.mcp_servers.values():
+            await server.close()
+        if self._checkpoint_conn is not None:
+            await self._checkpoint_conn.close()
+            self._checkpoint_conn = None
+        self.logger.info("Agent closed.")
+
+    async def _cached_answer(self, query: str, config: dict) -> Optional[str]:
+        """
+        Returns a cached answer to the query and records the exchange in the thread, if one may be served.
+        Answers are only served to new threads or to queries naming their repository,
+        since follow-up questions depend on the conversation.
+        """
+        if not self.response_cache:
+            return None
+        if not repos_in(query):
+            state = await self.agent_graph.aget_state(config)
+            if state.values.get("messages"):
+                return None
+        # Embedding the query for similarity lookups is CPU-bound, keep it off the event loop
+        cached = await asyncio.to_thread(self.response_cache.get, query)
+        if cached is None:
+            return None
+        # Keep the thread coherent for follow-up questions, as if the agent had answered
+        await self.agent_graph.aupdate_state(
+            config,
+            {"messages": [HumanMessage(content=query), AIMessage(content=cached.answer)]},
+            as_node="agent",
+        )
+        self.logger.info(f"Served a cached answer for thread {config['configurable']['thread_id']}.")
+        return cached.answer
+
+    @staticmethod
+    def _tool_failed(message: ToolMessage) -> bool:
+        """
+        Whether a tool call failed: the tool reported an error, or a batch tool failed for some repositories.
+        """
+        if message.status == "error":
+            return True
+        blocks = message.content if isinstance(message.content, list) else [message.content]
+        for block in blocks:
+            text = block.get("text") if isinstance(block, dict) else block
+            try:
+                result = json.loads(text)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(result, dict) and result.get("errors"):
+                return True
+        return False
+
+    async def _remember_answer(self, query: str, config: dict):
+        """
+        Caches the final answer of the turn just completed, unless it failed or a tool call failed.
+        Like in _cached_answer, follow-up answers are only cached if the query names its repository.
+        """
+        if not self.response_cache:
+            return
+        state = await self.agent_graph.aget_state(config)
+        messages = state.values.get("messages", [])
+        starts = [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+        if len(starts) > 1 and not repos_in(query):
+            return
+        turn = messages[starts[-1] + 1:] if starts else []
+        if not turn or not isinstance(turn[-1], AIMessage) or turn[-1].tool_calls or turn[-1].response_metadata.get("error"):
+            return
+        if any(isinstance(message, ToolMessage) and self._tool_failed(message) for message in turn):
+            return
+        tool_calls = [tool_call for message in turn if isinstance(message, AIMessage) for tool_call in message.tool_calls]
+        repos = []
+        for tool_call in tool_calls:
+            args = tool_call.get("args", {})
+            repos += [args["repo_name"]] if isinstance(args.get("repo_name"), str) else []
+            repos += [name for name in args.get("repo_names", []) if isinstance(name, str)]
+        await asyncio.to_thread(self.response_cache.set, query, turn[-1].content, [tool_call["name"] for tool_call in tool_calls], repos)
+
     async def stream_invoke(self, query: str, thread_id: str):
         try:
             if not self.agent_graph:
@@ -129,12 +410,25 @@ class ReactGraphAgent:
                 messages=[HumanMessage(content=query)],
                 iteration=0
             )
+            config = {"configurable": {"thread_id": thread_id}}
+            cached_answer = await self._cached_answer(query, config)
+            if cached_answer is not None:
+                yield {"cache": {"messages": [AIMessage(content=cached_answer)]}}
+                return
             self.logger.info(f"Streaming agent invocation for thread {thread_id}...")
-            async for state_change in self.agent_graph.astream(
+            # Node updates are interleaved with the LLM's tokens as they are generated
+            async for mode, chunk in self.agent_graph.astream(
                 initiate_state,
-                config={"configurable": {"thread_id": thread_id}}
+                config=config,
+                stream_mode=["updates", "messages"]
             ):
-                yield state_change
+                if mode == "updates":
+                    yield chunk
+                    continue
+                message, metadata = chunk
+                if metadata.get("langgraph_node") == "agent" and isinstance(message, AIMessageChunk) and isinstance(message.content, str) and message.content:
+                    yield {"token": {"content": message.content}}
+            await self._remember_answer(query, config)
         except Exception as e:
             self.logger.error(f"Error streaming agent output: {str(e)}", exc_info=True)
             yield {"error": {"messages": str(e)}}
@@ -147,11 +441,19 @@ class ReactGraphAgent:
                 messages=[HumanMessage(content=query)],
                 iteration=0
             )
+            config = {"configurable": {"thread_id": thread_id}}
+            cached_answer = await self._cached_answer(query, config)
+            if cached_answer is not None:
+                return InvokeResponse(
+                    response="assistant_final_answer",
+                    content=cached_answer
+                )
             self.logger.info(f"Invoking agent for thread {thread_id}...")
             result = await self.agent_graph.ainvoke(
                 state,
-                config={"configurable": {"thread_id": thread_id}}
+                config=config
             )
+            await self._remember_answer(query, config)
             self.logger.info("Agent invocation completed successfully.")
             ai_response_content = "No AI response found."
             if result and "messages" in result and result["messages"]:
@@ -1,17 +1,91 @@
 # Import standard libraries
 import asyncio
+import os
+import time
 import uvicorn
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from langchain_core.messages import AIMessage, ToolMessage, HumanMessage
 
 # Import custom modules
+from utils.admission import AdmissionController, AdmissionRejected
+from utils.metrics import TOKEN_BUCKETS, CallbackMetric, MetricsRegistry, SpanMetrics, ratio
+from utils.run_buffer import Run, RunBuffer
+from utils.tracing import configure_tracer, get_tracer
 from utils.logger import AppLogger
 from agents.agent import ReactGraphAgent
 from utils.models import InvokeRequest, InvokeResponse
 
+# Initialize logger
+logger = AppLogger(__name__).get_logger()
+
+# Seconds between tool list refreshes from the MCP server; 0 disables periodic refresh
+TOOLS_REFRESH_INTERVAL = float(os.getenv("AGENT_TOOLS_REFRESH_INTERVAL", "0"))
+
+# --- Metrics ---
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram("agent_request_duration_seconds", "Duration of /invoke runs, from the request to the last event.")
+FIRST_EVENT_SECONDS = metrics.histogram("agent_time_to_first_event_seconds", "Time from an /invoke request to the first output of the agent, queue notices excluded.")
+QUEUE_WAIT_SECONDS = metrics.histogram("agent_queue_wait_seconds", "Time /invoke runs waited for a free slot.")
+LLM_SECONDS = metrics.histogram("agent_llm_duration_seconds", "Duration of LLM calls.")
+LLM_TOKENS = metrics.histogram("agent_llm_tokens", "Tokens per LLM call, by kind (input or output).", ["kind"], buckets=TOKEN_BUCKETS)
+TOOL_SECONDS = metrics.histogram("agent_tool_duration_seconds", "Duration of the tool calls of the agent, by tool and status.", ["tool", "status"])
+ERROR_EVENTS = metrics.counter("agent_error_events_total", "Error events sent on /invoke streams, by InvokeResponse type.", ["type"])
+
+def observe_llm_call(span):
+    LLM_SECONDS.observe(span.duration)
+    for kind in ("input", "output"):
+        tokens = span.attributes.get(f"llm.{kind}_tokens")
+        if tokens is not None:
+            LLM_TOKENS.observe(tokens, kind=kind)
+
+# Latencies of the spans, see SpanMetrics
+SPAN_METRICS = SpanMetrics({
+    "invoke.queue": lambda span: QUEUE_WAIT_SECONDS.observe(span.duration),
+    "llm.call": observe_llm_call,
+    "tool.call": lambda span: TOOL_SECONDS.observe(span.duration, tool=span.attributes.get("tool.name", ""), status="error" if span.error else "ok"),
+})
+
+def register_gauges(app: FastAPI):
+    """
+    Exposes the state of the app's components, read at scrape time.
+    """
+    metrics.gauge("agent_runs_in_flight", "Agent runs holding a slot.", lambda: app.admission.stats()["running"])
+    metrics.gauge("agent_runs_queued", "Agent runs waiting for a slot.", lambda: app.admission.stats()["waiting"])
+    metrics.register(CallbackMetric("agent_runs_rejected_total", "Agent runs rejected by admission control.", lambda: app.admission.stats()["rejected"], kind="counter"))
+    metrics.gauge("agent_runs_buffered", "Finished runs kept for stream resumption.", lambda: app.runs.stats()["buffered"])
+    # Durable checkpointers keep no counts in memory
+    checkpoint_stats = lambda: app.agent.checkpointer.stats() if hasattr(app.agent.checkpointer, "stats") else {}
+    metrics.gauge("agent_checkpoint_threads", "Conversation threads held by the in-memory checkpointer.", lambda: checkpoint_stats().get("threads"))
+    metrics.gauge("agent_checkpoint_bytes", "Bytes held by the in-memory checkpointer.", lambda: checkpoint_stats().get("bytes"))
+    cache_stats = lambda: app.agent.response_cache.stats() if app.agent.response_cache else {}
+    metrics.gauge("agent_response_cache_entries", "Answers in the response cache.", lambda: cache_stats().get("entries"))
+    def cache_hit_ratio():
+        stats = cache_stats()
+        hits = stats.get("hits", 0) + stats.get("similar_hits", 0)
+        return ratio(hits, hits + stats.get("misses", 0))
+    metrics.gauge("agent_response_cache_hit_ratio", "Share of response cache lookups answered from the cache since start.", cache_hit_ratio)
+    metrics.gauge(
+        "agent_mcp_calls_in_flight",
+        "MCP tool calls in flight, by server and replica.",
+        lambda: {(name, replica["url"]): replica["in_flight"] for name, server in app.agent.mcp_servers.items() for replica in server.stats()},
+        ["server", "replica"],
+    )
+
+async def refresh_tools_periodically(agent: ReactGraphAgent):
+    """
+    Hot-reloads the agent's tools from the MCP server at a fixed interval.
+    """
+    while True:
+        await asyncio.sleep(TOOLS_REFRESH_INTERVAL)
+        try:
+            await agent.refresh_tools()
+        except Exception as e:
+            logger.error(f"Periodic tool refresh failed: {e}")
+
 # --- Lifespan Management ---
 # Define async context manager for lifespan management
 @asynccontextmanager
@@ -19,33 +93,98 @@ async def lifespan(app: FastAPI):
     """
     Lifespan management for the app
     """
-    # Initialize logger
-    logger = AppLogger(__name__).get_logger()
-
+    # Trace requests through the graph and the MCP tools, when an exporter is configured
+    app.tracer = configure_tracer("agent")
+    app.tracer.add_exporter(SPAN_METRICS)
     # Initialize the agent
     app.agent = ReactGraphAgent(logger)
     await app.agent.initiate()
+    # Limit and queue the graph runs in flight
+    app.admission = AdmissionController.from_env()
+    # Keep runs going across dropped connections, so that clients can resume their streams
+    app.runs = RunBuffer.from_env()
+
+    # Start hot-reloading the tools, if enabled
+    refresh_task = asyncio.create_task(refresh_tools_periodically(app.agent)) if TOOLS_REFRESH_INTERVAL > 0 else None
 
     # Yield the agent to the app
     yield
 
+    if refresh_task:
+        refresh_task.cancel()
+
+    # Stop the runs still in progress
+    await app.runs.close()
+
     # Close the agent
     await app.agent.close()
+    app.tracer.close()
 
 # --- FastAPI App ---
 app = FastAPI(name= "main_agent", lifespan= lifespan)
+# Registered once, as the registry outlives the lifespans; the gauges are skipped until the lifespan sets up the components
+register_gauges(app)
+
+async def stream_run(run: Run, after: int = 0):
+    """
+    Sends the events of a run after the given one as SSE, each with its id
+    """
+    async for seq, data in run.events(after):
+        yield f"id: {run.event_id(seq)}\ndata: {data}\n\n"
+
+async def traced_run(source, thread_id: str, traceparent: Optional[str], received_at: float):
+    """
+    Runs the events of an /invoke request in a span, continuing the client's trace if it sent one
+    """
+    try:
+        with get_tracer().span("invoke", {"thread_id": thread_id}, traceparent=traceparent):
+            async for data in source:
+                yield data
+    finally:
+        REQUEST_SECONDS.observe(time.monotonic() - received_at)
 
 # --- Routes ---
 @app.post("/invoke")
-async def invoke_agent(query: InvokeRequest):
+async def invoke_agent(
+    query: InvokeRequest,
+    last_event_id: Optional[str] = Header(None),
+    traceparent: Optional[str] = Header(None),
+):
     """
-    Stream the agent's response
+    Stream the agent's response. A client that lost its connection sends the same request again
+    with the Last-Event-ID header, and the run it started is resumed from that event
     """
+    received_at = time.monotonic()
+    if last_event_id:
+        resumed = app.runs.resume(last_event_id, query.thread_id)
+        if resumed is None:
+            raise HTTPException(status_code=404, detail="The run is no longer available, please send the message again.")
+        run, after = resumed
+        return StreamingResponse(stream_run(run, after), media_type="text/event-stream", headers={"X-Run-ID": run.run_id})
+
+    # Reject before streaming so that the status code and Retry-After reach the client
+    try:
+        ticket = app.admission.enqueue(query.thread_id)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
     async def generate_stream():
         # Iterate over raw state changes yielded by agent.stream_invoke
         try:
+            # Report the queue position until a slot is free
+            with get_tracer().span("invoke.queue"):
+                async for position in ticket.wait():
+                    queued_event = InvokeResponse(
+                        response= "queued",
+                        content= f"Waiting for a free slot, position {position} in the queue."
+                    )
+                    yield queued_event.model_dump_json()
+            first_event = True
             async for state_change in app.agent.stream_invoke(query= query.query, thread_id= query.thread_id):
                 response_to_send : InvokeResponse | None = None
+                if first_event:
+                    FIRST_EVENT_SECONDS.observe(time.monotonic() - received_at)
+                    first_event = False
 
                 if "__end__" in state_change:
                     final_message = state_change["__end__"].get("messages", [])
@@ -67,10 +206,17 @@ async def invoke_agent(query: InvokeRequest):
                             content= "Graph finished. No messages in the final state."
                         )
                     if response_to_send:
-                        yield f"data: {response_to_send.model_dump_json()}\n\n"
-                    yield "data: [DONE]\n\n"
+                        yield response_to_send.model_dump_json()
+                    yield "[DONE]"
                     return
 
+                # Process tokens of the LLM's answer as they are generated
+                elif "token" in state_change:
+                    response_to_send = InvokeResponse(
+                        response= "assistant_token",
+                        content= state_change["token"]["content"]
+                    )
+
                 # Process agent messages (output from the 'agent' node)
                 elif "agent" in state_change and "messages" in state_change["agent"]:
                     last_msg = state_change["agent"]["messages"][-1]
@@ -94,14 +240,30 @@ async def invoke_agent(query: InvokeRequest):
                             content= last_msg.content
                         )
 
+                # Process fast path and cached answers (output from the 'fast_path' node and the response cache)
+                elif any(state_change.get(key) and "messages" in state_change[key] for key in ("fast_path", "cache")):
+                    key = "fast_path" if state_change.get("fast_path") else "cache"
+                    last_msg = state_change[key]["messages"][-1]
+                    response_to_send = InvokeResponse(
+                        response= "assistant_response",
+                        content= last_msg.content
+                    )
+
                 # Process tools messages (output from the 'tools' node)
                 elif "tools" in state_change and "messages" in state_change["tools"]:
+                    tool_messages = [msg for msg in state_change["tools"]["messages"] if isinstance(msg, ToolMessage)]
                     last_msg = state_change["tools"]["messages"][-1]
-                    if isinstance(last_msg, ToolMessage):
-                        # Tool execution output received
+                    if tool_messages:
+                        # Tool execution output received; one event per tool call of the turn, in call order
+                        for tool_msg in tool_messages[:-1]:
+                            tool_event = InvokeResponse(
+                                response= "tool_output_received",
+                                content= f"Tool name: {tool_msg.name}\nOutput: {tool_msg.content}"
+                            )
+                            yield tool_event.model_dump_json()
                         response_to_send = InvokeResponse(
                             response= "tool_output_received",
-                            content= f"Tool name: {last_msg.name}\nOutput: {last_msg.content}"
+                            content= f"Tool name: {tool_messages[-1].name}\nOutput: {tool_messages[-1].content}"
                         )
                     elif isinstance(last_msg, AIMessage) and last_msg.tool_calls:
                         # This case might indicate the tool node is about to execute tools
@@ -109,30 +271,77 @@ async def invoke_agent(query: InvokeRequest):
                             response= "tool_execution_start",
                             content= f"Executing tool(s)."
                         )
+
+                # Process errors raised while the agent was streaming
+                elif "error" in state_change:
+                    response_to_send = InvokeResponse(
+                        response= "error",
+                        content= f"Error running the agent: {state_change['error']['messages']}"
+                    )
+                    ERROR_EVENTS.inc(type= response_to_send.response)
                 if response_to_send:
                     try:
                         json_response = response_to_send.model_dump_json()
-                        yield f"data: {json_response}\n\n"
+                        yield json_response
                     except Exception as e:
                         # Handle serialization errors gracefully
                         error_result = InvokeResponse(
                             response= "serialization_error",
                             content= f"Error serializing response: {str(e)}"
                         )
-                        yield f"data: {error_result.model_dump_json()}\n\n"
+                        ERROR_EVENTS.inc(type= error_result.response)
+                        yield error_result.model_dump_json()
                 else:
                     # If no specific response type is matched, do nothing or log
                     pass
+        except AdmissionRejected as e:
+            error_result = InvokeResponse(
+                response= "error",
+                content= f"{str(e)} Please retry in {e.retry_after}s."
+            )
+            ERROR_EVENTS.inc(type= error_result.response)
+            yield error_result.model_dump_json()
         except Exception as e:
             # Catch any unexpected errors during stream generation
             error_result = InvokeResponse(
                 response= "stream_error",
                 content= f"Error streaming agent response: {str(e)}"
             )
-            yield f"data: {error_result.model_dump_json()}\n\n"
+            ERROR_EVENTS.inc(type= error_result.response)
+            yield error_result.model_dump_json()
         finally:
-            yield "data: [DONE]\n\n"
-    return StreamingResponse(generate_stream(), media_type="text/event-stream")
+            ticket.release()
+            yield "[DONE]"
+    # The run goes on in the background even if this connection drops
+    run = app.runs.start(query.thread_id, traced_run(generate_stream(), query.thread_id, traceparent, received_at))
+    return StreamingResponse(stream_run(run), media_type="text/event-stream", headers={"X-Run-ID": run.run_id})
+
+@app.post("/tools/refresh")
+async def refresh_tools():
+    """
+    Reload the tool list from the MCP server without restarting the app
+    """
+    try:
+        refreshed = await app.agent.refresh_tools()
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return {"refreshed": refreshed, "tools": [tool.name for tool in app.agent.tools]}
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(repo: Optional[str] = None):
+    """
+    Drop the cached answers about a repository (owner/repo), or all cached answers
+    """
+    if not app.agent.response_cache:
+        return {"invalidated": 0}
+    return {"invalidated": app.agent.response_cache.invalidate(repo), **app.agent.response_cache.stats()}
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Expose the app's metrics in the Prometheus text format
+    """
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # --- Main ---
 if __name__ == "__main__":
@@ -1,14 +1,213 @@
+import argparse
 import asyncio
+import base64
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
+import urllib.parse
+from datetime import datetime, timedelta, timezone
 from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import Middleware, MiddlewareContext
 from contextlib import asynccontextmanager
-from github import Github, Auth
-from typing import Union, Dict, List
+from dataclasses import dataclass
+from github import Github
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from typing import Any, Callable, Optional, Tuple, Union, Dict, List
+
+# Import custom modules
+from utils.cache import CacheEntry, ResponseCache
+from utils.executor import BlockingExecutor
+from utils.github_store import GitHubStore, SyncState
+from utils.metrics import CallbackMetric, MetricsRegistry, SpanMetrics, ratio
+from utils.rate_limit import RateLimitScheduler
+from utils.token_pool import TokenPool
+from utils.tracing import configure_tracer, get_tracer, trace_pygithub
+from utils.webhooks import plan_invalidation, verify_signature
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Number of items fetched per GitHub API page
+PAGE_SIZE = int(os.getenv("GITHUB_PAGE_SIZE", "100"))
+# Upper bound on commits returned by a single get_all_commits call
+MAX_COMMITS_LIMIT = 100
+# Upper bound on repositories per batch tool call, and how many of them are fetched at once
+MAX_BATCH_REPOS = 50
+BATCH_CONCURRENCY = int(os.getenv("GITHUB_BATCH_CONCURRENCY", "4"))
+# Optional local store: seconds between incremental syncs of a resource, items stored per resource at most,
+# and commits fetched per sync at most
+STORE_SYNC_INTERVAL = float(os.getenv("GITHUB_STORE_SYNC_INTERVAL", "60"))
+STORE_MAX_ITEMS = int(os.getenv("GITHUB_STORE_MAX_ITEMS", "5000"))
+STORE_SYNC_BATCH = int(os.getenv("GITHUB_STORE_SYNC_BATCH", "500"))
+STORE_SYNC_OVERLAP = timedelta(minutes=5)
+# Hard bound on the size of a single tool response, in bytes of JSON
+MAX_RESPONSE_BYTES = int(os.getenv("GITHUB_MAX_RESPONSE_BYTES", "16000"))
+# Issue fields that can be selected, and those returned by default
+ISSUE_FIELDS = ("number", "title", "state", "author", "labels", "assignees", "comments", "created_at", "updated_at", "body", "is_pull_request")
+DEFAULT_ISSUE_FIELDS = ["number", "title", "state", "labels", "assignees", "updated_at", "body"]
+# Pages of issues fetched from the API at most for a single issue query
+ISSUE_MAX_PAGES = 10
+# Seconds each kind of cached resource stays fresh before it is revalidated with its ETag
+CACHE_TTLS = {"repo": 300, "branches": 120, "issues": 60, "search": 600, "user_repos": 300, "overview": 120}
+# GraphQL selections of the repository overview, by section name
+OVERVIEW_SECTIONS = {
+    "stats": """
+        description stargazerCount forkCount pushedAt isArchived
+        primaryLanguage { name }
+        defaultBranchRef { name }""",
+    "branches": """
+        refs(refPrefix: "refs/heads/", first: $limit) { totalCount nodes { name } }""",
+    "commits": """
+        defaultBranchRef { target { ... on Commit {
+            history(first: $limit) { nodes { oid messageHeadline committedDate author { name } } }
+        } } }""",
+    "issues": """
+        issues(states: OPEN, first: $limit, orderBy: {field: UPDATED_AT, direction: DESC}) {
+            totalCount nodes { number title updatedAt author { login } labels(first: 5) { nodes { name } } }
+        }""",
+    "pull_requests": """
+        pullRequests(states: OPEN, first: $limit, orderBy: {field: UPDATED_AT, direction: DESC}) {
+            totalCount nodes { number title updatedAt author { login } headRefName }
+        }""",
+}
+
+# --- Helpers ---
+def _parse_overrides(raw: str) -> Dict[str, float]:
+    """
+    Parses per-name numeric settings of the form "get_all_commits=120,get_all_issues=90".
+    """
+    overrides = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            overrides[name.strip()] = float(value)
+    return overrides
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses an ISO 8601 date (e.g. "2024-06-18" or "2024-06-18T10:30:00Z").
+    """
+    return datetime.fromisoformat(value) if value else None
+
+def _to_utc_iso(value: datetime) -> str:
+    """
+    Formats a date as ISO 8601 in UTC, treating naive dates as UTC, so stored dates compare as strings.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+def _encode_cursor(state: Dict[str, Any]) -> str:
+    """
+    Encodes pagination state into an opaque continuation cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decodes a continuation cursor produced by _encode_cursor.
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _query_fingerprint(*parts: Any) -> str:
+    """
+    Fingerprints query arguments so a cursor cannot be replayed against a different query.
+    """
+    return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()[:12]
+
+def _fit_budget(items: List[Any], budget: int) -> Tuple[List[Any], bool]:
+    """
+    Keeps the leading items whose JSON encoding fits in the byte budget, so tool outputs stay bounded
+    in the LLM context. Returns the kept items and whether any were dropped.
+    """
+    # The brackets, then each item and its ", " separator
+    kept, size = [], 0
+    for item in items:
+        size += len(json.dumps(item, default=str)) + 2
+        if size > budget:
+            return kept, True
+        kept.append(item)
+    return kept, False
+
+def _fit_names(names: List[str], budget: int) -> List[str]:
+    """
+    Bounds a list of names by the byte budget, noting how many were left out.
+    """
+    kept, truncated = _fit_budget(names, budget)
+    if truncated:
+        kept.append(f"... {len(names) - len(kept)} more not shown")
+    return kept
+
+async def _run_github(tool_name: str, func: Callable[..., Any], *args) -> Any:
+    """
+    Dispatches a blocking github call through the executor so the event loop stays free.
+    """
+    try:
+        with get_tracer().span("github.call", {"github.operation": getattr(func, "__name__", str(func)), "mcp.tool": tool_name}):
+            return await mcp.executor.run(tool_name, mcp.tokens.call, func, *args)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"'{tool_name}' timed out after {mcp.executor.timeout_for(tool_name)}s")
+
+async def _run_batch(tool_name: str, func: Callable[..., Any], repo_names: List[str], *args) -> Dict[str, Any]:
+    """
+    Runs a per-repo github call for several repositories concurrently and merges the outcomes.
+    A failing repository is reported under "errors" without failing the whole batch.
+    """
+    if len(repo_names) > MAX_BATCH_REPOS:
+        raise ValueError(f"At most {MAX_BATCH_REPOS} repositories can be fetched in one call")
+    # Bound each batch so that one large batch cannot occupy every executor worker
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def _one(repo_name: str):
+        async with slots:
+            try:
+                return repo_name, await _run_github(tool_name, func, repo_name, *args), None
+            except Exception as e:
+                logger.error(f"Error in {tool_name} for '{repo_name}': {e}")
+                return repo_name, None, str(e)
+
+    outcomes = await asyncio.gather(*(_one(repo_name) for repo_name in dict.fromkeys(repo_names)))
+    return {
+        "results": {repo_name: value for repo_name, value, error in outcomes if error is None},
+        "errors": {repo_name: error for repo_name, _, error in outcomes if error is not None},
+    }
+
+# --- Metrics ---
+metrics = MetricsRegistry()
+TOOL_SECONDS = metrics.histogram("github_tool_duration_seconds", "Duration of MCP tool calls, by tool and status.", ["tool", "status"])
+CALL_SECONDS = metrics.histogram("github_call_duration_seconds", "Duration of GitHub operations including rate-limit pacing and retries, by operation.", ["operation"])
+REQUEST_SECONDS = metrics.histogram("github_request_duration_seconds", "Duration of GitHub HTTP requests, by status code.", ["status_code"])
+
+# Latencies of the spans, see SpanMetrics
+SPAN_METRICS = SpanMetrics({
+    "mcp.tool": lambda span: TOOL_SECONDS.observe(span.duration, tool=span.attributes.get("mcp.tool", ""), status="error" if span.error else "ok"),
+    "github.call": lambda span: CALL_SECONDS.observe(span.duration, operation=span.attributes.get("github.operation", "")),
+    "github.request": lambda span: REQUEST_SECONDS.observe(span.duration, status_code=span.attributes.get("http.status_code", "error")),
+})
+
+def _cache_hit_ratio() -> Optional[float]:
+    stats = mcp.cache.stats()
+    return ratio(stats["hits"], stats["hits"] + stats["revalidated"] + stats["misses"])
+
+def _credential_budgets(field: str) -> Dict[str, Any]:
+    return {name: status[field] for name, status in mcp.tokens.status()["credentials"].items()}
+
+metrics.gauge("github_rate_limit_remaining", "GitHub API requests left in the current window, by credential.", lambda: _credential_budgets("remaining"), ["credential"])
+metrics.gauge("github_rate_limit_limit", "GitHub API requests allowed per window, by credential.", lambda: _credential_budgets("limit"), ["credential"])
+metrics.register(CallbackMetric("github_credential_switches_total", "Calls moved to another credential because theirs was rate limited.", lambda: mcp.tokens.switches, kind="counter"))
+metrics.gauge("github_cache_entries", "Entries in the response cache.", lambda: mcp.cache.stats()["entries"])
+metrics.gauge("github_cache_hit_ratio", "Share of cache lookups served without any GitHub request since start.", lambda: _cache_hit_ratio())
+metrics.register(CallbackMetric("github_cache_revalidations_total", "Cache entries revalidated with a 304 answer.", lambda: mcp.cache.stats()["revalidated"], kind="counter"))
+metrics.gauge("github_executor_workers", "Threads available for concurrent GitHub calls.", lambda: mcp.executor.max_workers)
+
 # --- Lifespan Management ---
 # Define async context manager for lifespan management
 @asynccontextmanager
@@ -16,22 +215,660 @@ async def lifespan(app: FastMCP):
     """
     Lifespan management for the FastMCP server
     """
-    # Initiate github client
-    auth = Auth.Token("<YOUR_GITHUB_PAT_TOKEN>")
-    app.github_client = Github(auth=auth)
-    logger.info("Github client initiated")
+    # Trace tool calls and the GitHub requests they send, when an exporter is configured
+    app.tracer = configure_tracer("github_mcp_server")
+    app.tracer.add_exporter(SPAN_METRICS)
+    trace_pygithub()
+    # Initiate a github client and a rate-limit aware scheduler per configured credential
+    # Retries and request spacing are left to the schedulers so that backoff is coordinated across tools
+    # and concurrent tool calls are not serialized by PyGithub's global throttle
+    app.tokens = TokenPool.from_env(
+        lambda auth: Github(auth=auth, per_page=PAGE_SIZE, retry=None, seconds_between_requests=None),
+        lambda client: RateLimitScheduler(
+            client,
+            reserve=int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "50")),
+            max_wait=float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "60")),
+        ),
+    )
+    logger.info(f"Github clients initiated for {len(app.tokens.credentials)} credential(s)")
+    # Initiate the execution layer for blocking github calls
+    app.executor = BlockingExecutor(timeouts=_parse_overrides(os.getenv("GITHUB_TOOL_TIMEOUTS", "")))
+    logger.info(f"Github executor initiated with {app.executor.max_workers} workers")
+    # Initiate the response cache shared by all tools
+    CACHE_TTLS.update(_parse_overrides(os.getenv("GITHUB_CACHE_TTLS", "")))
+    app.cache = ResponseCache(
+        max_entries=int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "1024")),
+        max_age=float(os.getenv("GITHUB_CACHE_MAX_AGE", "900")),
+    )
+    # Initiate the optional local store; the database is opened lazily on first use
+    store_path = os.getenv("GITHUB_STORE_PATH")
+    app.store = GitHubStore(store_path) if store_path else None
+    # Backfills of the local store are started from the executor threads on this loop
+    app.loop = asyncio.get_running_loop()
     # Release the client
     yield
     # Close the client
     logger.info("Closing github client")
-    app.github_client.close()
+    for task in list(_backfill_tasks.values()):
+        task.cancel()
+    app.executor.shutdown()
+    if app.store:
+        app.store.close()
+    app.tokens.close()
+    app.tracer.close()
+
+class TracingMiddleware(Middleware):
+    """
+    Records a span per tool call, continuing the caller's trace from the traceparent in the request's _meta.
+    """
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        # The _meta sent by the client is on the MCP request, not on the message rebuilt by FastMCP
+        request_context = context.fastmcp_context.request_context if context.fastmcp_context else None
+        meta = request_context.meta if request_context else None
+        traceparent = (meta.model_extra or {}).get("traceparent") if meta is not None else None
+        with get_tracer().span("mcp.tool", {"mcp.tool": context.message.name}, traceparent=traceparent):
+            return await call_next(context)
 
 # --- MCP Server ---
 # Set the instance of mcp server
 mcp = FastMCP(name="github_mcp_server", lifespan= lifespan)
+mcp.add_middleware(TracingMiddleware())
+
+# --- GitHub Calls ---
+# Blocking PyGithub calls; these run on the executor threads, including pagination
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    """
+    Case-insensitive lookup of a response header.
+    """
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def _next_page_url(headers: Dict[str, str]) -> Optional[str]:
+    """
+    Returns the rel="next" url of a paginated response, if any.
+    """
+    for link in (_header(headers, "link") or "").split(","):
+        url, _, rel = link.partition(";")
+        if 'rel="next"' in rel:
+            return url.strip().strip("<>")
+    return None
+
+@dataclass
+class ListPage:
+    """
+    A cached page of a list endpoint, with what is needed to revalidate it and to find the next page.
+    """
+    url: str
+    params: Optional[Dict[str, Any]]
+    etag: Optional[str]
+    next_url: Optional[str]
+    records: List[Any]
+
+def _get_json_pages(
+    url: str,
+    params: Dict[str, Any],
+    transform: Callable[[List[Any]], List[Any]],
+    max_pages: Optional[int] = None,
+    pages: Optional[List[ListPage]] = None,
+    response: Optional[Tuple[Dict[str, Any], Any]] = None,
+) -> List[ListPage]:
+    """
+    Fetches a list endpoint page by page, keeping the transformed items of each page with its ETag.
+    Continues after the given pages, from the already received response to the next page if any.
+    """
+    requester = mcp.tokens.client().requester
+    pages = list(pages or [])
+    page_url, page_params = (pages[-1].next_url, None) if pages else (url, params)
+    headers, data = response or requester.requestJsonAndCheck("GET", page_url, parameters=page_params)
+    while True:
+        # Search endpoints wrap their results in an object
+        items = data["items"] if isinstance(data, dict) else data
+        next_url = _next_page_url(headers)
+        pages.append(ListPage(page_url, page_params, _header(headers, "etag"), next_url, transform(items)))
+        if not next_url or (max_pages and len(pages) >= max_pages):
+            return pages
+        page_url, page_params = next_url, None
+        headers, data = requester.requestJsonAndCheck("GET", page_url)
+
+def _revalidate_list(url: str, params: Dict[str, Any], transform: Callable[[List[Any]], List[Any]], max_pages: Optional[int]) -> Callable[[CacheEntry], Any]:
+    """
+    Builds a revalidation check that asks GitHub whether every cached page still matches its ETag.
+    A 304 answer does not count against the rate limit. From the first page that changed on, the pages
+    are rebuilt from the answer to the check, while the pages before it are kept.
+    """
+    def _revalidate(entry: CacheEntry) -> Any:
+        requester = mcp.tokens.client().requester
+        for index, page in enumerate(entry.value):
+            if not page.etag:
+                return False
+            status, headers, output = requester.requestJson(
+                "GET", page.url, parameters=page.params, headers={"If-None-Match": page.etag}
+            )
+            if status == 304:
+                continue
+            if status != 200:
+                return False
+            return _get_json_pages(url, params, transform, max_pages, entry.value[:index], (headers, json.loads(output))), None
+        return True
+    return _revalidate
+
+def _cached_list(key: Tuple[str, ...], url: str, params: Dict[str, Any], transform: Callable[[List[Any]], List[Any]], max_pages: Optional[int] = None) -> List[Any]:
+    """
+    Returns the transformed items of a list endpoint through the response cache.
+    The transform is applied page by page, so it must map items one to one.
+    """
+    def _fetch():
+        return _get_json_pages(url, params, transform, max_pages), None
+    pages = mcp.cache.get_or_fetch(key, CACHE_TTLS[key[0]], _fetch, _revalidate_list(url, params, transform, max_pages))
+    return [record for page in pages for record in page.records]
+
+def _revalidate_repo(entry: CacheEntry) -> bool:
+    # update() sends a conditional request and refreshes the object in place when it changed
+    entry.value.update()
+    return True
+
+def _get_repo(repo_name: str):
+    """
+    Returns the repository object through the response cache.
+    The object sends its later requests with the credential that fetched it, so it is cached per credential
+    and calls on it are paced and counted by the scheduler of the credential serving the call.
+    """
+    credential = mcp.tokens.current()
+
+    def _fetch():
+        repo = credential.client.get_repo(repo_name)
+        return repo, repo.etag
+    return mcp.cache.get_or_fetch(("repo", repo_name.lower(), credential.name), CACHE_TTLS["repo"], _fetch, _revalidate_repo)
+
+def _search_repositories(keyword: str) -> List[Dict[str, str]]:
+    # Limit results
+    return _cached_list(
+        ("search", keyword.lower()),
+        "/search/repositories",
+        {"q": keyword, "per_page": 2},
+        lambda items: [
+            {"full_name": repo["full_name"], "description": repo["description"] or "No description provided."}
+            for repo in items
+        ],
+        max_pages=1,
+    )
+
+def _list_user_repos() -> List[str]:
+    return _cached_list(
+        ("user_repos",),
+        "/user/repos",
+        {"per_page": PAGE_SIZE},
+        lambda items: [repo["full_name"] for repo in items],
+    )
+
+def _list_branches(repo_name: str) -> List[str]:
+    if mcp.store:
+        # Branch lists are small, so the stored list is simply refreshed as a whole
+        with mcp.store.sync_lock(repo_name, "branches"):
+            state = mcp.store.sync_state(repo_name, "branches")
+            if state and state.is_fresh(STORE_SYNC_INTERVAL):
+                return mcp.store.branches(repo_name)
+            branches = [branch.name for branch in _get_repo(repo_name).get_branches()]
+            mcp.store.replace_branches(repo_name, branches)
+            mcp.store.mark_synced(repo_name, "branches", None, True)
+            return branches
+    return _cached_list(
+        ("branches", repo_name.lower()),
+        f"/repos/{repo_name}/branches",
+        {"per_page": PAGE_SIZE},
+        lambda items: [branch["name"] for branch in items],
+    )
+
+def _commit_record(commit) -> Dict[str, str]:
+    return {
+        "sha": commit.sha,
+        "author": str(commit.commit.author.name),
+        "date": _to_utc_iso(commit.commit.author.date),
+        "message": commit.commit.message.split("\n", 1)[0],
+    }
+
+def _issue_record(issue) -> Dict[str, Any]:
+    return {
+        "number": issue.number,
+        "title": issue.title,
+        "body": issue.body,
+        "state": issue.state,
+        "is_pull_request": issue.pull_request is not None,
+        "author": issue.user.login if issue.user else None,
+        "labels": [label.name for label in issue.labels],
+        "assignees": [assignee.login for assignee in issue.assignees],
+        "comments": issue.comments,
+        "created_at": _to_utc_iso(issue.created_at),
+        "updated_at": _to_utc_iso(issue.updated_at),
+    }
+
+def _head_sha(repo_name: str, ref: Optional[str]) -> str:
+    """
+    Resolves a branch, tag or sha, or the default branch if None, to the sha of its commit.
+    The sha media type keeps the answer to the sha alone.
+    """
+    ref = ref or "HEAD"
+    status, _, output = mcp.tokens.client().requester.requestJson(
+        "GET", f"/repos/{repo_name}/commits/{urllib.parse.quote(ref)}", headers={"Accept": "application/vnd.github.sha"}
+    )
+    if status != 200:
+        raise ValueError(f"Could not resolve '{ref}' in '{repo_name}' (HTTP {status})")
+    return output.strip()
+
+def _store_covers(repo_name: str, since: Optional[str], state: SyncState) -> bool:
+    """
+    Returns whether the local store holds every commit of the default branch from the since date on.
+    """
+    total, oldest = mcp.store.commit_coverage(repo_name)
+    return state.complete or bool(since and total and since >= oldest)
+
+def _list_commits(
+    repo_name: str,
+    since: Optional[str],
+    until: Optional[str],
+    branch: Optional[str],
+    path: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+) -> Dict[str, Any]:
+    fingerprint = _query_fingerprint(repo_name, since, until, branch, path)
+    state = _decode_cursor(cursor) if cursor else None
+    if state is not None and state.get("q") != fingerprint:
+        raise ValueError("Cursor does not belong to this query")
+    since_iso = _to_utc_iso(_parse_date(since)) if since else None
+    until_iso = _to_utc_iso(_parse_date(until)) if until else None
+
+    # A listing stays on the source of its first window, as their positions are not comparable.
+    # The local store only indexes the default branch of the whole repository, and is used
+    # when it holds the whole window
+    synced, covered = None, False
+    if mcp.store and not branch and not path and (state is None or state.get("s") == "store"):
+        sync_state = _sync_commits(repo_name)
+        synced, covered = _commit_sync_progress(sync_state), _store_covers(repo_name, since_iso, sync_state)
+    source = state.get("s") if state else ("store" if covered else "api")
+    if source == "store":
+        if not covered or (state and state["root"] != synced["root"]):
+            raise ValueError("The local index changed since this cursor was issued, call again without a cursor")
+        # The cursor holds the date and sha of the last commit returned, which new commits do not shift
+        after = (state["d"], state["h"]) if state else None
+        records = mcp.store.query_commits(repo_name, since_iso, until_iso, limit + 1, after)
+        return _commit_window(fingerprint, {"s": "store", "root": synced["root"]}, records[:limit], len(records) > limit)
+    if source != "api":
+        raise ValueError("Invalid cursor")
+
+    # The cursor holds the index of the next commit in the history of the head the listing started from,
+    # so that commits pushed meanwhile do not shift the windows. The head just synced into the store
+    # is as recent as the store's answers, so it is not resolved again
+    head = state["sha"] if state else (synced["head"] if synced else _head_sha(repo_name, branch))
+    start = state["n"] if state else 0
+    # Only pass the filters that were given; PyGithub treats missing arguments as "not set"
+    filters: Dict[str, Any] = {"sha": head}
+    if path:
+        filters["path"] = path
+    if since:
+        filters["since"] = _parse_date(since)
+    if until:
+        filters["until"] = _parse_date(until)
+    commits = _get_repo(repo_name).get_commits(**filters)
+
+    # Fetch pages lazily until the window is full
+    page, offset = divmod(start, PAGE_SIZE)
+    records = []
+    has_more = False
+    while len(records) < limit:
+        items = commits.get_page(page)
+        remaining = items[offset:offset + limit - len(records)]
+        records.extend(_commit_record(commit) for commit in remaining)
+        offset += len(remaining)
+        if offset < len(items):
+            has_more = True
+            break
+        if len(items) < PAGE_SIZE:
+            break
+        page, offset = page + 1, 0
+        has_more = len(records) >= limit
+    return _commit_window(fingerprint, {"s": "api", "sha": head, "n": start}, records, has_more)
+
+def _commit_window(fingerprint: str, position: Dict[str, Any], records: List[Dict[str, str]], has_more: bool) -> Dict[str, Any]:
+    """
+    Bounds a commit window by the response budget and builds the cursor of the next window.
+    """
+    records, truncated = _fit_budget(records, MAX_RESPONSE_BYTES)
+    next_cursor = None
+    if records and (has_more or truncated):
+        if position["s"] == "store":
+            position = {**position, "d": records[-1]["date"], "h": records[-1]["sha"]}
+        else:
+            position = {**position, "n": position["n"] + len(records)}
+        next_cursor = _encode_cursor({"q": fingerprint, **position})
+    return {"commits": records, "next_cursor": next_cursor}
+
+def _issue_json_record(issue: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "number": issue["number"],
+        "title": issue["title"],
+        "body": issue["body"],
+        "state": issue["state"],
+        "is_pull_request": "pull_request" in issue,
+        "author": (issue.get("user") or {}).get("login"),
+        "labels": [label["name"] for label in issue.get("labels", [])],
+        "assignees": [assignee["login"] for assignee in issue.get("assignees", [])],
+        "comments": issue.get("comments", 0),
+        "created_at": issue["created_at"],
+        "updated_at": issue["updated_at"],
+    }
+
+def _list_issues(
+    repo_name: str,
+    state: str,
+    labels: Optional[List[str]],
+    assignee: Optional[str],
+    include_pull_requests: bool,
+    fields: List[str],
+    body_chars: int,
+    limit: int,
+    budget: int,
+) -> Dict[str, Any]:
+    if mcp.store and _store_serves_issues(repo_name):
+        issues = mcp.store.query_issues(repo_name, state=state, include_pull_requests=include_pull_requests)
+        if labels:
+            issues = [issue for issue in issues if set(labels) <= set(issue["labels"])]
+        if assignee:
+            issues = [issue for issue in issues if assignee in issue["assignees"]]
+    else:
+        params: Dict[str, Any] = {"state": state, "per_page": PAGE_SIZE}
+        if labels:
+            params["labels"] = ",".join(labels)
+        if assignee:
+            params["assignee"] = assignee
+        issues = _cached_list(
+            ("issues", repo_name.lower(), state, tuple(labels or ()), assignee),
+            f"/repos/{repo_name}/issues",
+            params,
+            lambda items: [_issue_json_record(issue) for issue in items],
+            max_pages=ISSUE_MAX_PAGES,
+        )
+    if not include_pull_requests:
+        issues = [issue for issue in issues if not issue["is_pull_request"]]
+
+    records = []
+    for issue in issues[:limit]:
+        record = {field: issue[field] for field in fields}
+        if "body" in record and record["body"] and len(record["body"]) > body_chars:
+            record["body"] = record["body"][:body_chars] + "..."
+        records.append(record)
+    records, truncated = _fit_budget(records, budget)
+    return {"issues": records, "total": len(issues), "truncated": truncated or len(issues) > len(records)}
+
+# --- Local Store Sync ---
+# Syncs of the optional local store; tool calls only fetch what changed, larger backfills run in the background
+def _commit_sync_progress(state: Optional[SyncState]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the progress of the commit sync: the head the history was stored from, the head last synced,
+    and the page of the history to backfill next, if the backfill is not done.
+    """
+    try:
+        progress = json.loads(state.cursor) if state and state.cursor else None
+    except ValueError:
+        return None
+    return progress if isinstance(progress, dict) and "root" in progress else None
+
+def _sync_commits(repo_name: str) -> SyncState:
+    """
+    Brings the stored commits of the default branch up to date and returns their sync state.
+    New commits are those of the current head that the last synced head lacks, so commits pushed with
+    older dates (rebased or merged branches) are not missed; a rewritten history is stored again.
+    The older history is left to a background backfill.
+    """
+    store = mcp.store
+    with store.sync_lock(repo_name, "commits"):
+        state = store.sync_state(repo_name, "commits")
+        progress = _commit_sync_progress(state)
+        if not (state and progress and state.is_fresh(STORE_SYNC_INTERVAL)):
+            head = _head_sha(repo_name, None)
+            complete = bool(state and state.complete)
+            if progress and progress["head"] != head:
+                comparison = _get_repo(repo_name).compare(progress["head"], head)
+                if comparison.status == "ahead" and comparison.ahead_by <= STORE_SYNC_BATCH:
+                    records = [_commit_record(commit) for commit in comparison.commits]
+                    store.upsert_commits(repo_name, records)
+                    progress["head"] = head
+                    logger.info(f"Synced {len(records)} new commits of '{repo_name}' into the local store")
+                else:
+                    logger.info(f"History of '{repo_name}' was rewritten or moved too far, storing it again")
+                    progress = None
+            if progress is None:
+                store.clear(repo_name, "commits")
+                progress, complete = {"root": head, "head": head, "backfill": {"sha": head, "page": 0}}, False
+            store.mark_synced(repo_name, "commits", json.dumps(progress), complete)
+            state = store.sync_state(repo_name, "commits")
+    if progress["backfill"]:
+        _request_backfill(repo_name, "commits")
+    return state
+
+def _backfill_commits(repo_name: str) -> bool:
+    """
+    Stores the next batch of the commit history, at most STORE_SYNC_BATCH commits, and returns whether more remain.
+    The history is backfilled newest first up to STORE_MAX_ITEMS; it is complete once its end is stored.
+    Pages are fetched without holding the sync lock, and dropped if the history was stored again meanwhile.
+    """
+    store = mcp.store
+    progress = _commit_sync_progress(store.sync_state(repo_name, "commits"))
+    backfill = progress["backfill"] if progress else None
+    if not backfill:
+        return False
+    commits = _get_repo(repo_name).get_commits(sha=backfill["sha"])
+    stored, _ = store.commit_coverage(repo_name)
+    page, records, end = backfill["page"], [], False
+    while len(records) < STORE_SYNC_BATCH and stored + len(records) < STORE_MAX_ITEMS:
+        items = commits.get_page(page)
+        records.extend(_commit_record(commit) for commit in items)
+        page += 1
+        if len(items) < PAGE_SIZE:
+            end = True
+            break
+    with store.sync_lock(repo_name, "commits"):
+        state = store.sync_state(repo_name, "commits")
+        progress = _commit_sync_progress(state)
+        if not progress or progress["backfill"] != backfill:
+            return bool(progress and progress["backfill"])
+        store.upsert_commits(repo_name, records)
+        stored, _ = store.commit_coverage(repo_name)
+        progress["backfill"] = None if end or stored >= STORE_MAX_ITEMS else {"sha": backfill["sha"], "page": page}
+        # Keep the time of the last head check, so that new commits are still looked for on schedule
+        store.mark_synced(repo_name, "commits", json.dumps(progress), end, synced_at=state.synced_at)
+    logger.info(f"Backfilled {len(records)} commits of '{repo_name}' into the local store")
+    return progress["backfill"] is not None
+
+def _issue_sync_progress(state: Optional[SyncState]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the progress of the issue sync: the update time the current listing starts from, the one
+    the next listing will start from, and the page of the current listing to fetch next, None once
+    it is done. A repository with too many issues to store is marked as capped.
+    """
+    try:
+        progress = json.loads(state.cursor) if state and state.cursor else None
+    except ValueError:
+        return None
+    return progress if isinstance(progress, dict) and "page" in progress else None
+
+def _sync_issues(repo_name: str) -> bool:
+    """
+    Stores the next batch of the issues changed since the last sync, at most STORE_SYNC_BATCH,
+    and returns whether more remain. Issues are listed by last update, newest first, so that issues updated
+    while the listing is paged only shift later pages back; they are fetched again by the next listing,
+    which starts from the time the current one started. The stored issues are complete once a listing is done.
+    """
+    store = mcp.store
+    with store.sync_lock(repo_name, "issues"):
+        state = store.sync_state(repo_name, "issues")
+        progress = _issue_sync_progress(state)
+        if progress and progress.get("capped"):
+            return False
+        if progress is None or progress["page"] is None:
+            if progress and state.is_fresh(STORE_SYNC_INTERVAL):
+                return False
+            # Overlap the next listing a little to tolerate clock skew; upserts make repeats harmless
+            started = datetime.now(timezone.utc) - STORE_SYNC_OVERLAP
+            progress = {"since": progress["next"] if progress else None, "next": started.isoformat(), "page": 0}
+        since = _parse_date(progress["since"]) if progress["since"] else None
+        issues = _get_repo(repo_name).get_issues(
+            state="all", sort="updated", direction="desc", **({"since": since} if since else {})
+        )
+        page, records, end = progress["page"], [], False
+        while len(records) < STORE_SYNC_BATCH:
+            items = issues.get_page(page)
+            records.extend(_issue_record(issue) for issue in items)
+            page += 1
+            if len(items) < PAGE_SIZE:
+                end = True
+                break
+        store.upsert_issues(repo_name, records)
+        if not end and store.issue_count(repo_name) >= STORE_MAX_ITEMS:
+            # Too many issues to index, they are served from the API
+            store.clear(repo_name, "issues")
+            store.mark_synced(repo_name, "issues", json.dumps({"capped": True, "page": None}), False)
+            logger.info(f"'{repo_name}' has more than {STORE_MAX_ITEMS} issues, not storing them")
+            return False
+        progress["page"] = None if end else page
+        store.mark_synced(repo_name, "issues", json.dumps(progress), end)
+        logger.info(f"Synced {len(records)} issues of '{repo_name}' into the local store")
+        return not end
+
+def _store_serves_issues(repo_name: str) -> bool:
+    """
+    Returns whether the local store holds every issue of a repository, bringing it up to date with one sync batch.
+    A repository not stored yet, or with more changes than a batch, is synced in the background meanwhile.
+    """
+    state = mcp.store.sync_state(repo_name, "issues")
+    progress = _issue_sync_progress(state)
+    if progress and progress.get("capped"):
+        return False
+    if state and state.complete and not state.is_fresh(STORE_SYNC_INTERVAL):
+        _sync_issues(repo_name)
+        state = mcp.store.sync_state(repo_name, "issues")
+    if state and state.complete:
+        return True
+    _request_backfill(repo_name, "issues")
+    return False
+
+# --- Local Store Backfill ---
+# Backfills run as background tasks, one bounded batch per executor call, so that tool calls never wait for them
+BACKFILLERS: Dict[str, Callable[[str], bool]] = {
+    "commits": _backfill_commits,
+    "issues": _sync_issues,
+}
+_backfill_tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+
+def _request_backfill(repo_name: str, resource: str):
+    """
+    Starts the backfill of a resource of a repository unless it is running; called from the executor threads.
+    """
+    mcp.loop.call_soon_threadsafe(_start_backfill, repo_name, resource)
+
+def _start_backfill(repo_name: str, resource: str):
+    key = (repo_name.lower(), resource)
+    if key in _backfill_tasks:
+        return
+    task = asyncio.create_task(_backfill(repo_name, resource))
+    _backfill_tasks[key] = task
+    task.add_done_callback(lambda _: _backfill_tasks.pop(key, None))
+
+async def _backfill(repo_name: str, resource: str):
+    try:
+        while await _run_github(f"backfill_{resource}", BACKFILLERS[resource], repo_name):
+            pass
+    except Exception as e:
+        logger.warning(f"Backfilling {resource} of '{repo_name}' failed: {e}")
+
+def _get_repository_overview(repo_name: str, sections: List[str], limit: int) -> Dict[str, Any]:
+    owner, _, name = repo_name.partition("/")
+    # One aliased field per section so that each section can carry its own selection
+    selection = "\n".join(f"{section}: repository(owner: $owner, name: $name) {{{OVERVIEW_SECTIONS[section]}\n}}" for section in sections)
+    uses_limit = any(section != "stats" for section in sections)
+    query = f"query($owner: String!, $name: String!{', $limit: Int!' if uses_limit else ''}) {{\n{selection}\n}}"
+    variables: Dict[str, Any] = {"owner": owner, "name": name}
+    if uses_limit:
+        variables["limit"] = limit
+
+    def _fetch():
+        _, data = mcp.tokens.client().requester.graphql_query(query, variables)
+        if data.get("errors"):
+            raise ValueError("; ".join(error.get("message", "") for error in data["errors"]))
+        return _shape_overview(repo_name, data["data"]), None
+    key = ("overview", repo_name.lower(), tuple(sections), limit)
+    return mcp.cache.get_or_fetch(key, CACHE_TTLS["overview"], _fetch)
+
+def _shape_overview(repo_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flattens the GraphQL response into a compact overview.
+    """
+    if any(value is None for value in data.values()):
+        raise ValueError(f"Repository '{repo_name}' not found")
+    overview: Dict[str, Any] = {"repo_name": repo_name}
+    if "stats" in data:
+        stats = data["stats"]
+        overview["stats"] = {
+            "description": stats["description"],
+            "stars": stats["stargazerCount"],
+            "forks": stats["forkCount"],
+            "language": (stats["primaryLanguage"] or {}).get("name"),
+            "default_branch": (stats["defaultBranchRef"] or {}).get("name"),
+            "pushed_at": stats["pushedAt"],
+            "archived": stats["isArchived"],
+        }
+    if "branches" in data:
+        refs = data["branches"]["refs"]
+        overview["branches"] = {"total": refs["totalCount"], "names": [ref["name"] for ref in refs["nodes"]]}
+    if "commits" in data:
+        target = (data["commits"]["defaultBranchRef"] or {}).get("target") or {}
+        overview["recent_commits"] = [
+            {
+                "sha": commit["oid"],
+                "author": (commit["author"] or {}).get("name"),
+                "date": commit["committedDate"],
+                "message": commit["messageHeadline"],
+            }
+            for commit in target.get("history", {}).get("nodes", [])
+        ]
+    if "issues" in data:
+        issues = data["issues"]["issues"]
+        overview["open_issues"] = {
+            "total": issues["totalCount"],
+            "recent": [
+                {
+                    "number": issue["number"],
+                    "title": issue["title"],
+                    "author": (issue["author"] or {}).get("login"),
+                    "updated_at": issue["updatedAt"],
+                    "labels": [label["name"] for label in issue["labels"]["nodes"]],
+                }
+                for issue in issues["nodes"]
+            ],
+        }
+    if "pull_requests" in data:
+        pulls = data["pull_requests"]["pullRequests"]
+        overview["open_pull_requests"] = {
+            "total": pulls["totalCount"],
+            "recent": [
+                {
+                    "number": pull["number"],
+                    "title": pull["title"],
+                    "author": (pull["author"] or {}).get("login"),
+                    "updated_at": pull["updatedAt"],
+                    "branch": pull["headRefName"],
+                }
+                for pull in pulls["nodes"]
+            ],
+        }
+    return overview
 
 # --- MCP Tools ---
-# Define the tools
+# Define the tools; failures are raised as ToolError, so that the result is flagged with isError
+# and the agent can tell an error message from data
 @mcp.tool()
 async def search_repositories_by_keyword(keyword: str) -> Union[List[Dict[str, str]], str]:
     """
@@ -50,14 +887,7 @@ async def search_repositories_by_keyword(keyword: str) -> Union[List[Dict[str, s
     Returns a string error message if an exception occurs.
     """
     try:
-        results = mcp.github_client.search_repositories(query=keyword)
-        found_repos = []
-        for repo in results:
-            found_repos.append({"full_name": repo.full_name, "description": repo.description or "No description provided."})
-
-            # Limit results
-            if len(found_repos) >= 2:
-                break
+        found_repos = await _run_github("search_repositories_by_keyword", _search_repositories, keyword)
 
         if not found_repos:
             return f"No repositories found matching '{keyword}'."
@@ -65,7 +895,7 @@ async def search_repositories_by_keyword(keyword: str) -> Union[List[Dict[str, s
 
     except Exception as e:
         logger.error(f"Error searching repositories for keyword '{keyword}': {e}")
-        return f"Error searching repositories: {e}"
+        raise ToolError(f"Error searching repositories: {e}") from e
 
 
 @mcp.tool()
@@ -76,22 +906,17 @@ async def get_all_user_repo() -> Union[list[str], str]:
     Output format:
     A list of strings, where each string is the full name of a repository (e.g., "owner/repo_name").
     Example: ["vaibhavnayak30/API_Security", "octocat/hello-world"]
+    Very long lists end with a "... N more not shown" entry.
     Returns a string error message if an exception occurs.
     """
     try:
-        # Initialize the list of repositories
-        repo_list = []
-
         # Get all repositories of a user
-        for repo in mcp.github_client.get_user().get_repos():
-            repo_list.append(repo.full_name)
-
-        # Return the list of repositories
-        return repo_list
+        repo_list = await _run_github("get_all_user_repo", _list_user_repos)
+        return _fit_names(repo_list, MAX_RESPONSE_BYTES)
 
     except Exception as e:
         logger.error(f"Error getting all repositories: {e}")
-        return f"Error getting all repositories: {str(e)}"
+        raise ToolError(f"Error getting all repositories: {str(e)}") from e
 
 @mcp.tool()
 async def get_all_branches(repo_name: str) -> Union[list[str], str]:
@@ -104,90 +929,374 @@ async def get_all_branches(repo_name: str) -> Union[list[str], str]:
     Output format:
     A list of strings, where each string is the name of a branch.
     Example: ["main", "dev", "feature/new-design"]
+    Very long lists end with a "... N more not shown" entry.
     Returns a string error message if an exception occurs (e.g., repository not found).
     """
     try:
-        branches = []
-        # Select the repo
-        repo = mcp.github_client.get_repo(repo_name)
-
         # Get all branches of the repo
-        for branch in repo.get_branches():
-            branches.append(branch.name)
-
-        return branches
+        branches = await _run_github("get_all_branches", _list_branches, repo_name)
+        return _fit_names(branches, MAX_RESPONSE_BYTES)
 
     except Exception as e:
         logger.error(f"Error getting all repositories: {e}")
-        return f"Error fething branches: {str(e)}"
+        raise ToolError(f"Error fething branches: {str(e)}") from e
 
 
 @mcp.tool()
-async def get_all_commits(repo_name: str) -> Union[Dict[str, str], str]:
+async def get_all_commits(
+    repo_name: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    branch: Optional[str] = None,
+    path: Optional[str] = None,
+    limit: int = 30,
+    cursor: Optional[str] = None,
+) -> Union[Dict[str, Any], str]:
     """
-    Get all commits of a specified GitHub repository, along with their author names and commit dates.
+    Get a window of commits of a specified GitHub repository, newest first, with their sha, author, date and message headline.
+    Commits are fetched page by page, so pass 'next_cursor' back as 'cursor' to get the next window.
 
     Args:
     - repo_name (str): The full name of the repository (e.g., "octocat/Spoon-Knife").
+    - since (str, optional): Only commits after this ISO 8601 date (e.g., "2024-06-01").
+    - until (str, optional): Only commits before this ISO 8601 date.
+    - branch (str, optional): Branch name or sha to list commits from. Defaults to the default branch.
+    - path (str, optional): Only commits touching this file path.
+    - limit (int, optional): Maximum number of commits to return (1-100, default 30).
+    - cursor (str, optional): The 'next_cursor' value from a previous call with the same arguments.
 
     Output format:
-    A dictionary where keys are commit dates (in string format) and values are the names of the commit authors.
-    Example: {"2024-06-18 10:30:00+00:00": "John Doe", "2024-06-17 15:00:00+00:00": "Jane Smith"}
+    A dictionary with the list of commits and a cursor for the next window (null when there are no more commits).
+    Example: {"commits": [{"sha": "6dcb09b5b57875f334f61aebed695e2e4193db5e", "author": "John Doe", "date": "2024-06-18T10:30:00+00:00", "message": "Fix login bug"}], "next_cursor": "eyJxIjo..."}
     Returns a string error message if an exception occurs (e.g., repository not found).
     """
     try:
-        # Select the repo
-        repo = mcp.github_client.get_repo(repo_name)
+        # Get a window of commits of the repo
+        limit = max(1, min(limit, MAX_COMMITS_LIMIT))
+        return await _run_github("get_all_commits", _list_commits, repo_name, since, until, branch, path, limit, cursor)
 
-        # Initialize the dictionary
-        commit_author_date: dict = {}
+    except Exception as e:
+        logger.error(f"Error getting all commits: {e}")
+        raise ToolError(f"Error getting all commits: {e}") from e
 
-        # Get all branches of the repo
-        for commit in repo.get_commits():
-            # Append to commits_date dict
-            commit_author_date[str(commit.commit.author.date)] = str(commit.commit.author.name)
 
-        return commit_author_date
+def _issue_query(
+    state: str,
+    labels: Optional[List[str]],
+    assignee: Optional[str],
+    include_pull_requests: bool,
+    fields: Optional[List[str]],
+    body_chars: int,
+    limit: int,
+) -> Tuple[Any, ...]:
+    """
+    Validates the issue filters shared by the single and batch issue tools.
+    """
+    if state not in ("open", "closed", "all"):
+        raise ValueError("state must be one of 'open', 'closed' or 'all'")
+    fields = list(dict.fromkeys(fields or DEFAULT_ISSUE_FIELDS))
+    unknown = [field for field in fields if field not in ISSUE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Valid fields are: {', '.join(ISSUE_FIELDS)}")
+    return state, labels, assignee, include_pull_requests, fields, max(0, body_chars), max(1, min(limit, 100))
+
+
+@mcp.tool()
+async def get_all_issues(
+    repo_name: str,
+    state: str = "open",
+    labels: Optional[List[str]] = None,
+    assignee: Optional[str] = None,
+    include_pull_requests: bool = False,
+    fields: Optional[List[str]] = None,
+    body_chars: int = 200,
+    limit: int = 30,
+) -> Union[Dict[str, Any], str]:
+    """
+    Get the issues of a specified GitHub repository, newest first, as compact records.
+    Pull requests are excluded unless requested, and issue bodies are truncated.
+
+    Args:
+    - repo_name (str): The full name of the repository (e.g., "octocat/Spoon-Knife").
+    - state (str, optional): "open" (default), "closed" or "all".
+    - labels (list[str], optional): Only issues carrying all of these labels (e.g., ["bug"]).
+    - assignee (str, optional): Only issues assigned to this login.
+    - include_pull_requests (bool, optional): Include pull requests, which GitHub lists as issues. Defaults to False.
+    - fields (list[str], optional): Fields to return, any of "number", "title", "state", "author", "labels", "assignees", "comments", "created_at", "updated_at", "body", "is_pull_request". Defaults to number, title, state, labels, assignees, updated_at and body.
+    - body_chars (int, optional): Issue bodies are truncated to this many characters (default 200, 0 for none).
+    - limit (int, optional): Maximum number of issues to return (1-100, default 30).
+
+    Output format:
+    A dictionary with the issues, the number of matching issues, and whether the list was cut short by the limit or the response size budget.
+    Example: {"issues": [{"number": 1, "title": "Bug in login", "state": "open", "labels": ["bug"], "assignees": ["jane"], "updated_at": "2024-06-18T10:30:00Z", "body": "Users cannot log in"}], "total": 1, "truncated": false}
+    Returns a string error message if an exception occurs (e.g., repository not found).
+    """
+    try:
+        # Get the matching issues of the repo
+        query = _issue_query(state, labels, assignee, include_pull_requests, fields, body_chars, limit)
+        return await _run_github("get_all_issues", _list_issues, repo_name, *query, MAX_RESPONSE_BYTES)
 
     except Exception as e:
-        logger.error(f"Error getting all commits: {e}")
-        return f"Error getting all commits: {e}"
+        logger.error(f"Error getting issues: {e}")
+        raise ToolError(f"Error getting issues: {e}") from e
 
 
 @mcp.tool()
-async def get_all_issues(repo_name: str) -> str:
+async def get_repository_overview(
+    repo_name: str,
+    sections: Optional[List[str]] = None,
+    limit: int = 10,
+) -> Union[Dict[str, Any], str]:
     """
-    Get all issues of a specified GitHub repository, including their title, number, and body.
+    Get an overview of a specified GitHub repository in a single call: stats, branches, recent commits,
+    open issues and open pull requests. Prefer this tool over separate branch/commit/issue calls when
+    summarizing a repository.
 
     Args:
     - repo_name (str): The full name of the repository (e.g., "octocat/Spoon-Knife").
+    - sections (list[str], optional): Sections to include, any of "stats", "branches", "commits", "issues", "pull_requests". Defaults to all.
+    - limit (int, optional): Maximum number of branches, commits, issues and pull requests listed per section (1-100, default 10).
 
     Output format:
-    A list of strings, where each string provides details for one issue in the format:
-    "Issue Title : [title], Issue Number : [number], Issue Body : [body]".
-    Example: ["Issue Title : Bug in login, Issue Number : 1, Issue Body : Users cannot log in", "Issue Title : Feature request, Issue Number : 2, Issue Body : Add dark mode"]
+    A dictionary with one key per requested section.
+    Example: {"repo_name": "octocat/Spoon-Knife", "stats": {"description": "...", "stars": 12000, "forks": 140000, "language": "HTML", "default_branch": "main", "pushed_at": "2024-06-18T10:30:00Z", "archived": false},
+              "branches": {"total": 3, "names": ["main", "dev"]},
+              "recent_commits": [{"sha": "...", "author": "John Doe", "date": "2024-06-18T10:30:00Z", "message": "Fix login bug"}],
+              "open_issues": {"total": 2, "recent": [{"number": 1, "title": "Bug in login", "author": "jane", "updated_at": "...", "labels": ["bug"]}]},
+              "open_pull_requests": {"total": 1, "recent": [{"number": 3, "title": "Add dark mode", "author": "john", "updated_at": "...", "branch": "dark-mode"}]}}
     Returns a string error message if an exception occurs (e.g., repository not found).
     """
     try:
-        # Select the repo
-        repo = mcp.github_client.get_repo(repo_name)
+        sections = list(dict.fromkeys(sections or OVERVIEW_SECTIONS))
+        unknown = [section for section in sections if section not in OVERVIEW_SECTIONS]
+        if unknown:
+            raise ValueError(f"Unknown sections: {', '.join(unknown)}. Valid sections are: {', '.join(OVERVIEW_SECTIONS)}")
+        limit = max(1, min(limit, 100))
+        return await _run_github("get_repository_overview", _get_repository_overview, repo_name, sections, limit)
 
-        # Initialize the list of issues
-        issue_list = []
+    except Exception as e:
+        logger.error(f"Error getting repository overview: {e}")
+        raise ToolError(f"Error getting repository overview: {e}") from e
 
-        # Get all issues of the repo
-        for issue in repo.get_issues():
-            issue_list.append(f"Issue Title : {issue.title}, Issue Number : {issue.number}, Issue Body : {issue.body}")
 
-        return issue_list
+@mcp.tool()
+async def get_branches_for_repos(repo_names: List[str]) -> Union[Dict[str, Any], str]:
+    """
+    Get all branch names for several GitHub repositories at once.
+
+    Args:
+    - repo_names (list[str]): The full names of the repositories (e.g., ["octocat/Spoon-Knife", "octocat/hello-world"]). At most 50.
+
+    Output format:
+    A dictionary with the branches per repository under "results" and an error message per failed repository under "errors".
+    Example: {"results": {"octocat/Spoon-Knife": ["main", "dev"]}, "errors": {"octocat/missing": "404 Not Found"}}
+    Returns a string error message if an exception occurs.
+    """
+    try:
+        return await _run_batch("get_all_branches", _list_branches, repo_names)
 
     except Exception as e:
-        logger.error(f"Error getting all commits: {e}")
-        return f"Error getting all commits: {e}"
+        logger.error(f"Error fetching branches for repositories: {e}")
+        raise ToolError(f"Error fetching branches for repositories: {e}") from e
+
+
+@mcp.tool()
+async def get_commits_for_repos(
+    repo_names: List[str],
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 10,
+) -> Union[Dict[str, Any], str]:
+    """
+    Get the most recent commits of several GitHub repositories at once.
+
+    Args:
+    - repo_names (list[str]): The full names of the repositories (e.g., ["octocat/Spoon-Knife", "octocat/hello-world"]). At most 50.
+    - since (str, optional): Only commits after this ISO 8601 date (e.g., "2024-06-01").
+    - until (str, optional): Only commits before this ISO 8601 date.
+    - limit (int, optional): Maximum number of commits per repository (1-100, default 10).
+
+    Output format:
+    A dictionary with the commit window per repository under "results" (same format as get_all_commits)
+    and an error message per failed repository under "errors".
+    Example: {"results": {"octocat/Spoon-Knife": {"commits": [{"sha": "...", "author": "John Doe", "date": "2024-06-18T10:30:00+00:00", "message": "Fix login bug"}], "next_cursor": null}}, "errors": {}}
+    Returns a string error message if an exception occurs.
+    """
+    try:
+        limit = max(1, min(limit, MAX_COMMITS_LIMIT))
+        return await _run_batch("get_all_commits", _list_commits, repo_names, since, until, None, None, limit, None)
+
+    except Exception as e:
+        logger.error(f"Error fetching commits for repositories: {e}")
+        raise ToolError(f"Error fetching commits for repositories: {e}") from e
+
+
+@mcp.tool()
+async def get_issues_for_repos(
+    repo_names: List[str],
+    state: str = "open",
+    labels: Optional[List[str]] = None,
+    include_pull_requests: bool = False,
+    fields: Optional[List[str]] = None,
+    limit: int = 10,
+) -> Union[Dict[str, Any], str]:
+    """
+    Get the issues of several GitHub repositories at once.
+
+    Args:
+    - repo_names (list[str]): The full names of the repositories (e.g., ["octocat/Spoon-Knife", "octocat/hello-world"]). At most 50.
+    - state, labels, include_pull_requests, fields (optional): Same as in get_all_issues.
+    - limit (int, optional): Maximum number of issues per repository (1-100, default 10).
+
+    Output format:
+    A dictionary with the issues per repository under "results" (same format as get_all_issues)
+    and an error message per failed repository under "errors".
+    Example: {"results": {"octocat/Spoon-Knife": {"issues": [{"number": 1, "title": "Bug in login", "state": "open", "labels": ["bug"], "assignees": [], "updated_at": "2024-06-18T10:30:00Z", "body": "Users cannot log in"}], "total": 1, "truncated": false}}, "errors": {}}
+    Returns a string error message if an exception occurs.
+    """
+    try:
+        query = _issue_query(state, labels, None, include_pull_requests, fields, 100, limit)
+        # Share the response budget between the repositories
+        budget = MAX_RESPONSE_BYTES // max(1, len(set(repo_names)))
+        return await _run_batch("get_all_issues", _list_issues, repo_names, *query, budget)
+
+    except Exception as e:
+        logger.error(f"Error fetching issues for repositories: {e}")
+        raise ToolError(f"Error fetching issues for repositories: {e}") from e
+
+
+@mcp.tool()
+async def get_rate_limit_status() -> Union[Dict[str, Any], str]:
+    """
+    Get the GitHub API budget currently available to the tool server.
+
+    Output format:
+    A dictionary with the remaining core API requests and the limit of the current window summed over all credentials,
+    when the first window resets, how many seconds calls are currently held back after hitting an abuse limit,
+    and the same figures per credential, with those of every rate-limit resource used so far (core, search, graphql).
+    Example: {"remaining": 4870, "limit": 5000, "reset_at": "2024-06-18T11:00:00+00:00", "backoff_seconds": 0.0,
+              "credentials": {"token-1": {"remaining": 4870, "limit": 5000, "reset_at": "2024-06-18T11:00:00+00:00", "backoff_seconds": 0.0,
+                                          "resources": {"core": {...}, "search": {"remaining": 28, "limit": 30, "reset_at": "2024-06-18T10:31:00+00:00", "backoff_seconds": 0.0}}}}}
+    Returns a string error message if an exception occurs.
+    """
+    try:
+        return mcp.tokens.status()
+
+    except Exception as e:
+        logger.error(f"Error getting rate limit status: {e}")
+        raise ToolError(f"Error getting rate limit status: {e}") from e
+
+# --- Webhooks ---
+# Fetch the data changed by a webhook delivery right away, instead of on the next tool call
+WEBHOOK_PREFETCH = os.getenv("GITHUB_WEBHOOK_PREFETCH", "0") == "1"
+PREFETCHERS: Dict[str, Callable[[str], Any]] = {
+    "branches": _list_branches,
+    "issues": lambda repo_name: _list_issues(repo_name, "open", None, None, False, DEFAULT_ISSUE_FIELDS, 200, 30, MAX_RESPONSE_BYTES),
+    "commits": _sync_commits,
+}
+_prefetch_tasks: set = set()
+
+def apply_webhook(event: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Invalidates the cached data affected by a webhook delivery and returns what was done.
+    Takes the parsed delivery only, so that recorded payloads can be replayed without HTTP.
+    """
+    effects = plan_invalidation(event, payload)
+    if effects is None:
+        return {"event": event, "ignored": True}
+    invalidated = sum(mcp.cache.invalidate(*prefix) for prefix in effects.cache_prefixes)
+    if mcp.store:
+        for resource in effects.stale:
+            mcp.store.mark_stale(effects.repo, resource)
+    # Commits are only kept in the local store
+    prefetch = [resource for resource in effects.prefetch if resource != "commits" or mcp.store]
+    logger.info(f"Webhook '{event}' for '{effects.repo}' invalidated {invalidated} cached entries")
+    return {
+        "event": event,
+        "repo": effects.repo,
+        "invalidated": invalidated,
+        "stale": effects.stale if mcp.store else [],
+        "prefetch": prefetch if WEBHOOK_PREFETCH else [],
+    }
+
+async def _prefetch(repo_name: str, resources: List[str]):
+    for resource in resources:
+        try:
+            await _run_github(f"prefetch_{resource}", PREFETCHERS[resource], repo_name)
+        except Exception as e:
+            logger.warning(f"Prefetching {resource} of '{repo_name}' failed: {e}")
+
+@mcp.custom_route("/webhooks/github", methods=["POST"])
+async def github_webhook(request: Request) -> JSONResponse:
+    """
+    Receives GitHub webhook deliveries (push, issues, pull_request, create, delete) when
+    GITHUB_WEBHOOK_SECRET is set, and drops exactly the cached data they make stale.
+    """
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        return JSONResponse({"error": "Webhook receiver is disabled"}, status_code=404)
+    body = await request.body()
+    if not verify_signature(secret, body, request.headers.get("X-Hub-Signature-256")):
+        return JSONResponse({"error": "Invalid signature"}, status_code=401)
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return JSONResponse({"error": "Payload is not valid JSON"}, status_code=400)
+    event = request.headers.get("X-GitHub-Event", "")
+    try:
+        result = await mcp.executor.run("github_webhook", apply_webhook, event, payload)
+    except Exception as e:
+        logger.error(f"Error handling webhook '{event}': {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+    if result.get("prefetch"):
+        task = asyncio.create_task(_prefetch(result["repo"], result["prefetch"]))
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
+    return JSONResponse(result)
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def get_metrics(request: Request) -> Response:
+    """
+    Exposes the server's metrics in the Prometheus text format.
+    """
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+async def main(host: str = "127.0.0.1", port: int = 9002):
+    await mcp.run_async(transport="streamable-http", host=host, port=port)
 
+def serve(host: str, port: int):
+    asyncio.run(main(host, port))
 
-async def main():
-    await mcp.run_async(transport="streamable-http", host="127.0.0.1", port=9002)
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="GitHub MCP tool server")
+    parser.add_argument("--host", default=os.getenv("GITHUB_MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("GITHUB_MCP_PORT", "9002")), help="Port of the first replica")
+    parser.add_argument(
+        "--replicas",
+        type=int,
+        default=int(os.getenv("GITHUB_MCP_REPLICAS", "1")),
+        help="Number of server processes, listening on consecutive ports from --port",
+    )
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.replicas <= 1:
+        serve(args.host, args.port)
+    else:
+        # Each replica is a separate process with its own event loop, thread pool and GitHub client
+        replicas = [
+            multiprocessing.Process(target=serve, args=(args.host, args.port + index), name=f"github-server-{index}")
+            for index in range(args.replicas)
+        ]
+        for replica in replicas:
+            replica.start()
+        logger.info(f"Started {args.replicas} replicas on ports {args.port}-{args.port + args.replicas - 1}")
+        try:
+            for replica in replicas:
+                replica.join()
+        except KeyboardInterrupt:
+            for replica in replicas:
+                replica.terminate()
+            for replica in replicas:
+                replica.join()
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The backend modules import each other from the backend directory, e.g. `from utils.cache import ...`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeGitHub:
+    """
+    A local HTTP server standing in for the GitHub API. Tests set handle(path, query, headers), which returns
+    the status, the response headers and a JSON-serializable body; every request is recorded.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.handle = lambda path, query, headers: (404, {}, {"message": "Not Found"})
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                query = dict(urllib.parse.parse_qsl(url.query))
+                headers = {key.lower(): value for key, value in self.headers.items()}
+                fake.requests.append((url.path, query, headers))
+                status, response_headers, body = fake.handle(url.path, query, headers)
+                data = b"" if body is None else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in response_headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def client(self, token: str = "test-token"):
+        from github import Auth, Github
+        return Github(auth=Auth.Token(token), base_url=self.url, retry=None, seconds_between_requests=None)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+@pytest.fixture
+def fake_github():
+    server = FakeGitHub()
+    yield server
+    server.close()
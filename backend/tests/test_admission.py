@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.admission import AdmissionController, AdmissionRejected
+
+async def _positions(ticket):
+    return [position async for position in ticket.wait()]
+
+def test_queued_run_is_admitted_when_a_slot_frees():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, queue_timeout=5)
+        running = controller.enqueue("a")
+        queued = controller.enqueue("b")
+        asyncio.get_running_loop().call_later(0.2, running.release)
+        started = time.monotonic()
+        positions = await asyncio.wait_for(_positions(queued), timeout=2)
+        return positions, time.monotonic() - started, controller.stats()
+
+    positions, waited, stats = asyncio.run(scenario())
+    assert positions == [1]
+    assert waited < 1
+    assert stats == {"running": 1, "waiting": 0, "rejected": 0}
+
+def test_run_of_a_busy_thread_is_admitted_when_the_thread_frees():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=4, queue_timeout=5)
+        first = controller.enqueue("a")
+        second = controller.enqueue("a")
+        asyncio.get_running_loop().call_later(0.2, first.release)
+        await asyncio.wait_for(_positions(second), timeout=2)
+        return second.admitted.is_set()
+
+    assert asyncio.run(scenario())
+
+def test_admitted_while_the_position_is_being_sent():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, queue_timeout=5)
+        running = controller.enqueue("a")
+        queued = controller.enqueue("b")
+        waiter = queued.wait()
+        assert await waiter.__anext__() == 1
+        # Freed before the waiter resumes, while its consumer handles the position
+        running.release()
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(waiter.__anext__(), timeout=2)
+
+    asyncio.run(scenario())
+
+def test_queue_timeout_rejects_and_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, queue_timeout=0.1)
+        controller.enqueue("a")
+        queued = controller.enqueue("b")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await _positions(queued)
+        return rejected.value, controller.stats()
+
+    error, stats = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert stats["waiting"] == 0
+
+def test_full_queue_is_rejected():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=5)
+        controller.enqueue("a")
+        controller.enqueue("b")
+        with pytest.raises(AdmissionRejected) as per_thread:
+            controller.enqueue("b")
+        with pytest.raises(AdmissionRejected) as full:
+            controller.enqueue("c")
+        return per_thread.value.status_code, full.value.status_code
+
+    assert asyncio.run(scenario()) == (429, 503)
@@ -0,0 +1,29 @@
+import asyncio
+
+import app as app_module
+
+class FakeAgent:
+    def __init__(self, logger):
+        self.checkpointer = None
+        self.response_cache = None
+        self.mcp_servers = {}
+
+    async def initiate(self):
+        pass
+
+    async def close(self):
+        pass
+
+def test_lifespan_can_run_again_in_the_same_process(monkeypatch):
+    monkeypatch.setattr(app_module, "ReactGraphAgent", FakeAgent)
+    app = app_module.app
+
+    async def serve():
+        async with app_module.lifespan(app):
+            return app_module.metrics.render()
+
+    for _ in range(2):
+        scrape = asyncio.run(serve())
+        assert "agent_runs_in_flight 0" in scrape
+        assert "agent_runs_buffered 0" in scrape
+    assert sum(metric.name == "agent_runs_in_flight" for metric in app_module.metrics.metrics) == 1
@@ -0,0 +1,114 @@
+import time
+
+import servers.github_server as github_server
+from utils.cache import ResponseCache
+from utils.rate_limit import RateLimitScheduler
+from utils.token_pool import Credential, TokenPool
+
+class Upstream:
+    """
+    A resource whose fetches and revalidations are counted.
+    """
+
+    def __init__(self, value="v1"):
+        self.value = value
+        self.etag = '"1"'
+        self.fetches = 0
+        self.revalidations = 0
+
+    def fetch(self):
+        self.fetches += 1
+        return self.value, self.etag
+
+    def revalidate(self, entry):
+        self.revalidations += 1
+        return entry.etag == self.etag
+
+def test_fresh_entries_are_served_without_upstream_calls():
+    cache, upstream = ResponseCache(), Upstream()
+    assert cache.get_or_fetch(("repo", "a/b"), 60, upstream.fetch, upstream.revalidate) == "v1"
+    assert cache.get_or_fetch(("repo", "a/b"), 60, upstream.fetch, upstream.revalidate) == "v1"
+    assert (upstream.fetches, upstream.revalidations) == (1, 0)
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "revalidated": 0}
+
+def test_expired_entry_is_revalidated_and_kept_while_unchanged():
+    cache, upstream = ResponseCache(), Upstream()
+    cache.get_or_fetch(("repo", "a/b"), 0, upstream.fetch, upstream.revalidate)
+    assert cache.get_or_fetch(("repo", "a/b"), 60, upstream.fetch, upstream.revalidate) == "v1"
+    assert (upstream.fetches, upstream.revalidations) == (1, 1)
+    # The freshness window was extended
+    assert cache.get_or_fetch(("repo", "a/b"), 60, upstream.fetch, upstream.revalidate) == "v1"
+    assert upstream.revalidations == 1
+    assert cache.stats()["revalidated"] == 1
+
+def test_expired_entry_is_fetched_again_once_changed():
+    cache, upstream = ResponseCache(), Upstream()
+    cache.get_or_fetch(("repo", "a/b"), 0, upstream.fetch, upstream.revalidate)
+    upstream.value, upstream.etag = "v2", '"2"'
+    assert cache.get_or_fetch(("repo", "a/b"), 60, upstream.fetch, upstream.revalidate) == "v2"
+    assert cache.get(("repo", "a/b")).etag == '"2"'
+    assert (upstream.fetches, upstream.revalidations) == (2, 1)
+
+def test_changed_value_returned_by_the_revalidation_is_stored_without_another_fetch():
+    cache, upstream = ResponseCache(), Upstream()
+    cache.get_or_fetch(("branches", "a/b"), 0, upstream.fetch, upstream.revalidate)
+    value = cache.get_or_fetch(("branches", "a/b"), 60, upstream.fetch, lambda entry: (["main", "dev"], '"2"'))
+    assert value == ["main", "dev"]
+    assert cache.get(("branches", "a/b")).etag == '"2"'
+    assert upstream.fetches == 1
+    assert cache.stats()["misses"] == 2
+
+def test_entries_older_than_max_age_are_fetched_again_without_revalidation():
+    cache, upstream = ResponseCache(max_age=0.05), Upstream()
+    cache.get_or_fetch(("repo", "a/b"), 0, upstream.fetch, upstream.revalidate)
+    time.sleep(0.1)
+    cache.get_or_fetch(("repo", "a/b"), 0, upstream.fetch, upstream.revalidate)
+    assert (upstream.fetches, upstream.revalidations) == (2, 0)
+
+def test_invalidate_by_prefix():
+    cache = ResponseCache()
+    cache.set(("issues", "a/b", "open"), [], 60)
+    cache.set(("issues", "a/b", "closed"), [], 60)
+    cache.set(("issues", "c/d", "open"), [], 60)
+    cache.set(("branches", "a/b"), [], 60)
+    assert cache.invalidate("issues", "a/b") == 2
+    assert cache.get(("issues", "c/d", "open")) is not None
+    assert cache.get(("branches", "a/b")) is not None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.set(("a",), 1, 60)
+    cache.set(("b",), 2, 60)
+    cache.get(("a",))
+    cache.set(("c",), 3, 60)
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)).value == 1 and cache.get(("c",)).value == 3
+
+def test_every_page_of_a_cached_list_is_revalidated_and_changed_pages_are_reused(monkeypatch, fake_github):
+    client = fake_github.client()
+    monkeypatch.setattr(github_server.mcp, "tokens", TokenPool([Credential("test", None, client, RateLimitScheduler(client))]), raising=False)
+    monkeypatch.setattr(github_server.mcp, "cache", ResponseCache(), raising=False)
+    monkeypatch.setitem(github_server.CACHE_TTLS, "issues", 0)
+    pages = {"1": [1, 2], "2": [3, 4]}
+
+    def handle(path, query, headers):
+        page = query.get("page", "1")
+        etag = f'"{page}-{len(pages[page])}"'
+        if headers.get("if-none-match") == etag:
+            return 304, {"ETag": etag}, None
+        link = {"Link": f'<{fake_github.url}/repos/o/r/issues?page=2>; rel="next"'} if page == "1" else {}
+        return 200, {"ETag": etag, **link}, [{"number": number} for number in pages[page]]
+    fake_github.handle = handle
+
+    def numbers():
+        fake_github.requests.clear()
+        listed = github_server._cached_list(("issues", "o/r"), "/repos/o/r/issues", {}, lambda items: [item["number"] for item in items])
+        return listed, [(query.get("page", "1"), "if-none-match" in headers) for _, query, headers in fake_github.requests]
+
+    assert numbers() == ([1, 2, 3, 4], [("1", False), ("2", False)])
+    # Unchanged: every page is revalidated
+    assert numbers() == ([1, 2, 3, 4], [("1", True), ("2", True)])
+    # A change on a later page is seen, and its 200 answer is used as is
+    pages["2"] = [3, 4, 5]
+    assert numbers() == ([1, 2, 3, 4, 5], [("1", True), ("2", True)])
+    assert github_server.mcp.cache.stats()["revalidated"] == 1
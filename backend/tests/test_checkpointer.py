@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import END, START, StateGraph
+
+from utils.checkpointer import BoundedMemorySaver
+from utils.models import GraphState
+
+def _graph(saver):
+    def echo(state):
+        return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]}
+    workflow = StateGraph(GraphState)
+    workflow.add_node("agent", echo)
+    workflow.add_edge(START, "agent")
+    workflow.add_edge("agent", END)
+    return workflow.compile(checkpointer=saver)
+
+def _ask(graph, thread_id, text):
+    config = {"configurable": {"thread_id": thread_id}}
+    return asyncio.run(graph.ainvoke({"messages": [HumanMessage(content=text)], "iteration": 0}, config))
+
+def _put(saver, thread_id, checkpoint_ns, step):
+    checkpoint = empty_checkpoint()
+    checkpoint["id"] = f"{step:04d}"
+    checkpoint["channel_values"] = {"messages": f"value {step}"}
+    checkpoint["channel_versions"] = {"messages": step}
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}}
+    return saver.put(config, checkpoint, {"step": step}, {"messages": step})
+
+def test_only_the_latest_checkpoints_of_each_namespace_are_kept():
+    saver = BoundedMemorySaver(keep_checkpoints=2)
+    for step in range(1, 5):
+        _put(saver, "t", "", step)
+        _put(saver, "t", "child", step)
+    for checkpoint_ns in ("", "child"):
+        assert sorted(saver.storage["t"][checkpoint_ns]) == ["0003", "0004"]
+        # Blobs of pruned checkpoints are dropped, those of kept checkpoints stay
+        assert ("t", checkpoint_ns, "messages", 2) not in saver.blobs
+        assert ("t", checkpoint_ns, "messages", 4) in saver.blobs
+        latest = saver.get_tuple({"configurable": {"thread_id": "t", "checkpoint_ns": checkpoint_ns}})
+        assert latest.checkpoint["channel_values"] == {"messages": "value 4"}
+
+def test_thread_resumes_through_a_compiled_graph():
+    saver = BoundedMemorySaver(keep_checkpoints=2)
+    graph = _graph(saver)
+    _ask(graph, "t", "first")
+    state = _ask(graph, "t", "second")
+    assert [message.content for message in state["messages"]] == ["first", "echo: first", "second", "echo: second"]
+    assert len(list(saver.list({"configurable": {"thread_id": "t"}}))) == 2
+    assert saver.stats()["threads"] == 1 and saver.stats()["bytes"] > 0
+
+def test_least_recently_used_thread_is_evicted_beyond_the_thread_cap():
+    saver = BoundedMemorySaver(max_threads=2)
+    graph = _graph(saver)
+    _ask(graph, "a", "hi")
+    _ask(graph, "b", "hi")
+    # Reading thread a makes b the least recently used
+    graph.get_state({"configurable": {"thread_id": "a"}})
+    _ask(graph, "c", "hi")
+    assert list(saver.threads) == ["a", "c"]
+    assert "b" not in saver.storage
+    assert not any(key[0] == "b" for key in list(saver.blobs) + list(saver.writes))
+    assert saver.stats()["evicted_threads"] == 1
+    # An evicted thread starts over
+    assert len(_ask(graph, "b", "again")["messages"]) == 2
+
+def test_idle_threads_are_evicted_after_the_ttl():
+    saver = BoundedMemorySaver(ttl_seconds=0.05)
+    graph = _graph(saver)
+    _ask(graph, "idle", "hi")
+    time.sleep(0.1)
+    _ask(graph, "active", "hi")
+    assert list(saver.threads) == ["active"]
+
+def test_threads_are_evicted_beyond_the_byte_cap_except_the_one_written():
+    saver = BoundedMemorySaver(max_bytes=1)
+    graph = _graph(saver)
+    _ask(graph, "a", "hi")
+    _ask(graph, "b", "hi")
+    assert list(saver.threads) == ["b"]
+    assert saver.total_bytes > saver.max_bytes
+
+def test_looking_up_an_unknown_thread_keeps_nothing():
+    saver = BoundedMemorySaver()
+    assert saver.get_tuple({"configurable": {"thread_id": "unknown", "checkpoint_ns": ""}}) is None
+    assert "unknown" not in saver.storage and not saver.threads
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import servers.github_server as github_server
+from utils.cache import ResponseCache
+from utils.rate_limit import RateLimitScheduler
+from utils.token_pool import Credential, TokenPool
+
+def _issue(number, body="", pull_request=False, labels=(), assignees=()):
+    issue = {
+        "number": number,
+        "title": f"Issue {number}",
+        "body": body,
+        "state": "open",
+        "user": {"login": "jane"},
+        "labels": [{"name": label} for label in labels],
+        "assignees": [{"login": login} for login in assignees],
+        "comments": 2,
+        "created_at": "2024-06-01T00:00:00Z",
+        "updated_at": "2024-06-18T10:30:00Z",
+    }
+    if pull_request:
+        issue["pull_request"] = {"url": ""}
+    return issue
+
+@pytest.fixture
+def issues_api(monkeypatch, fake_github):
+    client = fake_github.client()
+    monkeypatch.setattr(github_server.mcp, "tokens", TokenPool([Credential("test", None, client, RateLimitScheduler(client))]), raising=False)
+    monkeypatch.setattr(github_server.mcp, "cache", ResponseCache(), raising=False)
+    monkeypatch.setattr(github_server.mcp, "store", None, raising=False)
+    issues = []
+    fake_github.handle = lambda path, query, headers: (200, {}, issues)
+    return issues, fake_github
+
+def test_fit_budget_keeps_the_leading_items_that_fit():
+    items = [{"n": index} for index in range(10)]
+    kept, truncated = github_server._fit_budget(items, 40)
+    assert truncated and kept == items[:len(kept)]
+    assert len(json.dumps(kept)) <= 40 < len(json.dumps(items[:len(kept) + 1]))
+    assert github_server._fit_budget(items, 1000) == (items, False)
+
+def test_fit_names_notes_the_names_left_out():
+    names = [f"repo-{index}" for index in range(20)]
+    kept = github_server._fit_names(names, 60)
+    assert kept[-1] == f"... {20 - len(kept) + 1} more not shown"
+    assert github_server._fit_names(names[:2], 60) == names[:2]
+
+def test_issue_records_are_compact():
+    record = github_server._issue_json_record(_issue(7, "text", pull_request=True, labels=["bug"], assignees=["joe"]))
+    assert record == {
+        "number": 7, "title": "Issue 7", "body": "text", "state": "open", "is_pull_request": True, "author": "jane",
+        "labels": ["bug"], "assignees": ["joe"], "comments": 2,
+        "created_at": "2024-06-01T00:00:00Z", "updated_at": "2024-06-18T10:30:00Z",
+    }
+    assert github_server._issue_json_record(_issue(8))["is_pull_request"] is False
+
+def test_pull_requests_are_excluded_and_fields_selected(issues_api):
+    issues, _ = issues_api
+    issues.extend([_issue(1), _issue(2, pull_request=True), _issue(3)])
+    query = github_server._issue_query("open", None, None, False, ["number", "title"], 200, 30)
+    listed = github_server._list_issues("o/r", *query, github_server.MAX_RESPONSE_BYTES)
+    assert listed == {"issues": [{"number": 1, "title": "Issue 1"}, {"number": 3, "title": "Issue 3"}], "total": 2, "truncated": False}
+    query = github_server._issue_query("open", None, None, True, ["number", "is_pull_request"], 200, 30)
+    listed = github_server._list_issues("o/r", *query, github_server.MAX_RESPONSE_BYTES)
+    assert [issue["is_pull_request"] for issue in listed["issues"]] == [False, True, False]
+
+def test_filters_are_sent_to_the_api(issues_api):
+    issues, fake_github = issues_api
+    query = github_server._issue_query("closed", ["bug", "ui"], "joe", False, None, 200, 30)
+    github_server._list_issues("o/r", *query, github_server.MAX_RESPONSE_BYTES)
+    _, params, _ = fake_github.requests[-1]
+    assert (params["state"], params["labels"], params["assignee"]) == ("closed", "bug,ui", "joe")
+
+def test_bodies_are_truncated_and_the_response_is_bounded(issues_api):
+    issues, _ = issues_api
+    issues.extend(_issue(number, "x" * 500) for number in range(1, 41))
+    query = github_server._issue_query("open", None, None, False, ["number", "body"], 50, 100)
+    listed = github_server._list_issues("o/r", *query, 2000)
+    assert all(issue["body"] == "x" * 50 + "..." for issue in listed["issues"])
+    assert len(json.dumps(listed["issues"])) <= 2000
+    assert listed["total"] == 40 and listed["truncated"]
+    # The limit cuts the list short as well
+    query = github_server._issue_query("open", None, None, False, ["number"], 50, 5)
+    listed = github_server._list_issues("o/r", *query, 2000)
+    assert (len(listed["issues"]), listed["truncated"]) == (5, True)
+
+@pytest.mark.parametrize("args,message", [
+    (("pending", None, None, False, None, 200, 30), "state must be"),
+    (("open", None, None, False, ["number", "votes"], 200, 30), "Unknown fields: votes"),
+])
+def test_invalid_queries_are_rejected(args, message):
+    with pytest.raises(ValueError, match=message):
+        github_server._issue_query(*args)
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from github.Branch import Branch
+from github.PaginatedList import PaginatedList
+
+from utils.rate_limit import RateLimitError, RateLimitScheduler, resource_of
+
+def _rate_headers(resource, remaining, limit, reset_in):
+    return {
+        "X-RateLimit-Resource": resource,
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Reset": str(int(time.time() + reset_in)),
+    }
+
+@pytest.mark.parametrize("url,resource", [
+    ("/repos/o/r/issues?page=2", "core"),
+    ("https://api.github.com/search/repositories?q=x", "search"),
+    ("/search/code?q=x", "code_search"),
+    ("/graphql", "graphql"),
+])
+def test_resource_of(url, resource):
+    assert resource_of(url) == resource
+
+def test_low_budget_is_spread_until_the_reset(fake_github):
+    scheduler = RateLimitScheduler(fake_github.client(), reserve=50)
+    budget = scheduler.budget("core")
+    budget.remaining, budget.limit, budget.reset_at = 2, 5000, time.time() + 0.4
+    started = time.monotonic()
+    scheduler._wait_for_budget("core")
+    scheduler._wait_for_budget("core")
+    assert time.monotonic() - started >= 0.15
+
+def test_reserve_is_at_most_half_of_a_small_limit(fake_github):
+    scheduler = RateLimitScheduler(fake_github.client(), reserve=50)
+    budget = scheduler.budget("search")
+    budget.remaining, budget.limit, budget.reset_at = 20, 30, time.time() + 60
+    started = time.monotonic()
+    for _ in range(5):
+        scheduler._wait_for_budget("search")
+    assert time.monotonic() - started < 0.1
+
+def test_exhausted_budget_beyond_the_max_wait_raises(fake_github):
+    scheduler = RateLimitScheduler(fake_github.client(), max_wait=1)
+    budget = scheduler.budget("core")
+    budget.remaining, budget.limit, budget.reset_at = 0, 5000, time.time() + 3600
+    with pytest.raises(RateLimitError):
+        scheduler._wait_for_budget("core")
+    # Other resources are not held back
+    scheduler._wait_for_budget("search")
+
+def test_secondary_limit_of_one_resource_blocks_only_that_resource(fake_github):
+    searches = []
+
+    def handle(path, query, headers):
+        if path == "/search/repositories":
+            searches.append(path)
+            if len(searches) == 1:
+                return 403, {"Retry-After": "0.2", "X-RateLimit-Resource": "search"}, {"message": "You have exceeded a secondary rate limit"}
+            return 200, _rate_headers("search", 9, 10, 60), {"total_count": 0, "incomplete_results": False, "items": []}
+        if path == "/user":
+            return 200, _rate_headers("core", 4999, 5000, 3600), {"login": "me"}
+        return 404, {}, {"message": "Not Found"}
+    fake_github.handle = handle
+    client = fake_github.client()
+    scheduler = RateLimitScheduler(client, backoff_base=0.01)
+
+    assert scheduler.call(lambda: client.search_repositories("x").totalCount) == 0
+    assert len(searches) == 2
+    assert scheduler.budget("search").blocked_until > 0
+    assert scheduler.budget("core").blocked_until == 0
+    assert scheduler.call(lambda: client.get_user().login) == "me"
+    status = scheduler.status()
+    assert status["remaining"] == 4999
+    assert status["resources"]["search"]["remaining"] == 9
+
+def test_every_page_of_a_call_waits_for_budget(fake_github):
+    def handle(path, query, headers):
+        if query.get("page") == "2":
+            return 200, _rate_headers("core", 4998, 5000, 3600), [{"name": "dev", "commit": {"sha": "b", "url": ""}, "protected": False}]
+        # The first page leaves no budget until the window resets shortly after
+        link = {"Link": f'<{fake_github.url}/repos/o/r/branches?page=2>; rel="next"'}
+        return 200, {**_rate_headers("core", 0, 5000, 0), "X-RateLimit-Reset": str(time.time() + 0.3), **link}, [{"name": "main", "commit": {"sha": "a", "url": ""}, "protected": False}]
+    fake_github.handle = handle
+    client = fake_github.client()
+    scheduler = RateLimitScheduler(client)
+    requester = client.requester
+
+    def branch_names():
+        return [branch.name for branch in PaginatedList(Branch, requester, f"{fake_github.url}/repos/o/r/branches", None)]
+
+    started = time.monotonic()
+    assert scheduler.call(branch_names) == ["main", "dev"]
+    assert time.monotonic() - started >= 0.2
+    assert scheduler.budget("core").remaining == 4998
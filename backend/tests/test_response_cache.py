@@ -0,0 +1,87 @@
+import asyncio
+import logging
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+
+import agents.agent as agent_module
+from utils.response_cache import AgentResponseCache
+
+def test_exact_match_is_served_on_the_normalized_query():
+    cache = AgentResponseCache()
+    cache.set("List the branches of octocat/Hello-World?", "main, dev", ["get_all_branches"])
+    assert cache.get("  list the branches   of octocat/hello-world ").answer == "main, dev"
+    assert cache.stats() == {"entries": 1, "hits": 1, "similar_hits": 0, "misses": 0}
+
+def test_answers_of_uncacheable_tools_are_not_stored():
+    cache = AgentResponseCache()
+    cache.set("how many calls are left", "4999", ["get_rate_limit_status"])
+    assert cache.get("how many calls are left") is None
+
+def test_ttl_is_the_shortest_of_the_tools_used():
+    cache = AgentResponseCache(tool_ttls={"get_all_branches": 120, "get_all_issues": 0.05})
+    assert cache.ttl_for(["get_all_branches", "get_all_issues"]) == 0.05
+    cache.set("branches and issues of a/b", "...", ["get_all_branches", "get_all_issues"])
+    assert cache.get("branches and issues of a/b") is not None
+    asyncio.run(asyncio.sleep(0.1))
+    assert cache.get("branches and issues of a/b") is None
+
+def test_invalidate_by_repository():
+    cache = AgentResponseCache()
+    cache.set("issues of a/b", "none", ["get_all_issues"])
+    cache.set("issues of c/d", "none", ["get_all_issues"])
+    cache.set("what changed lately", "a commit", ["get_all_commits"], ["A/B"])
+    assert cache.invalidate("a/b") == 2
+    assert cache.get("issues of c/d") is not None
+    assert cache.get("what changed lately") is None
+
+def test_least_recently_used_is_evicted():
+    cache = AgentResponseCache(max_entries=2)
+    cache.set("q1", "a1", [])
+    cache.set("q2", "a2", [])
+    cache.get("q1")
+    cache.set("q3", "a3", [])
+    assert cache.get("q2") is None
+    assert cache.get("q1") is not None and cache.get("q3") is not None
+
+def test_similar_queries_are_only_served_about_the_same_repositories():
+    vectors = {"open issues of a/b": [1.0, 0.0], "what issues are open in a/b": [0.99, 0.1], "what issues are open in c/d": [0.99, 0.1]}
+    cache = AgentResponseCache(embed=lambda text: vectors[text])
+    cache.set("open issues of a/b", "#1", ["get_all_issues"])
+    assert cache.get("what issues are open in a/b").answer == "#1"
+    assert cache.get("what issues are open in c/d") is None
+    assert cache.stats()["similar_hits"] == 1
+
+def _agent(monkeypatch, answers):
+    monkeypatch.setattr(agent_module, "get_llm", lambda: FakeMessagesListChatModel(responses=[AIMessage(content=answer) for answer in answers]))
+    monkeypatch.setenv("AGENT_FAST_PATH", "0")
+    monkeypatch.delenv("AGENT_CHECKPOINT_DB", raising=False)
+    agent = agent_module.ReactGraphAgent(logging.getLogger("test"), response_cache=AgentResponseCache())
+    agent.tools = []
+    agent._bind_tools()
+    asyncio.run(agent._compile_agent())
+    return agent
+
+def _ask(agent, query, thread_id):
+    async def run():
+        answer = None
+        async for event in agent.stream_invoke(query, thread_id):
+            for update in event.values():
+                if isinstance(update, dict) and update.get("messages"):
+                    answer = update["messages"][-1].content
+        return answer
+    return asyncio.run(run())
+
+def test_follow_up_answers_are_not_served_to_other_threads(monkeypatch):
+    agent = _agent(monkeypatch, ["a/b is a demo repository", "a/b has 3 open issues", "which repository?"])
+    assert _ask(agent, "tell me about a/b", "t3") == "a/b is a demo repository"
+    assert _ask(agent, "what about its open issues?", "t3") == "a/b has 3 open issues"
+    # The follow-up depends on t3's conversation, so a new thread asking it goes to the LLM
+    assert _ask(agent, "what about its open issues?", "t4") == "which repository?"
+    assert _ask(agent, "tell me about a/b", "t5") == "a/b is a demo repository"
+    assert agent.response_cache.stats()["hits"] == 1
+
+def test_first_exchange_without_a_repository_is_cached(monkeypatch):
+    agent = _agent(monkeypatch, ["you have 2 repositories", "something else"])
+    assert _ask(agent, "list my repositories", "t1") == "you have 2 repositories"
+    assert _ask(agent, "list my repositories", "t2") == "you have 2 repositories"
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from utils.router import FastPathRouter
+
+ISSUES = {
+    "issues": [
+        {"number": 2, "title": "Crash on start", "state": "open", "labels": ["bug"]},
+        {"number": 1, "title": "Typo", "state": "closed", "labels": []},
+    ],
+    "total": 2,
+    "truncated": False,
+}
+
+@pytest.mark.parametrize("query,state", [
+    ("list all issues of octocat/hello-world", "all"),
+    ("list issues of octocat/hello-world", "all"),
+    ("show open issues in octocat/hello-world?", "open"),
+    ("get all closed issues for octocat/hello-world", "closed"),
+])
+def test_issue_state_is_taken_from_the_query(query, state):
+    route = FastPathRouter().match(query)
+    assert route.tool_name == "get_all_issues"
+    assert route.args == {"state": state, "repo_name": "octocat/hello-world"}
+
+def test_issues_are_rendered_with_their_state():
+    router = FastPathRouter()
+    answer = router.render(router.match("list all issues of octocat/hello-world"), json.dumps(ISSUES))
+    assert answer.startswith("Issues in `octocat/hello-world`")
+    assert "#1 Typo [closed]" in answer
+    answer = router.render(router.match("list open issues of octocat/hello-world"), json.dumps({"issues": [], "total": 0, "truncated": False}))
+    assert answer == "`octocat/hello-world` has no open issues."
+
+def test_names_left_out_by_the_tool_server_are_counted_but_not_listed_as_names():
+    router = FastPathRouter()
+    answer = router.render(router.match("list my repositories"), json.dumps(["a/b", "c/d", "... 3 more not shown"]))
+    assert answer.startswith("You have access to 5 repositories:")
+    assert "- ... 3 more not shown" in answer and "`... 3 more not shown`" not in answer
+    answer = router.render(router.match("list branches of a/b"), json.dumps(["main", "... 1 more not shown"]))
+    assert answer.startswith("`a/b` has 2 branch(es):")
+
+def test_error_output_is_left_to_the_agent():
+    router = FastPathRouter()
+    assert router.render(router.match("list branches of a/b"), "Error fetching branches: Not Found") is None
+    assert router.match("list branches of a/b and their protection rules") is None
@@ -0,0 +1,95 @@
+import asyncio
+
+from utils.run_buffer import RunBuffer
+
+async def _source(items, gate=None):
+    for index, item in enumerate(items):
+        if gate is not None and index == len(items) // 2:
+            await gate.wait()
+        yield item
+
+async def _collect(run, after=0):
+    return [(seq, data) async for seq, data in run.events(after)]
+
+def test_run_keeps_going_without_a_listener_and_replays_from_the_last_event():
+    async def scenario():
+        buffer = RunBuffer()
+        gate = asyncio.Event()
+        run = buffer.start("t", _source(["a", "b", "c", "d"], gate))
+        # A first connection receives two events, then drops
+        received = []
+        async for seq, data in run.events():
+            received.append((seq, data))
+            if len(received) == 2:
+                break
+        gate.set()
+        await run.task
+        resumed = buffer.resume(run.event_id(received[-1][0]), "t")
+        assert resumed == (run, 2)
+        return received, await _collect(run, resumed[1]), buffer.stats()
+
+    received, replayed, stats = asyncio.run(scenario())
+    assert received == [(1, "a"), (2, "b")]
+    assert replayed == [(3, "c"), (4, "d")]
+    assert stats == {"running": 0, "buffered": 1, "resumed": 1}
+
+def test_live_events_follow_the_replayed_ones():
+    async def scenario():
+        buffer = RunBuffer()
+        gate = asyncio.Event()
+        run = buffer.start("t", _source(["a", "b", "c", "d"], gate))
+        await asyncio.sleep(0)
+        listener = asyncio.create_task(_collect(run, 1))
+        await asyncio.sleep(0.01)
+        gate.set()
+        return await asyncio.wait_for(listener, timeout=2)
+
+    assert asyncio.run(scenario()) == [(2, "b"), (3, "c"), (4, "d")]
+
+def test_events_beyond_the_ring_buffer_are_skipped():
+    async def scenario():
+        buffer = RunBuffer(max_events=2)
+        run = buffer.start("t", _source(["a", "b", "c", "d"]))
+        await run.task
+        return await _collect(run)
+
+    assert asyncio.run(scenario()) == [(3, "c"), (4, "d")]
+
+def test_resume_rejects_other_threads_and_malformed_ids():
+    async def scenario():
+        buffer = RunBuffer()
+        run = buffer.start("t", _source(["a"]))
+        await run.task
+        return buffer.resume(run.event_id(1), "other"), buffer.resume(f"{run.run_id}:x", "t"), buffer.resume("unknown:1", "t")
+
+    assert asyncio.run(scenario()) == (None, None, None)
+
+def test_finished_runs_are_dropped_after_the_ttl_and_beyond_max_runs():
+    async def scenario():
+        buffer = RunBuffer(max_runs=1, ttl=0.05)
+        first = buffer.start("t", _source(["a"]))
+        second = buffer.start("t", _source(["a"]))
+        await asyncio.gather(first.task, second.task)
+        # Starting a run drops the oldest finished runs beyond max_runs
+        third = buffer.start("t", _source(["a"]))
+        kept = set(buffer.runs)
+        await third.task
+        await asyncio.sleep(0.1)
+        buffer.start("t", _source([]))
+        return kept, {first.run_id, second.run_id, third.run_id} & set(buffer.runs)
+
+    kept, left = asyncio.run(scenario())
+    assert len(kept) == 2
+    assert left == set()
+
+def test_failing_source_finishes_the_run():
+    async def failing():
+        yield "a"
+        raise RuntimeError("boom")
+
+    async def scenario():
+        buffer = RunBuffer()
+        run = buffer.start("t", failing())
+        return await asyncio.wait_for(_collect(run), timeout=2), run.done
+
+    assert asyncio.run(scenario()) == ([(1, "a")], True)
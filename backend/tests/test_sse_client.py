@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+
+import httpx
+
+# The UI modules are imported from the ui directory, like the backend ones from backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "ui"))
+
+from sse_client import SSEClient, SSEDecoder, StreamingMarkdown
+
+def _decode(chunks):
+    decoder = SSEDecoder()
+    return [event for chunk in chunks for event in decoder.feed(chunk)], decoder
+
+def test_utf8_and_crlf_split_across_chunks_are_reassembled():
+    data = "data: héllo\r\n\r\n".encode()
+    split = data.index("é".encode()) + 1
+    # The é and the CRLF are both cut in half
+    events, _ = _decode([data[:split], data[split:-3], data[-3:-1], data[-1:]])
+    assert [event.data for event in events] == ["héllo"]
+
+def test_multi_line_data_fields_and_comments():
+    stream = b": keep-alive\nevent: token\nid: run:1\nretry: 500\ndata: a\ndata:b\n\ndata: c\n\n"
+    events, decoder = _decode([stream[i:i + 3] for i in range(0, len(stream), 3)])
+    assert [(event.event, event.data, event.id, event.retry) for event in events] == [
+        ("token", "a\nb", "run:1", 500),
+        ("message", "c", "run:1", 500),
+    ]
+    assert decoder.last_event_id == "run:1"
+
+def test_event_without_data_is_not_dispatched():
+    # A trailing CR is held until the next chunk shows whether it starts a CRLF
+    events, _ = _decode([b"event: ping\n\n", b"\r\r", b"data: x\r\r", b": end\n"])
+    assert [(event.event, event.data) for event in events] == [("message", "x")]
+
+def test_broken_stream_is_resumed_with_the_last_event_id():
+    requests = []
+
+    async def broken(body):
+        yield body
+        raise httpx.ReadError("connection lost")
+
+    def handle(request):
+        requests.append(request.headers.get("last-event-id"))
+        if len(requests) == 1:
+            return httpx.Response(200, content=broken(b"id: r:1\nretry: 10\ndata: a\n\n"))
+        return httpx.Response(200, content=b"id: r:2\ndata: b\n\n")
+
+    client = SSEClient("http://backend")
+    try:
+        async def use_mock_transport():
+            await client._client.aclose()
+            client._client = httpx.AsyncClient(base_url="http://backend", transport=httpx.MockTransport(handle))
+        asyncio.run_coroutine_threadsafe(use_mock_transport(), client._loop).result()
+        events = list(client.stream("/chat", {"message": "hi"}))
+    finally:
+        client.close()
+    assert [event.data for event in events] == ["a", "b"]
+    assert requests == [None, "r:1"]
+    assert client.reconnects == 1
+
+class FakeElement:
+    def __init__(self):
+        self.body = None
+        self.draws = 0
+
+    def markdown(self, body):
+        self.body = body
+        self.draws += 1
+
+    def empty(self):
+        self.body = None
+
+class FakeContainer:
+    def __init__(self):
+        self.elements = []
+
+    def empty(self):
+        self.elements.append(FakeElement())
+        return self.elements[-1]
+
+def test_finished_paragraphs_are_written_once_into_their_own_element():
+    container = FakeContainer()
+    markdown = StreamingMarkdown(container, interval=0)
+    for chunk in ["First para", "graph.\n", "\nSecond", " one"]:
+        markdown.append(chunk)
+    first = container.elements[0]
+    draws = first.draws
+    markdown.append(" goes on")
+    markdown.finish()
+    assert [element.body for element in container.elements] == ["First paragraph.", "Second one goes on"]
+    assert first.draws == draws
+    assert markdown.text == "First paragraph.\n\nSecond one goes on"
+
+def test_paragraph_breaks_inside_code_blocks_are_kept_in_progress():
+    container = FakeContainer()
+    markdown = StreamingMarkdown(container, interval=0, cursor="|")
+    markdown.append("```\na\n\nb\n")
+    assert [element.body for element in container.elements] == ["```\na\n\nb\n|"]
+    markdown.append("```\n\nafter")
+    markdown.finish()
+    assert [element.body for element in container.elements] == ["```\na\n\nb\n```", "after"]
+
+def test_redraws_of_the_paragraph_in_progress_are_throttled():
+    container = FakeContainer()
+    markdown = StreamingMarkdown(container, interval=60)
+    for chunk in ["a", "b", "c"]:
+        markdown.append(chunk)
+    assert container.elements[0].draws == 1
+    markdown.finish()
+    assert container.elements[0].body == "abc"
+    markdown.clear()
+    assert container.elements[0].body is None and markdown.text == ""
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+import servers.github_server as github_server
+from utils.cache import ResponseCache
+from utils.rate_limit import RateLimitError, RateLimitScheduler
+from utils.token_pool import Credential, TokenPool
+
+def _pool(fake_github, *names):
+    credentials = []
+    for name in names:
+        client = fake_github.client(token=f"token-of-{name}")
+        credentials.append(Credential(name, None, client, RateLimitScheduler(client, max_wait=0)))
+    return TokenPool(credentials)
+
+def _set_budget(credential, remaining, limit=5000, reset_in=3600):
+    budget = credential.scheduler.budget("core")
+    budget.remaining, budget.limit, budget.reset_at = remaining, limit, time.time() + reset_in
+
+def test_calls_go_to_the_credential_with_the_most_budget_left(fake_github):
+    pool = _pool(fake_github, "a", "b")
+    _set_budget(pool.credentials[0], 100)
+    _set_budget(pool.credentials[1], 4000)
+    assert pool.call(lambda: pool.current().name) == "b"
+    # The client of the serving credential is the one seen by the call
+    assert pool.call(lambda: pool.client()) is pool.credentials[1].client
+    # Outside calls, the first credential is used
+    assert pool.current() is pool.credentials[0]
+
+def test_exhausted_credential_is_switched(fake_github):
+    pool = _pool(fake_github, "a", "b")
+    _set_budget(pool.credentials[0], 1000)
+    _set_budget(pool.credentials[1], 4000)
+    served = []
+
+    def call():
+        served.append(pool.current().name)
+        if pool.current().name == "b":
+            raise RateLimitError("exhausted")
+        return "ok"
+
+    assert pool.call(call) == "ok"
+    assert served == ["b", "a"]
+    assert pool.switches == 1
+
+def test_call_fails_once_every_credential_is_exhausted(fake_github):
+    pool = _pool(fake_github, "a", "b")
+    for credential in pool.credentials:
+        _set_budget(credential, 0)
+
+    def call():
+        raise RateLimitError("exhausted")
+
+    with pytest.raises(RateLimitError):
+        pool.call(call)
+
+def test_credential_held_back_is_only_used_when_all_are(fake_github):
+    pool = _pool(fake_github, "a", "b")
+    pool.credentials[0].scheduler.budget("core").blocked_until = time.time() + 60
+    assert pool.call(lambda: pool.current().name) == "b"
+    pool.credentials[1].scheduler.budget("core").blocked_until = time.time() + 120
+    # Both held back: the one available again first
+    assert pool.call(lambda: pool.current().name) == "a"
+
+def test_status_sums_the_budgets(fake_github):
+    pool = _pool(fake_github, "a", "b")
+    _set_budget(pool.credentials[0], 100, reset_in=60)
+    _set_budget(pool.credentials[1], 4000, reset_in=600)
+    status = pool.status()
+    assert (status["remaining"], status["limit"]) == (4100, 10000)
+    assert status["credentials"]["a"]["remaining"] == 100
+    assert status["reset_at"] == status["credentials"]["a"]["reset_at"]
+
+def test_repository_objects_are_cached_per_credential(monkeypatch, fake_github):
+    fake_github.handle = lambda path, query, headers: (200, {"ETag": '"1"'}, {"full_name": "o/r", "name": "r", "url": f"{fake_github.url}/repos/o/r"})
+    pool = _pool(fake_github, "a", "b")
+    monkeypatch.setattr(github_server.mcp, "tokens", pool, raising=False)
+    monkeypatch.setattr(github_server.mcp, "cache", ResponseCache(), raising=False)
+    _set_budget(pool.credentials[0], 4000)
+    _set_budget(pool.credentials[1], 1000)
+    repo_a = pool.call(github_server._get_repo, "o/r")
+    _set_budget(pool.credentials[1], 5000)
+    repo_b = pool.call(github_server._get_repo, "o/r")
+    assert repo_a is not repo_b
+    # Each repository object sends its requests with the credential that fetched it
+    fake_github.requests.clear()
+    repo_a.update()
+    repo_b.update()
+    assert [headers["authorization"] for _, _, headers in fake_github.requests] == ["token token-of-a", "token token-of-b"]
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+import agents.agent as agent_module
+
+def _tool(name, delay=0.0, error=None):
+    async def run(repo_name: str) -> str:
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return f"{name} of {repo_name}"
+    return StructuredTool.from_function(coroutine=run, name=name, description=name)
+
+def _agent(monkeypatch, tools, concurrency=4, timeout=5.0):
+    monkeypatch.setattr(agent_module, "get_llm", lambda: FakeMessagesListChatModel(responses=[]))
+    monkeypatch.setenv("AGENT_TOOL_CONCURRENCY", str(concurrency))
+    monkeypatch.setenv("AGENT_TOOL_TIMEOUT", str(timeout))
+    agent = agent_module.ReactGraphAgent(logging.getLogger("test"))
+    agent.tools_by_name = {tool.name: tool for tool in tools}
+    return agent
+
+def _execute(agent, *names):
+    calls = [{"name": name, "args": {"repo_name": "a/b"}, "id": f"call_{index}"} for index, name in enumerate(names)]
+    started = time.monotonic()
+    result = asyncio.run(agent._tool_execution_node({"messages": [AIMessage(content="", tool_calls=calls)]}))
+    return result["messages"], time.monotonic() - started
+
+def test_calls_run_concurrently_and_keep_their_order(monkeypatch):
+    agent = _agent(monkeypatch, [_tool("slow", 0.3), _tool("fast", 0.1), _tool("medium", 0.2)])
+    messages, elapsed = _execute(agent, "slow", "fast", "medium")
+    assert [(message.tool_call_id, message.content) for message in messages] == [
+        ("call_0", "slow of a/b"), ("call_1", "fast of a/b"), ("call_2", "medium of a/b"),
+    ]
+    assert elapsed < 0.5
+
+def test_concurrency_is_limited(monkeypatch):
+    agent = _agent(monkeypatch, [_tool("slow", 0.2)], concurrency=1)
+    _, elapsed = _execute(agent, "slow", "slow")
+    assert elapsed >= 0.4
+
+def test_failures_become_error_messages_without_failing_the_other_calls(monkeypatch):
+    agent = _agent(monkeypatch, [_tool("ok"), _tool("broken", error=RuntimeError("not found"))])
+    messages, _ = _execute(agent, "broken", "ok", "missing")
+    assert [message.status for message in messages] == ["error", "success", "error"]
+    assert "not found" in messages[0].content
+    assert messages[1].content == "ok of a/b"
+    assert messages[2].content == "Error: unknown tool 'missing'."
+
+def test_calls_over_the_timeout_are_abandoned(monkeypatch):
+    agent = _agent(monkeypatch, [_tool("hung", 10), _tool("ok")], timeout=0.2)
+    messages, elapsed = _execute(agent, "hung", "ok")
+    assert messages[0].status == "error" and "timed out after 0.2s" in messages[0].content
+    assert messages[1].content == "ok of a/b"
+    assert elapsed < 1
@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import servers.github_server as github_server
+from utils.cache import ResponseCache
+from utils.github_store import GitHubStore
+from utils.webhooks import plan_invalidation, verify_signature
+
+# Recorded deliveries: the raw bodies, and their event and signature under SECRET in deliveries.json
+FIXTURES = Path(__file__).parent / "fixtures" / "webhooks"
+SECRET = "test-webhook-secret"
+DELIVERIES = json.loads((FIXTURES / "deliveries.json").read_text())
+REPO = "octocat/hello-world"
+
+def _delivery(name):
+    return DELIVERIES[name]["event"], (FIXTURES / f"{name}.json").read_bytes()
+
+@pytest.mark.parametrize("name,prefixes,stale", [
+    ("push_default_branch", [("repo", REPO), ("overview", REPO)], ["commits"]),
+    ("push_new_branch", [("repo", REPO), ("overview", REPO), ("branches", REPO)], ["branches"]),
+    ("push_tag", [("repo", REPO), ("overview", REPO)], []),
+    ("issues_opened", [("issues", REPO), ("overview", REPO), ("repo", REPO)], ["issues"]),
+    ("pull_request_opened", [("issues", REPO), ("overview", REPO), ("repo", REPO)], ["issues"]),
+    ("create_branch", [("branches", REPO), ("overview", REPO)], ["branches"]),
+    ("delete_branch", [("branches", REPO), ("overview", REPO)], ["branches"]),
+])
+def test_plan_invalidation(name, prefixes, stale):
+    event, body = _delivery(name)
+    effects = plan_invalidation(event, json.loads(body))
+    assert effects.repo == REPO
+    assert effects.cache_prefixes == prefixes
+    assert effects.stale == stale
+
+@pytest.mark.parametrize("name", ["create_tag", "ping"])
+def test_plan_invalidation_ignores_unrelated_deliveries(name):
+    event, body = _delivery(name)
+    assert plan_invalidation(event, json.loads(body)) is None
+
+@pytest.mark.parametrize("name", sorted(DELIVERIES))
+def test_verify_signature(name):
+    _, body = _delivery(name)
+    signature = DELIVERIES[name]["signature"]
+    assert verify_signature(SECRET, body, signature)
+    assert not verify_signature("another-secret", body, signature)
+    assert not verify_signature(SECRET, body.replace(b"Hello-World", b"Hello-Word"), signature)
+    assert not verify_signature(SECRET, body, signature[len("sha256="):])
+    assert not verify_signature(SECRET, body, None)
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    cache = ResponseCache()
+    store = GitHubStore(str(tmp_path / "store.db"))
+    monkeypatch.setattr(github_server.mcp, "cache", cache, raising=False)
+    monkeypatch.setattr(github_server.mcp, "store", store, raising=False)
+    for key in [
+        ("repo", REPO, "token-1"),
+        ("branches", REPO),
+        ("issues", REPO, "open", (), None),
+        ("overview", REPO, ("stats",), 10),
+        ("branches", "octocat/spoon-knife"),
+        ("search", "hello"),
+    ]:
+        cache.set(key, [], 60)
+    for resource in ("commits", "issues", "branches"):
+        store.mark_synced(REPO, resource, None, True)
+    yield cache, store
+    store.close()
+
+def _fresh(store, resource):
+    return store.sync_state(REPO, resource).is_fresh(60)
+
+def test_apply_push_to_default_branch(server):
+    cache, store = server
+    event, body = _delivery("push_default_branch")
+    result = github_server.apply_webhook(event, json.loads(body))
+    assert result["repo"] == REPO
+    assert result["invalidated"] == 2
+    assert result["stale"] == ["commits"]
+    assert cache.get(("repo", REPO, "token-1")) is None
+    assert cache.get(("overview", REPO, ("stats",), 10)) is None
+    assert cache.get(("branches", REPO)) is not None
+    assert not _fresh(store, "commits")
+    assert _fresh(store, "issues") and _fresh(store, "branches")
+
+def test_apply_issue_event(server):
+    cache, store = server
+    event, body = _delivery("issues_opened")
+    result = github_server.apply_webhook(event, json.loads(body))
+    assert result["invalidated"] == 3
+    assert cache.get(("issues", REPO, "open", (), None)) is None
+    assert not _fresh(store, "issues")
+    assert _fresh(store, "commits") and _fresh(store, "branches")
+
+def test_apply_branch_deletion_leaves_other_repositories(server):
+    cache, store = server
+    event, body = _delivery("delete_branch")
+    result = github_server.apply_webhook(event, json.loads(body))
+    assert result["invalidated"] == 2
+    assert cache.get(("branches", "octocat/spoon-knife")) is not None
+    assert cache.get(("search", "hello")) is not None
+    assert not _fresh(store, "branches")
+
+def test_apply_ignored_delivery(server):
+    cache, _ = server
+    event, body = _delivery("create_tag")
+    assert github_server.apply_webhook(event, json.loads(body)) == {"event": event, "ignored": True}
+    assert cache.stats()["entries"] == 6
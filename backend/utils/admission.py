@@ -0,0 +1,174 @@
+import asyncio
+import math
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a run cannot be admitted; carries the HTTP status and the seconds after which to retry.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class AdmissionTicket:
+    """
+    A run waiting for, or holding, one of the controller's slots.
+    """
+
+    def __init__(self, controller: "AdmissionController", thread_id: str):
+        self.controller = controller
+        self.thread_id = thread_id
+        self.admitted = asyncio.Event()
+        self.changed = asyncio.Event()
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.released = False
+
+    async def wait(self) -> AsyncIterator[int]:
+        """
+        Waits until the run is admitted, yielding its 1-based queue position whenever it changes.
+        Raises AdmissionRejected if it is not admitted within the controller's queue timeout.
+        """
+        deadline = self.enqueued_at + self.controller.queue_timeout
+        position = None
+        while True:
+            # Cleared before checking, so that a change made while the position is being sent is not missed
+            self.changed.clear()
+            if self.admitted.is_set():
+                return
+            current = self.controller.position(self)
+            if current != position:
+                position = current
+                yield position
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not self.admitted.is_set():
+                self.release()
+                raise AdmissionRejected(
+                    f"Timed out after {self.controller.queue_timeout:.0f}s waiting for a free slot.",
+                    503,
+                    self.controller.retry_after(),
+                )
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self):
+        """
+        Frees the slot held by the run, or leaves the queue. Safe to call more than once.
+        """
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+class AdmissionController:
+    """
+    Limits the number of agent runs in flight and queues the excess in arrival order.
+    Runs of the same thread are serialized so that they do not race on its checkpoint;
+    a queued run whose thread is busy does not hold back runs of other threads.
+    Meant to be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_queued: int = 32,
+        max_queued_per_thread: int = 1,
+        queue_timeout: float = 60,
+    ):
+        """
+        Initializes the controller.
+        Args:
+            max_concurrent (int): Maximum number of runs in flight.
+            max_queued (int): Maximum number of runs waiting; further runs are rejected with 503.
+            max_queued_per_thread (int): Maximum number of runs of one thread waiting; further runs are rejected with 429.
+            queue_timeout (float): Longest a run may wait for a slot.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_queued_per_thread = max_queued_per_thread
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.running_threads: Set[str] = set()
+        self.waiting: List[AdmissionTicket] = []
+        self.rejected = 0
+        # Moving average of run durations, used to estimate Retry-After
+        self.average_run_seconds = 10.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """
+        Builds the controller from AGENT_MAX_* environment variables.
+        """
+        return cls(
+            max_concurrent=int(os.getenv("AGENT_MAX_CONCURRENT_RUNS", "8")),
+            max_queued=int(os.getenv("AGENT_MAX_QUEUED_RUNS", "32")),
+            max_queued_per_thread=int(os.getenv("AGENT_MAX_QUEUED_RUNS_PER_THREAD", "1")),
+            queue_timeout=float(os.getenv("AGENT_QUEUE_TIMEOUT", "60")),
+        )
+
+    def retry_after(self) -> int:
+        """
+        Estimates in seconds when a new run could be admitted.
+        """
+        return max(1, math.ceil(self.average_run_seconds * (len(self.waiting) + 1) / self.max_concurrent))
+
+    def enqueue(self, thread_id: str) -> AdmissionTicket:
+        """
+        Admits a run right away if possible, else queues it.
+        Raises AdmissionRejected if the queue, or the thread's share of it, is full.
+        """
+        ticket = AdmissionTicket(self, thread_id)
+        if not self._can_start(thread_id):
+            if sum(1 for waiting in self.waiting if waiting.thread_id == thread_id) >= self.max_queued_per_thread:
+                self.rejected += 1
+                raise AdmissionRejected(f"Too many requests queued for thread {thread_id}.", 429, self.retry_after())
+            if len(self.waiting) >= self.max_queued:
+                self.rejected += 1
+                raise AdmissionRejected("The agent is at capacity, please retry later.", 503, self.retry_after())
+        self.waiting.append(ticket)
+        self._dispatch()
+        return ticket
+
+    def position(self, ticket: AdmissionTicket) -> int:
+        return self.waiting.index(ticket) + 1 if ticket in self.waiting else 0
+
+    def _can_start(self, thread_id: str) -> bool:
+        return self.running < self.max_concurrent and thread_id not in self.running_threads
+
+    def _dispatch(self):
+        """
+        Admits waiting runs in arrival order while slots are free, skipping runs whose thread is busy.
+        """
+        for ticket in list(self.waiting):
+            if self.running >= self.max_concurrent:
+                break
+            if ticket.thread_id in self.running_threads:
+                continue
+            self.waiting.remove(ticket)
+            self.running += 1
+            self.running_threads.add(ticket.thread_id)
+            ticket.started_at = time.monotonic()
+            ticket.admitted.set()
+            ticket.changed.set()
+        for ticket in self.waiting:
+            ticket.changed.set()
+
+    def _release(self, ticket: AdmissionTicket):
+        if ticket.started_at is not None:
+            self.running -= 1
+            self.running_threads.discard(ticket.thread_id)
+            self.average_run_seconds = 0.8 * self.average_run_seconds + 0.2 * (time.monotonic() - ticket.started_at)
+        elif ticket in self.waiting:
+            self.waiting.remove(ticket)
+        self._dispatch()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of runs in flight and waiting, and how many were rejected so far.
+        """
+        return {"running": self.running, "waiting": len(self.waiting), "rejected": self.rejected}
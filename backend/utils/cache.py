@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+    etag: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+
+class ResponseCache:
+    """
+    A thread-safe in-process LRU cache with per-entry TTLs and ETag revalidation.
+    Keys are tuples whose first items identify the resource (e.g. ("branches", "octocat/spoon-knife")),
+    so that related entries can be invalidated together by prefix.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_age: float = 900):
+        """
+        Initializes the cache.
+        Args:
+            max_entries (int): Maximum number of entries kept before the least recently used is evicted.
+            max_age (float): Seconds after which an entry is refetched even if revalidation keeps succeeding.
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: "OrderedDict[Tuple[Hashable, ...], CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[CacheEntry]:
+        """
+        Returns the entry for the key, fresh or expired, and marks it as recently used.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Tuple[Hashable, ...], value: Any, ttl: float, etag: Optional[str] = None):
+        """
+        Stores a value for ttl seconds, evicting the least recently used entries beyond the size bound.
+        """
+        with self._lock:
+            self._entries[key] = CacheEntry(value=value, expires_at=time.monotonic() + ttl, etag=etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *prefix: Hashable) -> int:
+        """
+        Removes every entry whose key starts with the given prefix and returns how many were removed.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[:len(prefix)] == prefix]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def get_or_fetch(
+        self,
+        key: Tuple[Hashable, ...],
+        ttl: float,
+        fetch: Callable[[], Tuple[Any, Optional[str]]],
+        revalidate: Optional[Callable[[CacheEntry], Any]] = None,
+    ) -> Any:
+        """
+        Returns the cached value for the key, fetching it on a miss.
+        Args:
+            key (tuple): The cache key.
+            ttl (float): Seconds the value stays fresh.
+            fetch (callable): Returns (value, etag) for the resource.
+            revalidate (callable): Given the expired entry, returns True if it is still valid (e.g. HTTP 304),
+                the new (value, etag) if the answer to the revalidation already carried it, or False to fetch again.
+        """
+        entry = self.get(key)
+        now = time.monotonic()
+        if entry is not None and now < entry.expires_at:
+            self.hits += 1
+            return entry.value
+        revalidated = False
+        if entry is not None and revalidate is not None and now - entry.created_at < self.max_age:
+            revalidated = revalidate(entry)
+        if revalidated is True:
+            # Unchanged upstream; extend the freshness window but keep the original creation time
+            with self._lock:
+                entry.expires_at = now + ttl
+            self.revalidated += 1
+            return entry.value
+        self.misses += 1
+        value, etag = revalidated or fetch()
+        self.set(key, value, ttl, etag)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the current size and hit/miss counters.
+        """
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "revalidated": self.revalidated}
@@ -0,0 +1,214 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import InMemorySaver
+
+try:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:  # Durable mode needs langgraph-checkpoint-sqlite
+    aiosqlite = None
+    AsyncSqliteSaver = None
+
+@dataclass
+class ThreadUsage:
+    last_access: float = field(default_factory=time.monotonic)
+    bytes: int = 0
+    # Checkpoint ids and channel versions per namespace, oldest first
+    checkpoints: Dict[str, List[Tuple[str, Dict[str, Any]]]] = field(default_factory=dict)
+    blob_keys: Set[tuple] = field(default_factory=set)
+    write_keys: Set[tuple] = field(default_factory=set)
+
+def _typed_size(value: Any) -> int:
+    """
+    Returns the byte size of a serialized (type, bytes) pair, or of a tuple holding such pairs.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, tuple):
+        return sum(_typed_size(item) for item in value)
+    return 0
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    An in-memory checkpointer with bounded memory use.
+    Only the latest checkpoints of each thread are kept, and whole threads are evicted
+    least recently used first when they exceed the thread or byte cap, or when idle past the TTL.
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 1000,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: float = 24 * 3600,
+        keep_checkpoints: int = 2,
+        **kwargs,
+    ):
+        """
+        Initializes the checkpointer.
+        Args:
+            max_threads (int): Maximum number of threads kept in memory.
+            max_bytes (int): Maximum serialized size of all threads kept in memory.
+            ttl_seconds (float): Threads idle for longer than this are evicted.
+            keep_checkpoints (int): Number of most recent checkpoints kept per thread and namespace.
+        """
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.keep_checkpoints = max(1, keep_checkpoints)
+        self.threads: "OrderedDict[str, ThreadUsage]" = OrderedDict()
+        self.evicted_threads = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls) -> "BoundedMemorySaver":
+        """
+        Builds the checkpointer from AGENT_CHECKPOINT_* environment variables.
+        """
+        return cls(
+            max_threads=int(os.getenv("AGENT_CHECKPOINT_MAX_THREADS", "1000")),
+            max_bytes=int(os.getenv("AGENT_CHECKPOINT_MAX_BYTES", str(256 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("AGENT_CHECKPOINT_TTL", str(24 * 3600))),
+        )
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(usage.bytes for usage in self.threads.values())
+
+    def _touch(self, thread_id: str) -> ThreadUsage:
+        usage = self.threads.get(thread_id)
+        if usage is None:
+            usage = self.threads[thread_id] = ThreadUsage()
+        usage.last_access = time.monotonic()
+        self.threads.move_to_end(thread_id)
+        return usage
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            if thread_id in self.threads:
+                self._touch(thread_id)
+                return super().get_tuple(config)
+            checkpoint = super().get_tuple(config)
+            # The base lookup creates empty entries for unknown threads; do not keep them around
+            if not any(self.storage.get(thread_id, {}).values()):
+                self.storage.pop(thread_id, None)
+            return checkpoint
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"]["checkpoint_ns"]
+            usage = self._touch(thread_id)
+            usage.blob_keys.update((thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items())
+            usage.checkpoints.setdefault(checkpoint_ns, []).append((checkpoint["id"], dict(checkpoint["channel_versions"])))
+            self._prune_checkpoints(thread_id, checkpoint_ns, usage)
+            usage.bytes = self._measure(thread_id, usage)
+            self._evict(keep=thread_id)
+            return result
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            thread_id = config["configurable"]["thread_id"]
+            usage = self._touch(thread_id)
+            usage.write_keys.add((thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"]))
+            usage.bytes = self._measure(thread_id, usage)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            usage = self.threads.pop(thread_id, None)
+            if usage is None:
+                super().delete_thread(thread_id)
+                return
+            # Delete by the tracked keys instead of scanning every thread's writes and blobs
+            self.storage.pop(thread_id, None)
+            for key in usage.write_keys:
+                self.writes.pop(key, None)
+            for key in usage.blob_keys:
+                self.blobs.pop(key, None)
+
+    def _prune_checkpoints(self, thread_id: str, checkpoint_ns: str, usage: ThreadUsage):
+        """
+        Drops all but the most recent checkpoints of a namespace, with their writes and unreferenced blobs.
+        """
+        checkpoints = usage.checkpoints[checkpoint_ns]
+        if len(checkpoints) <= self.keep_checkpoints:
+            return
+        stale, usage.checkpoints[checkpoint_ns] = checkpoints[:-self.keep_checkpoints], checkpoints[-self.keep_checkpoints:]
+        for checkpoint_id, _ in stale:
+            self.storage[thread_id][checkpoint_ns].pop(checkpoint_id, None)
+            key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(key, None)
+            usage.write_keys.discard(key)
+        live = {
+            (thread_id, checkpoint_ns, channel, version)
+            for _, versions in usage.checkpoints[checkpoint_ns]
+            for channel, version in versions.items()
+        }
+        for key in [key for key in usage.blob_keys if key[1] == checkpoint_ns and key not in live]:
+            self.blobs.pop(key, None)
+            usage.blob_keys.discard(key)
+
+    def _measure(self, thread_id: str, usage: ThreadUsage) -> int:
+        size = sum(_typed_size(saved) for checkpoints in self.storage.get(thread_id, {}).values() for saved in checkpoints.values())
+        size += sum(_typed_size(self.blobs.get(key)) for key in usage.blob_keys)
+        size += sum(_typed_size(write) for key in usage.write_keys for write in self.writes.get(key, {}).values())
+        return size
+
+    def _evict(self, keep: str):
+        """
+        Evicts idle threads, then least recently used threads until the caps are met, never the thread being written.
+        """
+        now = time.monotonic()
+        for thread_id, usage in list(self.threads.items()):
+            if thread_id != keep and now - usage.last_access > self.ttl_seconds:
+                self.delete_thread(thread_id)
+                self.evicted_threads += 1
+        total = self.total_bytes
+        while len(self.threads) > 1 and (len(self.threads) > self.max_threads or total > self.max_bytes):
+            thread_id = next(iter(self.threads))
+            if thread_id == keep:
+                self.threads.move_to_end(thread_id)
+                thread_id = next(iter(self.threads))
+            total -= self.threads[thread_id].bytes
+            self.delete_thread(thread_id)
+            self.evicted_threads += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of threads and bytes held, and how many threads were evicted so far.
+        """
+        with self._lock:
+            return {"threads": len(self.threads), "bytes": self.total_bytes, "evicted_threads": self.evicted_threads}
+
+async def open_sqlite_saver(path: str):
+    """
+    Opens the durable SQLite checkpointer. Returns the saver and the connection to close on shutdown.
+    """
+    if AsyncSqliteSaver is None:
+        raise RuntimeError("Durable checkpoints need the langgraph-checkpoint-sqlite package.")
+    conn = await aiosqlite.connect(path)
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver, conn
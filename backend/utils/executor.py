@@ -0,0 +1,67 @@
+import asyncio
+import contextvars
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class BlockingExecutor:
+    """
+    Runs blocking callables (e.g. PyGithub calls) on a bounded thread pool so
+    that they never stall the event loop serving the MCP transport.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        default_timeout: Optional[float] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Initializes the executor.
+        Args:
+            max_workers (int): Maximum number of blocking calls running at once.
+            default_timeout (float): Timeout in seconds applied when no per-call timeout is configured.
+            timeouts (dict): Per-call-name timeouts in seconds (e.g. {"get_all_commits": 120}).
+        """
+        self.max_workers = max_workers or int(os.getenv("GITHUB_MAX_WORKERS", "8"))
+        self.default_timeout = default_timeout or float(os.getenv("GITHUB_TOOL_TIMEOUT", "60"))
+        self.timeouts = timeouts or {}
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="github")
+        # Bound in-flight calls on the loop side so that queued callers are subject to their timeout
+        self._slots = asyncio.Semaphore(self.max_workers)
+
+    def timeout_for(self, name: str) -> float:
+        """
+        Returns the timeout in seconds configured for the given call name.
+        """
+        return self.timeouts.get(name, self.default_timeout)
+
+    async def run(self, name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs func(*args, **kwargs) on the thread pool and awaits its result.
+        Raises asyncio.TimeoutError if the call exceeds its timeout.
+        """
+        timeout = self.timeout_for(name)
+        loop = asyncio.get_running_loop()
+        # Run in the caller's context, so that e.g. its trace span is the parent of spans made on the thread
+        context = contextvars.copy_context()
+
+        async def _call():
+            async with self._slots:
+                return await loop.run_in_executor(self._pool, lambda: context.run(func, *args, **kwargs))
+
+        try:
+            # The timeout covers both waiting for a slot and the call itself
+            return await asyncio.wait_for(_call(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Call '{name}' timed out after {timeout}s")
+            raise
+
+    def shutdown(self):
+        """
+        Shuts down the thread pool without waiting for running calls.
+        """
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,217 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL, sha TEXT NOT NULL, author TEXT, date TEXT, message TEXT,
+    PRIMARY KEY (repo, sha)
+);
+CREATE INDEX IF NOT EXISTS commits_by_date ON commits (repo, date DESC, sha DESC);
+CREATE TABLE IF NOT EXISTS issues (
+    repo TEXT NOT NULL, number INTEGER NOT NULL, title TEXT, body TEXT, state TEXT,
+    is_pull_request INTEGER, author TEXT, labels TEXT, assignees TEXT, comments INTEGER,
+    created_at TEXT, updated_at TEXT,
+    PRIMARY KEY (repo, number)
+);
+CREATE INDEX IF NOT EXISTS issues_by_update ON issues (repo, updated_at DESC);
+CREATE TABLE IF NOT EXISTS branches (
+    repo TEXT NOT NULL, name TEXT NOT NULL,
+    PRIMARY KEY (repo, name)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    repo TEXT NOT NULL, resource TEXT NOT NULL, synced_at REAL, cursor TEXT, complete INTEGER,
+    PRIMARY KEY (repo, resource)
+);
+"""
+
+ISSUE_COLUMNS = (
+    "number", "title", "body", "state", "is_pull_request", "author",
+    "labels", "assignees", "comments", "created_at", "updated_at",
+)
+
+@dataclass
+class SyncState:
+    synced_at: float
+    cursor: Optional[str]
+    complete: bool
+
+    def is_fresh(self, interval: float) -> bool:
+        """
+        Returns True if the resource was synced less than interval seconds ago.
+        """
+        return time.time() - self.synced_at < interval
+
+class GitHubStore:
+    """
+    A local SQLite index of commits, issues and branches keyed by repository.
+    The database is opened on first use so that server startup stays fast.
+    Repository names are stored lower-cased; dates are ISO 8601 strings in UTC.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes the store.
+        Args:
+            path (str): Path of the SQLite database file.
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._sync_locks: Dict[tuple, threading.Lock] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    def _executemany(self, sql: str, rows: List[tuple]):
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(sql, rows)
+            conn.commit()
+
+    def sync_lock(self, repo: str, resource: str) -> threading.Lock:
+        """
+        Returns the lock serializing syncs of one resource of one repository.
+        """
+        with self._lock:
+            return self._sync_locks.setdefault((repo.lower(), resource), threading.Lock())
+
+    # --- Sync State ---
+    def sync_state(self, repo: str, resource: str) -> Optional[SyncState]:
+        rows = self._execute(
+            "SELECT synced_at, cursor, complete FROM sync_state WHERE repo = ? AND resource = ?",
+            (repo.lower(), resource),
+        )
+        if not rows:
+            return None
+        return SyncState(synced_at=rows[0]["synced_at"], cursor=rows[0]["cursor"], complete=bool(rows[0]["complete"]))
+
+    def mark_synced(self, repo: str, resource: str, cursor: Optional[str], complete: bool, synced_at: Optional[float] = None):
+        """
+        Records the sync state of a resource; synced_at defaults to now.
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO sync_state (repo, resource, synced_at, cursor, complete) VALUES (?, ?, ?, ?, ?)",
+            (repo.lower(), resource, time.time() if synced_at is None else synced_at, cursor, int(complete)),
+        )
+
+    def mark_stale(self, repo: str, resource: str):
+        """
+        Makes the next use of a resource sync it again, from the last sync's cursor.
+        """
+        self._execute("UPDATE sync_state SET synced_at = 0 WHERE repo = ? AND resource = ?", (repo.lower(), resource))
+
+    def clear(self, repo: str, resource: str):
+        """
+        Drops the stored rows and sync state of one resource of a repository.
+        """
+        if resource in ("commits", "issues", "branches"):
+            self._execute(f"DELETE FROM {resource} WHERE repo = ?", (repo.lower(),))
+        self._execute("DELETE FROM sync_state WHERE repo = ? AND resource = ?", (repo.lower(), resource))
+
+    # --- Commits ---
+    def upsert_commits(self, repo: str, commits: List[Dict[str, Any]]):
+        self._executemany(
+            "INSERT OR REPLACE INTO commits (repo, sha, author, date, message) VALUES (?, ?, ?, ?, ?)",
+            [(repo.lower(), c["sha"], c["author"], c["date"], c["message"]) for c in commits],
+        )
+
+    def query_commits(
+        self, repo: str, since: Optional[str], until: Optional[str], limit: int, after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns commits newest first, by date then sha, starting after the (date, sha) of the last commit already returned.
+        """
+        sql = "SELECT sha, author, date, message FROM commits WHERE repo = ?"
+        params: list = [repo.lower()]
+        if since:
+            sql += " AND date >= ?"
+            params.append(since)
+        if until:
+            sql += " AND date <= ?"
+            params.append(until)
+        if after:
+            sql += " AND (date < ? OR (date = ? AND sha < ?))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY date DESC, sha DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._execute(sql, tuple(params))]
+
+    def commit_coverage(self, repo: str) -> Tuple[int, Optional[str]]:
+        """
+        Returns the number of stored commits of a repository and the date of the oldest one.
+        """
+        row = self._execute("SELECT COUNT(*) AS total, MIN(date) AS oldest FROM commits WHERE repo = ?", (repo.lower(),))[0]
+        return row["total"], row["oldest"]
+
+    # --- Issues ---
+    def upsert_issues(self, repo: str, issues: List[Dict[str, Any]]):
+        columns = ", ".join(ISSUE_COLUMNS)
+        placeholders = ", ".join("?" for _ in ISSUE_COLUMNS)
+        self._executemany(
+            f"INSERT OR REPLACE INTO issues (repo, {columns}) VALUES (?, {placeholders})",
+            [
+                (repo.lower(),) + tuple(
+                    json.dumps(issue[column]) if column in ("labels", "assignees") else issue[column]
+                    for column in ISSUE_COLUMNS
+                )
+                for issue in issues
+            ],
+        )
+
+    def issue_count(self, repo: str) -> int:
+        """
+        Returns the number of stored issues and pull requests of a repository.
+        """
+        return self._execute("SELECT COUNT(*) AS total FROM issues WHERE repo = ?", (repo.lower(),))[0]["total"]
+
+    def query_issues(self, repo: str, state: Optional[str] = "open", include_pull_requests: bool = True) -> List[Dict[str, Any]]:
+        sql = f"SELECT {', '.join(ISSUE_COLUMNS)} FROM issues WHERE repo = ?"
+        params: list = [repo.lower()]
+        if state and state != "all":
+            sql += " AND state = ?"
+            params.append(state)
+        if not include_pull_requests:
+            sql += " AND is_pull_request = 0"
+        sql += " ORDER BY number DESC"
+        issues = []
+        for row in self._execute(sql, tuple(params)):
+            issue = dict(row)
+            issue["labels"] = json.loads(issue["labels"] or "[]")
+            issue["assignees"] = json.loads(issue["assignees"] or "[]")
+            issue["is_pull_request"] = bool(issue["is_pull_request"])
+            issues.append(issue)
+        return issues
+
+    # --- Branches ---
+    def replace_branches(self, repo: str, names: List[str]):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM branches WHERE repo = ?", (repo.lower(),))
+            conn.executemany("INSERT INTO branches (repo, name) VALUES (?, ?)", [(repo.lower(), name) for name in names])
+            conn.commit()
+
+    def branches(self, repo: str) -> List[str]:
+        return [row["name"] for row in self._execute("SELECT name FROM branches WHERE repo = ? ORDER BY name", (repo.lower(),))]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,157 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a character based estimate
+    tiktoken = None
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimates the number of tokens of a text (about 4 characters per token).
+    """
+    return (len(text) + 3) // 4
+
+def default_token_counter() -> Callable[[str], int]:
+    """
+    Returns a token counter using tiktoken when installed, else a character based estimate.
+    """
+    if tiktoken is None:
+        return estimate_tokens
+    try:
+        encoding = tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # The encoding is downloaded on first use, which fails on hosts without internet access
+        return estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+@dataclass
+class CompactionStats:
+    messages_before: int = 0
+    messages_after: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    elided_tool_outputs: int = 0
+    dropped_messages: int = 0
+
+    @property
+    def tokens_trimmed(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+class HistoryCompactor:
+    """
+    Fits the message history sent to the LLM into a token budget.
+    The most recent turns are kept verbatim; tool outputs of older turns are elided first,
+    then the oldest turns are dropped whole so that tool calls and their results stay paired.
+    Only the LLM input is compacted; the checkpointed thread history is left untouched.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 12000,
+        keep_turns: int = 3,
+        elided_preview_chars: int = 200,
+        token_counter: Optional[Callable[[str], int]] = None,
+    ):
+        """
+        Initializes the compactor.
+        Args:
+            token_budget (int): Maximum number of tokens of the compacted history.
+            keep_turns (int): Number of most recent turns (a user message and everything after it) kept verbatim.
+            elided_preview_chars (int): Characters of an elided tool output kept as a preview.
+            token_counter (callable): Counts the tokens of a text. Defaults to tiktoken when installed.
+        """
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.elided_preview_chars = elided_preview_chars
+        self.count_text = token_counter or default_token_counter()
+        self.totals = CompactionStats()
+
+    @classmethod
+    def from_env(cls) -> Optional["HistoryCompactor"]:
+        """
+        Builds a compactor from AGENT_HISTORY_* environment variables; a budget of 0 disables compaction.
+        """
+        token_budget = int(os.getenv("AGENT_HISTORY_TOKEN_BUDGET", "12000"))
+        if token_budget <= 0:
+            return None
+        return cls(token_budget=token_budget, keep_turns=int(os.getenv("AGENT_HISTORY_KEEP_TURNS", "3")))
+
+    def count_tokens(self, message: BaseMessage) -> int:
+        """
+        Counts the tokens of a message's content and tool calls.
+        """
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+        tokens = self.count_text(content)
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            tokens += self.count_text(tool_call.get("name", "") + json.dumps(tool_call.get("args", {}), default=str))
+        return tokens
+
+    def _elide(self, message: BaseMessage) -> BaseMessage:
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+        if len(content) <= self.elided_preview_chars:
+            return message
+        preview = content[:self.elided_preview_chars]
+        return message.model_copy(update={"content": f"{preview}... [tool output elided, {len(content)} chars]"})
+
+    @staticmethod
+    def _split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+        turns: List[List[BaseMessage]] = []
+        for message in messages:
+            if isinstance(message, HumanMessage) or not turns:
+                turns.append([])
+            turns[-1].append(message)
+        return turns
+
+    def compact(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], CompactionStats]:
+        """
+        Returns the compacted history and statistics on what was trimmed.
+        """
+        stats = CompactionStats(messages_before=len(messages))
+        costs = {id(message): self.count_tokens(message) for message in messages}
+        stats.tokens_before = sum(costs.values())
+        turns = self._split_turns(messages)
+        total = stats.tokens_before
+
+        def elide_turns(selected: List[List[BaseMessage]]):
+            nonlocal total
+            for turn in selected:
+                for index, message in enumerate(turn):
+                    if total <= self.token_budget:
+                        return
+                    if isinstance(message, ToolMessage):
+                        elided = self._elide(message)
+                        if elided is not message:
+                            total += self.count_tokens(elided) - costs[id(message)]
+                            costs[id(elided)] = self.count_tokens(elided)
+                            turn[index] = elided
+                            stats.elided_tool_outputs += 1
+
+        keep = max(1, self.keep_turns)
+        older, recent = turns[:-keep], turns[-keep:]
+
+        def drop_oldest(selected: List[List[BaseMessage]], floor: int):
+            nonlocal total
+            while total > self.token_budget and len(selected) > floor:
+                dropped = selected.pop(0)
+                total -= sum(costs[id(message)] for message in dropped)
+                stats.dropped_messages += len(dropped)
+
+        # 1. Elide tool outputs of older turns, oldest first, then drop older turns whole
+        elide_turns(older)
+        drop_oldest(older, 0)
+        # 2. Only if still over budget, do the same for the recent turns, never touching the current one
+        elide_turns(recent[:-1])
+        drop_oldest(recent, 1)
+        turns = older + recent
+
+        compacted = [message for turn in turns for message in turn]
+        stats.messages_after = len(compacted)
+        stats.tokens_after = total
+        for field in ("messages_before", "messages_after", "tokens_before", "tokens_after", "elided_tool_outputs", "dropped_messages"):
+            setattr(self.totals, field, getattr(self.totals, field) + getattr(stats, field))
+        return compacted, stats
@@ -21,5 +21,7 @@ def get_llm():
         api_version=openai_api_version,
         azure_ad_token_provider=token_provider,
         deployment_name=chat_deployment_name,
+        # Report token usage on streamed responses too (needs API version 2024-09-01-preview or later)
+        stream_usage=os.getenv("AZURE_OPENAI_STREAM_USAGE", "1") == "1",
     )
     return llm
\ No newline at end of file
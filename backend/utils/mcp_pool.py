@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from langchain_mcp_adapters.sessions import Connection, create_session
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+
+try:
+    BaseExceptionGroup
+except NameError:  # Python < 3.11; the backport is installed with anyio, which mcp depends on
+    from exceptiongroup import BaseExceptionGroup
+
+logger = logging.getLogger(__name__)
+
+def root_cause(error: BaseException) -> BaseException:
+    """
+    Unwraps the task group errors that transport failures surface as.
+    """
+    while isinstance(error, BaseExceptionGroup) and error.exceptions:
+        error = error.exceptions[0]
+    return error
+
+class PooledSession:
+    """
+    A long-lived MCP session owned by a background task, since the transport's context
+    must be entered and exited by the same task. The task pings the server periodically
+    and reconnects with backoff whenever the session fails.
+    """
+
+    def __init__(self, connection: Connection, name: str, ping_interval: float, ping_timeout: float):
+        self.connection = connection
+        self.name = name
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.session: Optional[ClientSession] = None
+        self.ready = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.in_flight = 0
+        self.reconnects = 0
+        self._wake = asyncio.Event()
+        self._broken = False
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name=f"mcp-session-{self.name}")
+
+    async def _run(self):
+        backoff = 1.0
+        while not self._stopping:
+            try:
+                connection = {**self.connection, "session_kwargs": {"message_handler": self._on_message}}
+                async with create_session(connection) as session:
+                    await session.initialize()
+                    self.session, self._broken, backoff = session, False, 1.0
+                    self.closed.clear()
+                    self.ready.set()
+                    logger.info(f"MCP session {self.name} connected.")
+                    await self._keep_alive(session)
+            except Exception as e:
+                logger.warning(f"MCP session {self.name} failed: {root_cause(e)!r}")
+            finally:
+                self.session = None
+                self.ready.clear()
+                # Fails the calls still waiting on the dropped session
+                self.closed.set()
+            if self._stopping:
+                break
+            self.reconnects += 1
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            backoff = min(backoff * 2, 30.0)
+
+    async def _keep_alive(self, session: ClientSession):
+        """
+        Pings the server while idle; returns when the session is stopped or marked broken.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.ping_interval)
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(session.send_ping(), timeout=self.ping_timeout)
+                continue
+            self._wake.clear()
+            if self._stopping or self._broken:
+                return
+
+    async def _on_message(self, message):
+        # Transport errors of requests are reported here rather than to the waiting caller
+        if isinstance(message, Exception):
+            logger.warning(f"MCP session {self.name} transport error: {root_cause(message)!r}")
+            self.mark_broken()
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any], meta: Optional[Dict[str, Any]] = None):
+        """
+        Calls a tool on the session, failing with ConnectionError if the session is dropped meanwhile.
+        """
+        self.in_flight += 1
+        call = asyncio.ensure_future(self.session.call_tool(name, arguments, meta=meta))
+        closed = asyncio.ensure_future(self.closed.wait())
+        try:
+            await asyncio.wait({call, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if not call.done():
+                call.cancel()
+                raise ConnectionError(f"MCP session {self.name} closed during the call.")
+            return call.result()
+        finally:
+            closed.cancel()
+            if not call.done():
+                call.cancel()
+            self.in_flight -= 1
+
+    def mark_broken(self):
+        """
+        Makes the owning task drop the session and reconnect.
+        """
+        self._broken = True
+        self._wake.set()
+
+    async def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+            except Exception as e:
+                logger.warning(f"Error closing MCP session {self.name}: {e}")
+            self._task = None
+
+class MCPSessionPool:
+    """
+    A pool of persistent MCP sessions to one server, so that tool calls do not pay
+    for a new connection and handshake each time. Calls go to the ready session with the
+    fewest calls in flight, and are retried once on another session after a transport failure.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        size: int = 2,
+        ping_interval: float = 30,
+        ping_timeout: float = 10,
+        acquire_timeout: float = 10,
+    ):
+        """
+        Initializes the pool.
+        Args:
+            connection (Connection): Connection config of the MCP server.
+            size (int): Number of sessions kept open.
+            ping_interval (float): Seconds between health-check pings of an idle session.
+            ping_timeout (float): Seconds after which a ping without reply fails the session.
+            acquire_timeout (float): Longest a call waits for a session to become ready.
+        """
+        self.connection = connection
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.sessions: List[PooledSession] = [
+            PooledSession(connection, str(index), ping_interval, ping_timeout) for index in range(size)
+        ]
+        self._started = False
+
+    @classmethod
+    def from_env(cls, connection: Connection) -> Optional["MCPSessionPool"]:
+        """
+        Builds the pool from AGENT_MCP_POOL_* environment variables; a size of 0 disables pooling.
+        """
+        size = int(os.getenv("AGENT_MCP_POOL_SIZE", "2"))
+        if size <= 0:
+            return None
+        return cls(
+            connection,
+            size=size,
+            ping_interval=float(os.getenv("AGENT_MCP_PING_INTERVAL", "30")),
+        )
+
+    @property
+    def ready(self) -> int:
+        return sum(1 for session in self.sessions if session.session is not None)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(session.in_flight for session in self.sessions)
+
+    async def start(self):
+        """
+        Starts the sessions' tasks without waiting for them to connect.
+        """
+        if not self._started:
+            self._started = True
+            for session in self.sessions:
+                session.start()
+
+    async def _acquire(self, exclude: Optional[PooledSession] = None) -> Optional[PooledSession]:
+        candidates = [session for session in self.sessions if session is not exclude]
+        ready = [session for session in candidates if session.session is not None]
+        if not ready:
+            waiters = [asyncio.create_task(session.ready.wait()) for session in candidates]
+            try:
+                await asyncio.wait(waiters, timeout=self.acquire_timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+            ready = [session for session in candidates if session.session is not None]
+        return min(ready, key=lambda session: session.in_flight) if ready else None
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any], meta: Optional[Dict[str, Any]] = None):
+        """
+        Calls a tool on a pooled session. Returns None if no session could be used.
+        """
+        failed = None
+        for _ in range(2):
+            pooled = await self._acquire(exclude=failed)
+            if pooled is None:
+                return None
+            try:
+                return await pooled.call_tool(name, arguments, meta)
+            except McpError:
+                # The server answered with an error; the session itself is fine
+                raise
+            except Exception as e:
+                if failed is not None:
+                    raise
+                logger.warning(f"Tool call '{name}' failed on MCP session {pooled.name}, retrying on another session: {e}")
+                pooled.mark_broken()
+                failed = pooled
+        return None
+
+    async def close(self):
+        """
+        Closes all sessions of the pool.
+        """
+        await asyncio.gather(*(session.stop() for session in self.sessions))
+        self._started = False
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of ready sessions, calls in flight and reconnects.
+        """
+        return {
+            "sessions": self.size,
+            "ready": self.ready,
+            "in_flight": self.in_flight,
+            "reconnects": sum(session.reconnects for session in self.sessions),
+        }
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.interceptors import MCPToolCallRequest, MCPToolCallResult
+from langchain_mcp_adapters.sessions import Connection, create_session
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp.shared.exceptions import McpError
+
+from utils.mcp_pool import MCPSessionPool, root_cause
+from utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# Used when MCP_SERVERS is not set: the single local GitHub tool server
+DEFAULT_SERVERS = {"github": {"url": "http://127.0.0.1:9002/mcp/"}}
+BALANCE_POLICIES = ("least_in_flight", "round_robin")
+
+def load_server_config() -> Dict[str, Dict[str, Any]]:
+    """
+    Reads the MCP servers from the MCP_SERVERS environment variable, a JSON object mapping
+    server names to {"url": ...} or {"urls": [...]} for replicas, with optional "transport" and "balance".
+    """
+    raw = os.getenv("MCP_SERVERS")
+    if not raw:
+        return DEFAULT_SERVERS
+    try:
+        config = json.loads(raw)
+    except ValueError as e:
+        raise RuntimeError(f"MCP_SERVERS is not valid JSON: {e}")
+    if not isinstance(config, dict) or not config:
+        raise RuntimeError("MCP_SERVERS must map server names to their configuration.")
+    for name, server in config.items():
+        if not isinstance(server, dict) or not (server.get("url") or server.get("urls")):
+            raise RuntimeError(f"MCP server '{name}' needs a 'url' or a list of 'urls'.")
+        if server.get("balance", "least_in_flight") not in BALANCE_POLICIES:
+            raise RuntimeError(f"MCP server '{name}' has an unknown balance policy, expected one of {BALANCE_POLICIES}.")
+    return config
+
+@dataclass
+class Replica:
+    connection: Connection
+    pool: Optional[MCPSessionPool]
+    in_flight: int = 0
+    failures: int = 0
+    down_until: float = 0.0
+
+    @property
+    def url(self) -> str:
+        return self.connection.get("url", "")
+
+class MCPServerGroup:
+    """
+    The replicas of one MCP server, which all serve the same tools.
+    Tool calls are load balanced across replicas (least in flight or round robin) and fail over
+    to the next replica on transport failures; a failed replica is skipped for a cooldown.
+    Used as a tool call interceptor of the langchain MCP adapters.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connections: List[Connection],
+        balance: str = "least_in_flight",
+        failure_cooldown: float = 10,
+        pool_factory: Callable[[Connection], Optional[MCPSessionPool]] = MCPSessionPool.from_env,
+    ):
+        """
+        Initializes the group.
+        Args:
+            name (str): Name of the server.
+            connections (list): Connection configs of the replicas.
+            balance (str): "least_in_flight" or "round_robin".
+            failure_cooldown (float): Seconds a failed replica is skipped while others are available.
+            pool_factory (callable): Builds the session pool of a replica; returning None opens a session per call.
+        """
+        self.name = name
+        self.balance = balance
+        self.failure_cooldown = failure_cooldown
+        self.replicas = [Replica(connection=connection, pool=pool_factory(connection)) for connection in connections]
+        self._next = 0
+
+    @classmethod
+    def from_config(cls, name: str, server: Dict[str, Any]) -> "MCPServerGroup":
+        urls = server.get("urls") or [server["url"]]
+        transport = server.get("transport", "streamable_http")
+        return cls(
+            name,
+            [{"transport": transport, "url": url} for url in urls],
+            balance=server.get("balance", "least_in_flight"),
+            failure_cooldown=float(server.get("failure_cooldown", 10)),
+        )
+
+    async def start(self):
+        for replica in self.replicas:
+            if replica.pool:
+                await replica.pool.start()
+
+    def _candidates(self) -> List[Replica]:
+        """
+        Returns the replicas in the order to try them: healthy replicas with a ready session first,
+        ordered by the balance policy, then replicas in cooldown as a last resort.
+        """
+        now = time.monotonic()
+        replicas = self.replicas
+        if self.balance == "round_robin":
+            start = self._next % len(replicas)
+            self._next += 1
+            replicas = replicas[start:] + replicas[:start]
+        else:
+            replicas = sorted(replicas, key=lambda replica: replica.in_flight)
+        # Stable sorts keep the policy's order within each group
+        replicas = sorted(replicas, key=lambda replica: replica.pool is not None and replica.pool.ready == 0)
+        return sorted(replicas, key=lambda replica: replica.down_until > now)
+
+    async def _call_replica(self, replica: Replica, name: str, arguments: Dict[str, Any], meta: Optional[Dict[str, Any]]):
+        if replica.pool:
+            result = await replica.pool.call_tool(name, arguments, meta)
+            if result is None:
+                raise ConnectionError(f"No MCP session to {replica.url} is ready.")
+            return result
+        error = None
+        async with create_session(replica.connection) as session:
+            await session.initialize()
+            try:
+                result = await session.call_tool(name, arguments, meta=meta)
+            except Exception as e:
+                # Re-raised outside the session, whose exit may swallow it
+                error = e
+        if error is not None:
+            raise error
+        return result
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]):
+        """
+        Calls a tool on the best replica, failing over to the others on transport failures.
+        The trace of the call is passed on to the server in the request's _meta.
+        """
+        with get_tracer().span("mcp.call_tool", {"mcp.server": self.name, "mcp.tool": name}) as span:
+            meta = {"traceparent": span.traceparent} if span.traceparent else None
+            last_error = None
+            for attempt, replica in enumerate(self._candidates()):
+                replica.in_flight += 1
+                span.set_attributes({"mcp.replica": replica.url, "mcp.attempts": attempt + 1})
+                try:
+                    result = await self._call_replica(replica, name, arguments, meta)
+                    replica.failures, replica.down_until = 0, 0.0
+                    return result
+                except McpError:
+                    # The server answered with an error; another replica would answer the same
+                    raise
+                except Exception as e:
+                    last_error = root_cause(e)
+                    replica.failures += 1
+                    replica.down_until = time.monotonic() + self.failure_cooldown
+                    logger.warning(f"MCP server '{self.name}' replica {replica.url} failed, failing over: {last_error!r}")
+                finally:
+                    replica.in_flight -= 1
+            raise ConnectionError(f"All replicas of MCP server '{self.name}' failed: {last_error!r}")
+
+    async def intercept(
+        self,
+        request: MCPToolCallRequest,
+        handler: Callable[[MCPToolCallRequest], Awaitable[MCPToolCallResult]],
+    ) -> MCPToolCallResult:
+        """
+        Tool call interceptor dispatching calls across the replicas.
+        Calls with custom headers are left to the adapter, which opens a session with those headers.
+        """
+        if request.headers is not None:
+            return await handler(request)
+        return await self.call_tool(request.name, request.args)
+
+    async def load_tools(self) -> List[BaseTool]:
+        """
+        Lists the server's tools from the first replica that answers.
+        """
+        last_error = None
+        for replica in self._candidates():
+            try:
+                return await load_mcp_tools(
+                    None,
+                    connection=replica.connection,
+                    server_name=self.name,
+                    tool_interceptors=[self.intercept],
+                )
+            except Exception as e:
+                last_error = root_cause(e)
+                replica.down_until = time.monotonic() + self.failure_cooldown
+                logger.warning(f"Could not list the tools of MCP server '{self.name}' at {replica.url}: {last_error!r}")
+        raise ConnectionError(f"No replica of MCP server '{self.name}' answered: {last_error!r}")
+
+    async def close(self):
+        await asyncio.gather(*(replica.pool.close() for replica in self.replicas if replica.pool))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Returns the load and health of each replica.
+        """
+        now = time.monotonic()
+        return [
+            {
+                "url": replica.url,
+                "in_flight": replica.in_flight,
+                "failures": replica.failures,
+                "healthy": replica.down_until <= now,
+                **({"pool": replica.pool.stats()} if replica.pool else {}),
+            }
+            for replica in self.replicas
+        ]
+
+def load_server_groups() -> Dict[str, MCPServerGroup]:
+    """
+    Builds the server groups configured by MCP_SERVERS.
+    """
+    return {name: MCPServerGroup.from_config(name, server) for name, server in load_server_config().items()}
@@ -14,6 +14,7 @@ class InvokeResponse(BaseModel):
         "assistant",
         "assistant_thinking",
         "assistant_response",
+        "assistant_token",
         "tool_output",
         "tool_call_detected",
         "user_input_processed",
@@ -26,6 +27,7 @@ class InvokeResponse(BaseModel):
         "tool_output_received",
         "tool_execution_start",
         "interrupted",
+        "queued",
         "stream_error",
         "serialization_error"
     ]
@@ -10,17 +10,17 @@ def get_agentprompt():
                 * Determine which tool(s) are necessary to fulfill that need.
                 * **Crucial Step for Repository Names:** If a specific repository's full name (e.g., "owner/repo_name") is not explicitly provided in the user's query (e.g., just "Spoon-Knife"), you **must first use the `search_repositories_by_keyword` tool** to find potential matches.
                 * **Clarification Mandate:** If `search_repositories_by_keyword` returns multiple possible repositories (i.e., the list contains more than one dictionary), you **must immediately stop and ask the user for clarification**, listing the `full_name` and `description` of each option clearly, before attempting any other tool calls.
-                * Plan the exact arguments for the next tool call, ensuring they precisely match the tool's required input format and data types.
+                * Plan the exact arguments for the next tool call(s), ensuring they precisely match the tool's required input format and data types.
                 * If a request cannot be fulfilled by *any* of the available tools, you must explicitly state that the request is beyond your current capabilities.
-            3.  **Action (Tool Execution - Single Tool Call Per Turn):** You will invoke *one* tool per action turn.
-            4.  **Update (Process Tool Output):** Integrate the tool's output into your understanding of the problem.
+            3.  **Action (Tool Execution):** Invoke all tools whose calls are *independent* of each other in the same action turn (e.g., branches and issues of a known repository); they run in parallel. Only wait for a tool's output before the next call when that call needs it (e.g., `search_repositories_by_keyword` before any call that needs the full repository name).
+            4.  **Update (Process Tool Output):** Integrate the tools' outputs into your understanding of the problem. If one of several calls failed, use the results of the others and only retry or report the failed one.
             5.  **Render (Final Answer or Clarification):** Provide a concise, direct, and complete answer to the user's request, or ask for necessary clarification. Your final answer must always be based *only* on the information gathered from tool outputs.
 
             You **must strictly adhere to the following output format** for your reasoning and actions:
 
             **Thought:** Your reasoning process.
-            **Tool Call:** `tool_name({"arg1": "value1", "arg2": "value2"})`
-            **Observation:** The exact output from the tool.
+            **Tool Call:** `tool_name({"arg1": "value1", "arg2": "value2"})` (one line per tool call of the turn)
+            **Observation:** The exact output from the tool(s).
             *(Repeat Thought, Tool Call, Observation as many times as necessary until the task is complete or clarification is needed)*
             **Final Answer:** Your final, complete response to the user, or a clear clarification question.
 
@@ -43,13 +43,27 @@ def get_agentprompt():
                 * **Args:** `repo_name` (string): The *exact full name* of the repository (e.g., "octocat/Spoon-Knife").
                 * **Output format:** `List[str]` (e.g., `["main", "dev", "feature/new-design"]`). Returns a `str` error message if an exception occurs (e.g., repository not found).
 
-            4.  **`get_all_commits(repo_name: str)`**
-                * **Description:** Retrieves all commits of a specified GitHub repository, along with their author names and commit dates.
-                * **Args:** `repo_name` (string): The *exact full name* of the repository (e.g., "octocat/Spoon-Knife").
-                * **Output format:** `Dict[str, str]` where keys are commit dates (ISO 8601 string, e.g., "2024-06-18 10:30:00+00:00") and values are author names. Returns a `str` error message if an exception occurs.
+            4.  **`get_all_commits(repo_name: str, since: str = None, until: str = None, branch: str = None, path: str = None, limit: int = 30, cursor: str = None)`**
+                * **Description:** Retrieves a window of commits (newest first) of a specified GitHub repository, with sha, author, date and message headline. Narrow the window with `since`/`until`/`branch`/`path` instead of paging through the whole history. Only pass `cursor` when the user needs older commits than the current window.
+                * **Args:** `repo_name` (string): The *exact full name* of the repository (e.g., "octocat/Spoon-Knife"). `since`/`until` (string, optional): ISO 8601 dates (e.g., "2024-06-01"). `branch` (string, optional): Branch name. `path` (string, optional): File path. `limit` (int, optional): 1-100. `cursor` (string, optional): The `next_cursor` of a previous call with the same arguments.
+                * **Output format:** `Dict` of the form `{"commits": [{"sha": "...", "author": "John Doe", "date": "2024-06-18T10:30:00+00:00", "message": "Fix login bug"}], "next_cursor": "..." or null}`. Returns a `str` error message if an exception occurs.
 
-            5.  **`get_all_issues(repo_name: str)`**
-                * **Description:** Fetches all issues of a specified GitHub repository, including their title, number, and body.
-                * **Args:** `repo_name` (string): The *exact full name* of the repository (e.g., "octocat/Spoon-Knife").
-                * **Output format:** `List[str]` where each string provides issue details (e.g., `"Issue Title : [title], Issue Number : [number], Issue Body : [body]"`). Returns a `str` error message if an exception occurs.
+            5.  **`get_all_issues(repo_name: str, state: str = "open", labels: List[str] = None, assignee: str = None, include_pull_requests: bool = False, fields: List[str] = None, body_chars: int = 200, limit: int = 30)`**
+                * **Description:** Fetches the issues of a specified GitHub repository, newest first, as compact records. Pull requests are excluded unless `include_pull_requests` is true. Use the filters and `fields` to request only what the user asked for.
+                * **Args:** `repo_name` (string): The *exact full name* of the repository (e.g., "octocat/Spoon-Knife"). `state` (string, optional): "open", "closed" or "all". `labels` (list of strings, optional). `assignee` (string, optional): A login. `fields` (list of strings, optional): Any of "number", "title", "state", "author", "labels", "assignees", "comments", "created_at", "updated_at", "body", "is_pull_request". `body_chars` (int, optional): Bodies are truncated to this length. `limit` (int, optional): 1-100.
+                * **Output format:** `Dict` of the form `{"issues": [{"number": 1, "title": "Bug in login", "state": "open", "labels": ["bug"], "assignees": [], "updated_at": "...", "body": "Users cannot..."}], "total": 1, "truncated": false}`. Returns a `str` error message if an exception occurs.
+
+            6.  **`get_repository_overview(repo_name: str, sections: List[str] = None, limit: int = 10)`**
+                * **Description:** Fetches stats, branches, recent commits, open issues and open pull requests of a repository in a single call. Use this tool instead of separate branch/commit/issue calls when the user asks for a summary or overview of a repository.
+                * **Args:** `repo_name` (string): The *exact full name* of the repository (e.g., "octocat/Spoon-Knife"). `sections` (list of strings, optional): Any of "stats", "branches", "commits", "issues", "pull_requests"; defaults to all. `limit` (int, optional): Items listed per section (1-100).
+                * **Output format:** `Dict` with the keys `stats`, `branches`, `recent_commits`, `open_issues` and `open_pull_requests` for the requested sections. Returns a `str` error message if an exception occurs.
+
+            7.  **`get_branches_for_repos(repo_names: List[str])`**, **`get_commits_for_repos(repo_names: List[str], since: str = None, until: str = None, limit: int = 10)`**, **`get_issues_for_repos(repo_names: List[str], state: str = "open", labels: List[str] = None, include_pull_requests: bool = False, fields: List[str] = None, limit: int = 10)`**
+                * **Description:** Batch variants of `get_all_branches`, `get_all_commits` and `get_all_issues` that fetch up to 50 repositories concurrently. Use them instead of calling the single-repository tools once per repository, e.g. for questions about all of the user's repositories.
+                * **Args:** `repo_names` (list of strings): The *exact full names* of the repositories. The other arguments behave as in the single-repository tools.
+                * **Output format:** `Dict` of the form `{"results": {"owner/repo": <single-repository output>}, "errors": {"owner/other": "error message"}}`.
+
+            8.  **`get_rate_limit_status()`**
+                * **Description:** Reports the GitHub API budget currently available to the tools. Use it only when the user asks about rate limits or tools fail with rate-limit errors.
+                * **Output format:** `Dict` of the form `{"remaining": 4870, "limit": 5000, "reset_at": "...", "backoff_seconds": 0.0}`.
             """
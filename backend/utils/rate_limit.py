@@ -0,0 +1,226 @@
+import functools
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from github import Github, GithubException, RateLimitExceededException
+
+logger = logging.getLogger(__name__)
+
+# The scheduler of the call running on each thread, and the resource of its last request
+_local = threading.local()
+
+def resource_of(url: str) -> str:
+    """
+    Returns the rate-limit resource (X-RateLimit-Resource) a request to the url counts against.
+    """
+    path = url.split("?", 1)[0]
+    if "/search/code" in path:
+        return "code_search"
+    if "/search/" in path:
+        return "search"
+    if path.endswith("/graphql"):
+        return "graphql"
+    return "core"
+
+@dataclass
+class Budget:
+    """
+    The rate limit of one resource, as last reported by GitHub.
+    """
+    remaining: Optional[int] = None
+    limit: Optional[int] = None
+    reset_at: float = 0.0
+    blocked_until: float = 0.0
+    next_slot: float = 0.0
+
+    def status(self, now: float) -> Dict[str, Any]:
+        return {
+            "remaining": self.remaining,
+            "limit": self.limit,
+            "reset_at": datetime.fromtimestamp(self.reset_at, timezone.utc).isoformat() if self.reset_at else None,
+            "backoff_seconds": round(max(0.0, self.blocked_until - now), 1),
+        }
+
+class RateLimitError(Exception):
+    """
+    Raised when a call cannot be scheduled within the allowed wait because the rate limit is exhausted.
+    """
+
+class RateLimitScheduler:
+    """
+    Paces GitHub calls across all concurrent tools using the rate-limit headers of the last responses,
+    and retries abuse/secondary rate limits with exponential backoff and jitter.
+    GitHub limits each resource (core, search, graphql...) separately, so a budget is kept per resource
+    and every HTTP request a call sends, including further pages, waits for the budget of its own resource.
+    Calls are expected to run on executor threads; waiting blocks the calling thread only.
+    """
+
+    def __init__(
+        self,
+        client: Github,
+        reserve: int = 50,
+        max_wait: float = 60,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0,
+    ):
+        """
+        Initializes the scheduler.
+        Args:
+            client (Github): The client whose rate-limit headers are observed.
+            reserve (int): Remaining requests below which calls are spread evenly until the reset.
+            max_wait (float): Longest a call may wait for budget before RateLimitError is raised.
+            max_retries (int): Retries of a call hitting a secondary rate limit or a transient error.
+            backoff_base (float): Base delay in seconds of the exponential backoff.
+            backoff_cap (float): Maximum backoff delay in seconds.
+        """
+        self.client = client
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.budgets: Dict[str, Budget] = {}
+        self._lock = threading.Lock()
+        _schedule_pygithub()
+
+    def budget(self, resource: str = "core") -> Budget:
+        with self._lock:
+            return self.budgets.setdefault(resource, Budget())
+
+    def call(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Runs func(*args), pacing each of its requests by the budget of their resource
+        and retrying rate-limited and transient failures.
+        """
+        attempt = 0
+        _local.scheduler = self
+        try:
+            while True:
+                try:
+                    return func(*args)
+                except RateLimitExceededException as e:
+                    delay = self._retry_delay(e, attempt)
+                    if attempt >= self.max_retries or delay > self.max_wait:
+                        raise
+                    headers = {key.lower(): value for key, value in (e.headers or {}).items()}
+                    resource = headers.get("x-ratelimit-resource") or getattr(_local, "resource", "core")
+                    budget = self.budget(resource)
+                    with self._lock:
+                        budget.blocked_until = max(budget.blocked_until, time.time() + delay)
+                    logger.warning(f"GitHub {resource} rate limit hit, backing off for {delay:.1f}s (attempt {attempt + 1})")
+                except GithubException as e:
+                    if e.status not in (502, 503, 504) or attempt >= self.max_retries:
+                        raise
+                    delay = self._backoff(attempt)
+                    logger.warning(f"GitHub returned {e.status}, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                    time.sleep(delay)
+                attempt += 1
+        finally:
+            _local.scheduler = None
+
+    def _observe(self, resource: str, headers: Dict[str, str]):
+        """
+        Records the rate-limit headers of a response to a request counting against the resource.
+        """
+        if "x-ratelimit-remaining" not in headers or "x-ratelimit-limit" not in headers:
+            return
+        budget = self.budget(headers.get("x-ratelimit-resource") or resource)
+        with self._lock:
+            budget.remaining = int(float(headers["x-ratelimit-remaining"]))
+            budget.limit = int(float(headers["x-ratelimit-limit"]))
+            if "x-ratelimit-reset" in headers:
+                budget.reset_at = float(headers["x-ratelimit-reset"])
+
+    def _wait_for_budget(self, resource: str):
+        """
+        Blocks until a request to the resource may be sent: after any abuse backoff, and paced while budget is low.
+        """
+        budget = self.budget(resource)
+        with self._lock:
+            now = time.time()
+            start = max(now, budget.blocked_until)
+            if budget.remaining is not None and budget.reset_at > now:
+                # The reserve is kept below half of the limit, so that small limits such as search are not always paced
+                reserve = min(self.reserve, (budget.limit or 0) // 2)
+                if budget.remaining <= 0:
+                    start = max(start, budget.reset_at)
+                elif budget.remaining < reserve:
+                    # Spread the remaining budget evenly until the window resets
+                    interval = (budget.reset_at - now) / budget.remaining
+                    start = max(start, budget.next_slot)
+                    budget.next_slot = start + interval
+            delay = start - now
+            if delay > self.max_wait:
+                raise RateLimitError(
+                    f"GitHub {resource} rate limit exhausted, resets at {datetime.fromtimestamp(max(budget.reset_at, budget.blocked_until), timezone.utc).isoformat()}"
+                )
+        if delay > 0:
+            time.sleep(delay)
+
+    def _retry_delay(self, e: RateLimitExceededException, attempt: int) -> float:
+        """
+        Returns how long to wait before retrying a rate-limited call.
+        """
+        headers = {key.lower(): value for key, value in (e.headers or {}).items()}
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+        if headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in headers:
+            return max(0.0, float(headers["x-ratelimit-reset"]) - time.time())
+        return self._backoff(attempt)
+
+    def _backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter.
+        """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns the core budget as last reported by GitHub, with the budget of every resource seen so far.
+        """
+        now = time.time()
+        core = self.budget("core")
+        with self._lock:
+            return {**core.status(now), "resources": {name: budget.status(now) for name, budget in self.budgets.items()}}
+
+def _scheduled_request(request):
+    @functools.wraps(request)
+    def wrapper(connection, verb, url, *args, **kwargs):
+        scheduler = getattr(_local, "scheduler", None)
+        if scheduler is not None:
+            _local.resource = resource_of(url)
+            scheduler._wait_for_budget(_local.resource)
+        return request(connection, verb, url, *args, **kwargs)
+    wrapper.scheduled = True
+    return wrapper
+
+def _scheduled_getresponse(getresponse):
+    @functools.wraps(getresponse)
+    def wrapper(connection):
+        response = getresponse(connection)
+        scheduler = getattr(_local, "scheduler", None)
+        if scheduler is not None:
+            scheduler._observe(getattr(_local, "resource", "core"), {key.lower(): value for key, value in response.getheaders()})
+        return response
+    wrapper.scheduled = True
+    return wrapper
+
+def _schedule_pygithub():
+    """
+    Hooks the schedulers into every HTTP request PyGithub sends, including pagination.
+    Wraps the methods of PyGithub's connection classes, like trace_pygithub, which keeps their connection reuse;
+    requests are paced by the scheduler of the call running on the sending thread, if any.
+    """
+    from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass
+
+    for connection_class in (HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass):
+        if not getattr(connection_class.request, "scheduled", False):
+            connection_class.request = _scheduled_request(connection_class.request)
+        if not getattr(connection_class.getresponse, "scheduled", False):
+            connection_class.getresponse = _scheduled_getresponse(connection_class.getresponse)
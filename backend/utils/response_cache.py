@@ -0,0 +1,208 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from utils.router import REPO
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # Similarity lookups need sentence-transformers
+    SentenceTransformer = None
+
+# Seconds an answer stays valid, by the tools it used; mirrors the tool server's cache TTLs
+TOOL_TTLS = {
+    "get_all_issues": 60,
+    "get_issues_for_repos": 60,
+    "get_all_branches": 120,
+    "get_branches_for_repos": 120,
+    "get_all_commits": 120,
+    "get_commits_for_repos": 120,
+    "get_repository_overview": 120,
+    "get_all_user_repo": 300,
+    "search_repositories_by_keyword": 600,
+    # Live status, never cached
+    "get_rate_limit_status": 0,
+}
+DEFAULT_TTL = 60
+
+REPO_PATTERN = re.compile(REPO)
+
+def normalize_query(query: str) -> str:
+    """
+    Lower-cases a query, collapses whitespace and strips trailing punctuation.
+    """
+    return re.sub(r"\s+", " ", query).strip().rstrip("?.! ").lower()
+
+def repos_in(text: str) -> FrozenSet[str]:
+    """
+    Returns the lower-cased owner/repo names mentioned in a text.
+    """
+    return frozenset(match.group("repo").lower() for match in REPO_PATTERN.finditer(text))
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+@dataclass
+class CachedAnswer:
+    query: str
+    answer: str
+    repos: FrozenSet[str]
+    expires_at: float
+    embedding: Optional[List[float]] = None
+    created_at: float = field(default_factory=time.monotonic)
+
+class AgentResponseCache:
+    """
+    An in-process LRU cache of final agent answers keyed on the normalized query.
+    Entries expire with the shortest TTL of the tools used to produce them, are tagged with
+    the repositories they are about so that they can be invalidated when that data changes,
+    and can optionally be matched by embedding similarity among entries about the same repositories.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        tool_ttls: Optional[Dict[str, float]] = None,
+        embed: Optional[Callable[[str], List[float]]] = None,
+        similarity_threshold: float = 0.92,
+    ):
+        """
+        Initializes the cache.
+        Args:
+            max_entries (int): Maximum number of answers kept before the least recently used is evicted.
+            tool_ttls (dict): Seconds an answer stays valid, by tool name. Defaults to TOOL_TTLS.
+            embed (callable): Embeds a query for similarity lookups. Only exact matches are served if None.
+            similarity_threshold (float): Minimum cosine similarity of a similar query to be served.
+        """
+        self.max_entries = max_entries
+        self.tool_ttls = {**TOOL_TTLS, **(tool_ttls or {})}
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["AgentResponseCache"]:
+        """
+        Builds the cache from AGENT_RESPONSE_CACHE_* environment variables; a size of 0 disables it.
+        """
+        max_entries = int(os.getenv("AGENT_RESPONSE_CACHE_SIZE", "256"))
+        if max_entries <= 0:
+            return None
+        tool_ttls = {}
+        for item in os.getenv("AGENT_RESPONSE_CACHE_TTLS", "").split(","):
+            if "=" in item:
+                name, seconds = item.split("=", 1)
+                tool_ttls[name.strip()] = float(seconds)
+        embed = None
+        model_name = os.getenv("AGENT_RESPONSE_CACHE_EMBED_MODEL")
+        if model_name:
+            if SentenceTransformer is None:
+                raise RuntimeError("Similarity lookups need the sentence-transformers package.")
+            model = SentenceTransformer(model_name)
+            embed = lambda text: model.encode(text).tolist()
+        return cls(
+            max_entries=max_entries,
+            tool_ttls=tool_ttls,
+            embed=embed,
+            similarity_threshold=float(os.getenv("AGENT_RESPONSE_CACHE_SIMILARITY", "0.92")),
+        )
+
+    def ttl_for(self, tool_names: Iterable[str]) -> float:
+        """
+        Returns how long an answer produced with the given tools stays valid.
+        """
+        return min((self.tool_ttls.get(name, DEFAULT_TTL) for name in tool_names), default=DEFAULT_TTL)
+
+    def get(self, query: str) -> Optional[CachedAnswer]:
+        """
+        Returns the fresh answer to the query, or to a similar query about the same repositories.
+        """
+        key = normalize_query(query)
+        embedding = None
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            candidates = [entry for entry in self._entries.values() if entry.embedding is not None]
+        if self.embed and candidates:
+            embedding = self.embed(key)
+            repos = repos_in(key)
+            best, best_score = None, self.similarity_threshold
+            for candidate in candidates:
+                # Similar wording about other repositories is a different question
+                if candidate.repos != repos:
+                    continue
+                score = _cosine(embedding, candidate.embedding)
+                if score >= best_score:
+                    best, best_score = candidate, score
+            if best is not None:
+                with self._lock:
+                    self.similar_hits += 1
+                return best
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, query: str, answer: str, tool_names: Iterable[str], repos: Iterable[str] = ()):
+        """
+        Stores the answer to a query, tagged with the repositories it is about.
+        Answers produced with an uncacheable tool (TTL of 0) are not stored.
+        """
+        tool_names = list(tool_names)
+        ttl = self.ttl_for(tool_names)
+        if ttl <= 0:
+            return
+        key = normalize_query(query)
+        embedding = self.embed(key) if self.embed else None
+        with self._lock:
+            self._entries[key] = CachedAnswer(
+                query=key,
+                answer=answer,
+                repos=repos_in(key) | frozenset(repo.lower() for repo in repos),
+                expires_at=time.monotonic() + ttl,
+                embedding=embedding,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, repo: Optional[str] = None) -> int:
+        """
+        Removes the answers about a repository, or every answer if no repository is given.
+        Returns how many were removed.
+        """
+        with self._lock:
+            if repo is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [key for key, entry in self._entries.items() if repo.lower() in entry.repos]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of entries and the hit and miss counts.
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "similar_hits": self.similar_hits, "misses": self.misses}
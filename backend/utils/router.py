@@ -0,0 +1,120 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+# An explicit "owner/repo" full name; a trailing period is read as punctuation
+REPO = r"(?P<repo>[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]*[A-Za-z0-9_-])"
+LEAD = r"^\s*(?:please\s+)?(?:list|show|get|fetch|what\s+are)(?:\s+me)?(?:\s+all)?(?:\s+(?:the|of))?"
+END = r"\s*[?.!]?\s*$"
+# The entry the tool server appends to a list of names cut short by its response budget
+MORE = re.compile(r"^\.\.\. (?P<count>\d+) more not shown$")
+ISSUE_STATES = {"open": "Open issues", "closed": "Closed issues", "all": "Issues"}
+
+def _name_list(output: List[str]) -> Tuple[int, str]:
+    """
+    Returns the number of names in a list, counting those left out by the tool server, and the list as bullets.
+    """
+    more = MORE.match(output[-1]) if output else None
+    names = output[:-1] if more else output
+    lines = [f"- `{name}`" for name in names] + ([f"- {output[-1]}"] if more else [])
+    return len(names) + (int(more.group("count")) if more else 0), "\n".join(lines)
+
+def _render_branches(output: Any, repo: str, args: Dict[str, Any]) -> str:
+    if not isinstance(output, list):
+        raise TypeError("Expected a list of branches")
+    if not output:
+        return f"`{repo}` has no branches."
+    total, lines = _name_list(output)
+    return f"`{repo}` has {total} branch(es):\n\n" + lines
+
+def _render_user_repos(output: Any, repo: Optional[str], args: Dict[str, Any]) -> str:
+    if not isinstance(output, list):
+        raise TypeError("Expected a list of repositories")
+    if not output:
+        return "You don't have access to any repositories."
+    total, lines = _name_list(output)
+    return f"You have access to {total} repositories:\n\n" + lines
+
+def _render_issues(output: Any, repo: str, args: Dict[str, Any]) -> str:
+    issues = output["issues"]
+    title = ISSUE_STATES[args["state"]]
+    if not issues:
+        return f"`{repo}` has no {title.lower()}."
+    lines = [
+        f"- #{issue['number']} {issue['title']}"
+        + (f" ({', '.join(issue['labels'])})" if issue.get("labels") else "")
+        + (f" [{issue['state']}]" if args["state"] == "all" and issue.get("state") else "")
+        for issue in issues
+    ]
+    more = f"\n\nShowing {len(issues)} of {output['total']} {title.lower()}." if output.get("truncated") else ""
+    return f"{title} in `{repo}`:\n\n" + "\n".join(lines) + more
+
+def _render_commits(output: Any, repo: str, args: Dict[str, Any]) -> str:
+    commits = output["commits"]
+    if not commits:
+        return f"`{repo}` has no commits."
+    lines = [f"- `{commit['sha'][:7]}` {commit['message']} ({commit['author']}, {commit['date'][:10]})" for commit in commits]
+    return f"Latest commits in `{repo}`:\n\n" + "\n".join(lines)
+
+@dataclass
+class Intent:
+    pattern: Pattern
+    tool_name: str
+    render: Callable[[Any, Optional[str], Dict[str, Any]], str]
+    # Default arguments of the tool call; named groups of the pattern other than repo override them
+    args: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class Route:
+    tool_name: str
+    args: Dict[str, Any]
+    repo: Optional[str]
+    render: Callable[[Any, Optional[str], Dict[str, Any]], str]
+
+INTENTS: List[Intent] = [
+    Intent(re.compile(LEAD + r"\s+branches\s+(?:of|for|in)\s+" + REPO + END, re.I), "get_all_branches", _render_branches),
+    # Issues of any state unless open or closed ones are asked for
+    Intent(re.compile(LEAD + r"\s+(?:(?P<state>open|closed)\s+)?issues\s+(?:of|for|in)\s+" + REPO + END, re.I), "get_all_issues", _render_issues, {"state": "all"}),
+    Intent(re.compile(LEAD + r"\s+(?:latest\s+|recent\s+)?commits\s+(?:of|for|in)\s+" + REPO + END, re.I), "get_all_commits", _render_commits, {"limit": 10}),
+    Intent(re.compile(LEAD + r"\s+(?:my\s+)?repos(?:itories)?(?:\s+(?:i\s+have\s+access\s+to|you\s+have\s+access\s+to))?" + END, re.I), "get_all_user_repo", _render_user_repos),
+]
+
+class FastPathRouter:
+    """
+    Matches literal, high-confidence queries (e.g. "list branches of octocat/Spoon-Knife") to a single tool call
+    whose output is rendered from a template, so that they skip the LLM entirely.
+    Anything that does not match exactly is left to the agent.
+    """
+
+    def __init__(self, intents: Optional[List[Intent]] = None):
+        self.intents = intents if intents is not None else INTENTS
+
+    def match(self, query: str) -> Optional[Route]:
+        """
+        Returns the route of the first intent matching the whole query, if any.
+        """
+        for intent in self.intents:
+            found = intent.pattern.match(query)
+            if found:
+                groups = found.groupdict()
+                repo = groups.pop("repo", None)
+                args = {**intent.args, **{name: value.lower() for name, value in groups.items() if value}}
+                if repo:
+                    args["repo_name"] = repo
+                return Route(tool_name=intent.tool_name, args=args, repo=repo, render=intent.render)
+        return None
+
+    @staticmethod
+    def render(route: Route, content: Any) -> Optional[str]:
+        """
+        Renders the tool output with the route's template.
+        Returns None if the output is not the expected structure (e.g. an error message), so the agent can take over.
+        """
+        if isinstance(content, list) and all(isinstance(block, dict) for block in content):
+            content = "".join(block.get("text", "") for block in content)
+        try:
+            output = json.loads(content) if isinstance(content, str) else content
+            return route.render(output, route.repo, route.args)
+        except (ValueError, TypeError, KeyError):
+            return None
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class Run:
+    """
+    An agent run executing in the background, with the latest events it produced.
+    Events are numbered from 1; only the last max_events are kept.
+    """
+
+    def __init__(self, run_id: str, thread_id: str, max_events: int):
+        self.run_id = run_id
+        self.thread_id = thread_id
+        self.seq = 0
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._events: Deque[Tuple[int, str]] = deque(maxlen=max_events)
+        self._changed = asyncio.Event()
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.run_id}:{seq}"
+
+    def publish(self, data: str):
+        self.seq += 1
+        self._events.append((self.seq, data))
+        self._notify()
+
+    def finish(self):
+        self.done = True
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    def _notify(self):
+        # Wakes every subscriber waiting on the current event, then arms a new one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def events(self, after: int = 0) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Yields the events numbered after `after`, then the new ones as they are published, until the run is done.
+        Events already dropped from the buffer are skipped.
+        """
+        while True:
+            if self._events and self._events[-1][0] > after:
+                first = self._events[0][0]
+                # Copied, as the buffer may change while the events are sent
+                pending = list(islice(self._events, max(after + 1 - first, 0), None))
+                if pending[0][0] > after + 1:
+                    logger.warning(f"Run {self.run_id}: events {after + 1} to {pending[0][0] - 1} are no longer buffered")
+                for seq, data in pending:
+                    after = seq
+                    yield seq, data
+                continue
+            if self.done:
+                return
+            await self._changed.wait()
+
+class RunBuffer:
+    """
+    Keeps agent runs going in background tasks, independent of the connection that started them,
+    and buffers their latest events in a ring buffer. A client that lost its connection reconnects
+    with the id of the last event it received and is sent what it missed, then the live events.
+    Finished runs are kept for a time to live, and the oldest are dropped beyond max_runs.
+    Meant to be used from a single event loop.
+    """
+
+    def __init__(self, max_runs: int = 256, max_events: int = 4096, ttl: float = 300):
+        """
+        Initializes the buffer.
+        Args:
+            max_runs (int): Finished runs kept for replay at most.
+            max_events (int): Events kept per run.
+            ttl (float): Seconds a finished run can still be replayed.
+        """
+        self.max_runs = max_runs
+        self.max_events = max_events
+        self.ttl = ttl
+        self.runs: Dict[str, Run] = {}
+        self.resumed = 0
+
+    @classmethod
+    def from_env(cls) -> "RunBuffer":
+        """
+        Builds the buffer from AGENT_RUN_BUFFER_* environment variables.
+        """
+        return cls(
+            max_runs=int(os.getenv("AGENT_RUN_BUFFER_RUNS", "256")),
+            max_events=int(os.getenv("AGENT_RUN_BUFFER_EVENTS", "4096")),
+            ttl=float(os.getenv("AGENT_RUN_BUFFER_TTL", "300")),
+        )
+
+    def start(self, thread_id: str, source: AsyncIterator[str]) -> Run:
+        """
+        Starts a run that publishes every item of source as an event.
+        """
+        self._evict()
+        run = Run(uuid.uuid4().hex, thread_id, self.max_events)
+        run.task = asyncio.create_task(self._drive(run, source))
+        self.runs[run.run_id] = run
+        return run
+
+    async def _drive(self, run: Run, source: AsyncIterator[str]):
+        try:
+            async for data in source:
+                run.publish(data)
+        except Exception as e:
+            logger.error(f"Run {run.run_id} failed: {e}")
+        finally:
+            run.finish()
+
+    def resume(self, last_event_id: str, thread_id: str) -> Optional[Tuple[Run, int]]:
+        """
+        Finds the run of a Last-Event-ID ("run_id:seq") and the number of the last event received.
+        Returns None if the id is malformed, the run is unknown or expired, or belongs to another thread.
+        """
+        run_id, _, seq = last_event_id.partition(":")
+        run = self.runs.get(run_id)
+        if run is None or run.thread_id != thread_id or not seq.isdigit():
+            return None
+        self.resumed += 1
+        return run, int(seq)
+
+    def _evict(self):
+        now = time.monotonic()
+        finished = [run for run in self.runs.values() if run.done]
+        expired = [run for run in finished if now - run.finished_at > self.ttl]
+        # Finished runs are in start order; drop the oldest beyond the limit
+        expired += [run for run in finished if run not in expired][: max(0, len(finished) - len(expired) - self.max_runs)]
+        for run in expired:
+            del self.runs[run.run_id]
+
+    async def close(self):
+        tasks = [run.task for run in self.runs.values() if run.task and not run.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of runs in progress and buffered, and how many times a stream was resumed.
+        """
+        running = sum(1 for run in self.runs.values() if not run.done)
+        return {"running": running, "buffered": len(self.runs) - running, "resumed": self.resumed}
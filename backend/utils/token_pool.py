@@ -0,0 +1,159 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Set
+
+from github import Auth, Github, RateLimitExceededException
+
+from utils.rate_limit import RateLimitError, RateLimitScheduler
+
+logger = logging.getLogger(__name__)
+
+# Used when no credential is configured, as before the pool existed
+PLACEHOLDER_TOKEN = "<YOUR_GITHUB_PAT_TOKEN>"
+
+@dataclass
+class Credential:
+    name: str
+    auth: Auth.Auth
+    client: Github
+    scheduler: RateLimitScheduler
+
+    def budget(self, now: float) -> float:
+        """
+        Returns the fraction of the core rate limit left, 1.0 while unknown and 0.0 while held back.
+        """
+        budget = self.scheduler.budget("core")
+        if budget.blocked_until > now:
+            return 0.0
+        if budget.remaining is None or not budget.limit or budget.reset_at <= now:
+            return 1.0
+        return budget.remaining / budget.limit
+
+class TokenPool:
+    """
+    A pool of GitHub credentials (personal access tokens and GitHub App installations),
+    each with its own client and rate-limit scheduler. Every call goes to the credential
+    with the most budget left and switches to another one when its credential is exhausted.
+    The client of the credential serving a call is available to the call's thread through client().
+    Installation tokens are refreshed by PyGithub shortly before they expire; the pool makes sure
+    only one thread refreshes a credential at a time.
+    """
+
+    def __init__(self, credentials: List[Credential]):
+        """
+        Initializes the pool.
+        Args:
+            credentials (list): The credentials to spread calls over, in order of preference.
+        """
+        if not credentials:
+            raise ValueError("The token pool needs at least one credential")
+        self.credentials = credentials
+        self.switches = 0
+        self._local = threading.local()
+        self._refresh_locks: Dict[str, threading.Lock] = {credential.name: threading.Lock() for credential in credentials}
+
+    @classmethod
+    def from_env(cls, client_factory: Callable[[Auth.Auth], Github], scheduler_factory: Callable[[Github], RateLimitScheduler]) -> "TokenPool":
+        """
+        Builds the pool from GITHUB_TOKENS (comma-separated personal access tokens) and
+        GITHUB_APP_ID, GITHUB_APP_PRIVATE_KEY or GITHUB_APP_PRIVATE_KEY_PATH and
+        GITHUB_APP_INSTALLATION_IDS (comma-separated) for GitHub App installations.
+        """
+        auths: Dict[str, Auth.Auth] = {}
+        tokens = [token.strip() for token in os.getenv("GITHUB_TOKENS", os.getenv("GITHUB_TOKEN", "")).split(",") if token.strip()]
+        for index, token in enumerate(tokens):
+            auths[f"token-{index + 1}"] = Auth.Token(token)
+        app_id = os.getenv("GITHUB_APP_ID")
+        if app_id:
+            private_key = os.getenv("GITHUB_APP_PRIVATE_KEY")
+            key_path = os.getenv("GITHUB_APP_PRIVATE_KEY_PATH")
+            if not private_key and key_path:
+                with open(key_path) as key_file:
+                    private_key = key_file.read()
+            if not private_key:
+                raise RuntimeError("GITHUB_APP_ID is set without GITHUB_APP_PRIVATE_KEY or GITHUB_APP_PRIVATE_KEY_PATH")
+            app_auth = Auth.AppAuth(app_id, private_key)
+            for installation_id in os.getenv("GITHUB_APP_INSTALLATION_IDS", "").split(","):
+                if installation_id.strip():
+                    auths[f"installation-{installation_id.strip()}"] = app_auth.get_installation_auth(int(installation_id))
+        if not auths:
+            logger.warning("No GitHub credentials configured, using the placeholder token")
+            auths["token-1"] = Auth.Token(PLACEHOLDER_TOKEN)
+        credentials = []
+        for name, auth in auths.items():
+            client = client_factory(auth)
+            credentials.append(Credential(name=name, auth=auth, client=client, scheduler=scheduler_factory(client)))
+        return cls(credentials)
+
+    def current(self) -> Credential:
+        """
+        Returns the credential serving the current call, or the first credential outside calls.
+        """
+        return getattr(self._local, "credential", None) or self.credentials[0]
+
+    def client(self) -> Github:
+        """
+        Returns the client of the credential serving the current call, or the first client outside calls.
+        """
+        return self.current().client
+
+    def _select(self, exclude: Set[str]) -> Credential:
+        now = time.time()
+        candidates = [credential for credential in self.credentials if credential.name not in exclude]
+        best = max(candidates, key=lambda credential: credential.budget(now))
+        if best.budget(now) > 0:
+            return best
+        # Every candidate is exhausted: use the one available again first
+        return min(candidates, key=lambda credential: max(credential.scheduler.budget("core").blocked_until, credential.scheduler.budget("core").reset_at))
+
+    def _ensure_token(self, credential: Credential):
+        """
+        Lets one thread at a time refresh an installation token that is about to expire.
+        """
+        if isinstance(credential.auth, Auth.AppInstallationAuth):
+            with self._refresh_locks[credential.name]:
+                # Accessing the token refreshes it when it is close to expiring
+                credential.auth.token
+
+    def call(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Runs func(*args) with the credential that has the most budget left,
+        moving on to the next credential when one is exhausted.
+        """
+        tried: Set[str] = set()
+        while True:
+            credential = self._select(tried)
+            self._local.credential = credential
+            try:
+                self._ensure_token(credential)
+                return credential.scheduler.call(func, *args)
+            except (RateLimitError, RateLimitExceededException):
+                tried.add(credential.name)
+                if len(tried) == len(self.credentials):
+                    raise
+                self.switches += 1
+                logger.warning(f"GitHub credential {credential.name} is rate limited, switching to another credential")
+            finally:
+                self._local.credential = None
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns the budget summed over all credentials, with the budget of each credential.
+        """
+        statuses = {credential.name: credential.scheduler.status() for credential in self.credentials}
+        known = [status for status in statuses.values() if status["remaining"] is not None]
+        reset_times = [status["reset_at"] for status in known if status["reset_at"]]
+        return {
+            "remaining": sum(status["remaining"] for status in known) if known else None,
+            "limit": sum(status["limit"] for status in known) if known else None,
+            "reset_at": min(reset_times) if reset_times else None,
+            "backoff_seconds": min(status["backoff_seconds"] for status in statuses.values()),
+            "credentials": statuses,
+        }
+
+    def close(self):
+        for credential in self.credentials:
+            credential.client.close()
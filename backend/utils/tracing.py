@@ -0,0 +1,362 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# W3C trace context: version-trace_id-parent_id-flags
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Returns the trace id and parent span id of a traceparent header, or None if it is missing or malformed.
+    """
+    match = TRACEPARENT.match((value or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2)
+
+class Span:
+    """
+    A timed operation of a trace, shaped after the OpenTelemetry span data model.
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str], attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @property
+    def duration(self) -> float:
+        """
+        Returns the duration of the ended span in seconds.
+        """
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "service": self.tracer.service,
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "status": "ERROR" if self.error else "OK",
+            **({"error": self.error} if self.error else {}),
+        }
+
+class _NoopSpan:
+    """
+    Stands in for spans while tracing is disabled.
+    """
+    traceparent = None
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class JsonlExporter:
+    """
+    Appends finished spans to a file, one JSON object per line.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class OTLPExporter:
+    """
+    Sends finished spans in batches to an OpenTelemetry collector over OTLP/HTTP with JSON encoding.
+    Spans are queued and posted from a background thread; spans beyond max_queue are dropped.
+    """
+
+    def __init__(self, endpoint: str, interval: float = 5, max_queue: int = 2048, max_batch: int = 512):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.interval = interval
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.dropped = 0
+        self._queue: List[Span] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._queue.append(span)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        while True:
+            with self._lock:
+                batch, self._queue = self._queue[: self.max_batch], self._queue[self.max_batch:]
+            if not batch:
+                return
+            try:
+                self._post(batch)
+            except Exception as e:
+                logger.warning(f"Could not export {len(batch)} span(s) to {self.url}: {e}")
+                return
+
+    def _post(self, spans: List[Span]):
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": spans[0].tracer.service}}]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [
+                        {
+                            "traceId": span.trace_id,
+                            "spanId": span.span_id,
+                            **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                            "name": span.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns),
+                            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+                            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                        }
+                        for span in spans
+                    ],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.url, data=json.dumps(body, default=str).encode(), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+        self.flush()
+
+class Tracer:
+    """
+    Records spans of the operations of a service and hands them to exporters when they end.
+    The current span is kept in a context variable, so spans nest across awaits and tasks; blocking calls
+    run on threads keep it when their context is copied. Traces continue across services through
+    W3C traceparent values. Without exporters the tracer is disabled and spans cost nothing.
+    """
+
+    def __init__(self, service: str, exporters: Optional[List[Any]] = None):
+        """
+        Initializes the tracer.
+        Args:
+            service (str): Name of the service the spans belong to.
+            exporters (list): Receivers of finished spans, with export(span) and close() methods.
+        """
+        self.service = service
+        self.exporters = exporters or []
+
+    @classmethod
+    def from_env(cls, service: str) -> "Tracer":
+        """
+        Builds the tracer from TRACING_FILE (JSONL output path) and TRACING_OTLP_ENDPOINT
+        (collector base URL, e.g. http://localhost:4318).
+        """
+        exporters: List[Any] = []
+        path = os.getenv("TRACING_FILE")
+        if path:
+            exporters.append(JsonlExporter(path))
+        endpoint = os.getenv("TRACING_OTLP_ENDPOINT")
+        if endpoint:
+            exporters.append(OTLPExporter(endpoint))
+        return cls(os.getenv("TRACING_SERVICE_NAME", service), exporters)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def add_exporter(self, exporter: Any):
+        self.exporters.append(exporter)
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None, traceparent: Optional[str] = None):
+        """
+        Starts a span, child of the span of the traceparent if given, else of the current span.
+        The span is not made current; end() must be called on it.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        remote = parse_traceparent(traceparent)
+        parent = _current_span.get()
+        if remote:
+            trace_id, parent_id = remote
+        elif parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        return Span(self, name, trace_id, parent_id, attributes)
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None, traceparent: Optional[str] = None) -> Iterator[Any]:
+        """
+        Runs the block in a new current span, recording the error it raises, if any.
+        """
+        span = self.start_span(name, attributes, traceparent)
+        if span is NOOP_SPAN:
+            yield span
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Ended in another context, e.g. an async generator closed by another task
+                pass
+            span.end()
+
+    def traceparent(self) -> Optional[str]:
+        """
+        Returns the traceparent of the current span, to propagate the trace to another service.
+        """
+        span = _current_span.get()
+        return span.traceparent if span is not None else None
+
+    def _export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(f"Could not export span '{span.name}': {e}")
+
+    def close(self):
+        for exporter in self.exporters:
+            exporter.close()
+        self.exporters = []
+
+_tracer: Optional[Tracer] = None
+
+def configure_tracer(service: str) -> Tracer:
+    """
+    Sets up the process-wide tracer of the given service from the environment.
+    """
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer.from_env(service)
+    return _tracer
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process-wide tracer, which stays disabled until configure_tracer is called.
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer("unknown")
+    return _tracer
+
+def _traced_getresponse(getresponse):
+    @functools.wraps(getresponse)
+    def wrapper(connection):
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return getresponse(connection)
+        page = re.search(r"[?&]page=(\d+)", connection.url)
+        attributes = {
+            "http.method": connection.verb,
+            "http.url": connection.url.split("?")[0],
+            "github.page": int(page.group(1)) if page else None,
+        }
+        with tracer.span("github.request", attributes) as span:
+            response = getresponse(connection)
+            headers = {key.lower(): value for key, value in response.getheaders()}
+            last_page = re.search(r"[?&]page=(\d+)[^>]*>;\s*rel=\"last\"", headers.get("link", ""))
+            span.set_attributes({
+                "http.status_code": response.status,
+                "github.pages": int(last_page.group(1)) if last_page else None,
+                "github.ratelimit.remaining": headers.get("x-ratelimit-remaining"),
+                "github.ratelimit.limit": headers.get("x-ratelimit-limit"),
+                "github.ratelimit.reset": headers.get("x-ratelimit-reset"),
+                "github.ratelimit.resource": headers.get("x-ratelimit-resource"),
+            })
+            return response
+    wrapper.traced = True
+    return wrapper
+
+def trace_pygithub():
+    """
+    Records a span for every HTTP request PyGithub sends, with its status, page and rate-limit headers.
+    Wraps the response method of PyGithub's connection classes, which keeps their connection reuse;
+    the spans nest under the current span of the calling thread.
+    """
+    from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass
+
+    for connection_class in (HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass):
+        if not getattr(connection_class.getresponse, "traced", False):
+            connection_class.getresponse = _traced_getresponse(connection_class.getresponse)
@@ -0,0 +1,62 @@
+import hashlib
+import hmac
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+@dataclass
+class WebhookEffects:
+    repo: str
+    # Response cache prefixes to drop, e.g. ("branches", "octocat/spoon-knife")
+    cache_prefixes: List[Tuple[str, ...]] = field(default_factory=list)
+    # Local store resources to sync again on next use
+    stale: List[str] = field(default_factory=list)
+    # Resources worth fetching again right away
+    prefetch: List[str] = field(default_factory=list)
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """
+    Checks the X-Hub-Signature-256 header of a webhook delivery against the shared secret.
+    """
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+def plan_invalidation(event: str, payload: Dict[str, Any]) -> Optional[WebhookEffects]:
+    """
+    Maps a webhook delivery to the cached data it makes stale.
+    Returns None for events that do not affect any data served by the tools.
+    """
+    repository = payload.get("repository") or {}
+    full_name = repository.get("full_name")
+    if not full_name:
+        return None
+    repo = full_name.lower()
+    effects = WebhookEffects(repo=repo)
+
+    if event == "push":
+        ref = payload.get("ref", "")
+        # Repository metadata (e.g. pushed_at) and the commits of the overview change with every push
+        effects.cache_prefixes += [("repo", repo), ("overview", repo)]
+        if ref.startswith("refs/heads/") and (payload.get("created") or payload.get("deleted")):
+            effects.cache_prefixes.append(("branches", repo))
+            effects.stale.append("branches")
+            effects.prefetch.append("branches")
+        # The local store only indexes the default branch
+        if ref == f"refs/heads/{repository.get('default_branch')}":
+            effects.stale.append("commits")
+            effects.prefetch.append("commits")
+    elif event in ("issues", "pull_request"):
+        # Pull requests are listed by the issues endpoint too
+        effects.cache_prefixes += [("issues", repo), ("overview", repo), ("repo", repo)]
+        effects.stale.append("issues")
+        effects.prefetch.append("issues")
+    elif event in ("create", "delete"):
+        if payload.get("ref_type") != "branch":
+            return None
+        effects.cache_prefixes += [("branches", repo), ("overview", repo)]
+        effects.stale.append("branches")
+        effects.prefetch.append("branches")
+    else:
+        return None
+    return effects
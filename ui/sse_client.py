@@ -0,0 +1,284 @@
+import asyncio
+import codecs
+import importlib.util
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+# --- Server-Sent Events ---
+LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+@dataclass
+class SSEEvent:
+    data: str
+    event: str = "message"
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+class SSEDecoder:
+    """
+    Incremental Server-Sent Events decoder: bytes go in as they arrive, complete events come out.
+    UTF-8 sequences and lines split across chunks are reassembled, and each byte is decoded once.
+    Supports the event, id, retry and multi-line data fields; comments are ignored.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # Pieces of the line being received, joined once the line is complete
+        self._partial: List[str] = []
+        self._held_cr = False
+        self._data: List[str] = []
+        self._event = ""
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """
+        Decodes a chunk and returns the events it completes.
+        """
+        text = self._decoder.decode(chunk)
+        if self._held_cr:
+            text = "\r" + text
+        # A trailing CR may be the first half of a CRLF split across chunks
+        self._held_cr = text.endswith("\r")
+        if self._held_cr:
+            text = text[:-1]
+        if not text:
+            return []
+        lines = LINE_BREAK.split(text)
+        events = []
+        if len(lines) > 1:
+            self._partial.append(lines[0])
+            lines[0] = "".join(self._partial)
+            self._partial = []
+            for line in lines[:-1]:
+                event = self._process_line(line)
+                if event is not None:
+                    events.append(event)
+        if lines[-1]:
+            self._partial.append(lines[-1])
+        return events
+
+    def _process_line(self, line: str) -> Optional[SSEEvent]:
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None
+        name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if name == "data":
+            self._data.append(value)
+        elif name == "event":
+            self._event = value
+        elif name == "id" and "\0" not in value:
+            self.last_event_id = value
+        elif name == "retry" and value.isdigit():
+            self.retry = int(value)
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        if not self._data:
+            self._event = ""
+            return None
+        event = SSEEvent(data="\n".join(self._data), event=self._event or "message", id=self.last_event_id, retry=self.retry)
+        self._data, self._event = [], ""
+        return event
+
+# --- Client ---
+# Marks the end of a stream in the queue between the event loop and the script thread
+_END = object()
+
+class SSEClient:
+    """
+    A process-wide client for the backend's event streams.
+    One event loop runs in a background thread and owns a single httpx.AsyncClient, so connections
+    are pooled and kept alive across chat messages (HTTP/2 is used when the h2 package is installed).
+    Events are handed to the calling thread, where Streamlit elements can be updated.
+    A stream that breaks after events with ids were received is resumed by sending the same request
+    again with the Last-Event-ID header.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float = 5,
+        read_timeout: float = 120,
+        max_reconnects: int = 3,
+        reconnect_delay: float = 1,
+        max_connections: int = 10,
+    ):
+        """
+        Initializes the client and starts its event loop.
+        Args:
+            base_url (str): URL of the backend.
+            connect_timeout (float): Seconds to establish a connection.
+            read_timeout (float): Longest silence on a stream before it counts as stalled.
+            max_reconnects (int): Reconnection attempts per stream.
+            reconnect_delay (float): Seconds before the first reconnection, doubled on each attempt;
+                the server can override it with the retry field.
+            max_connections (int): Size of the connection pool.
+        """
+        self.max_reconnects = max_reconnects
+        self.reconnect_delay = reconnect_delay
+        self.reconnects = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="sse-client", daemon=True)
+        self._thread.start()
+
+        async def create_client() -> httpx.AsyncClient:
+            # The client is bound to the loop it is created on
+            return httpx.AsyncClient(
+                base_url=base_url,
+                http2=importlib.util.find_spec("h2") is not None,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            )
+        self._client = asyncio.run_coroutine_threadsafe(create_client(), self._loop).result()
+
+    def stream(self, path: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Iterator[SSEEvent]:
+        """
+        POSTs payload to path and yields the events of the response as they arrive.
+        Raises httpx.HTTPStatusError for error responses, with the body already read.
+        """
+        events: "queue.Queue[Any]" = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._produce(path, payload, headers or {}, events), self._loop)
+        try:
+            while True:
+                item = events.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            if not future.done():
+                # Give the server a moment to end the response, so the connection can be reused
+                self._loop.call_soon_threadsafe(self._loop.call_later, 5, future.cancel)
+
+    async def _produce(self, path: str, payload: Dict[str, Any], extra_headers: Dict[str, str], events: "queue.Queue[Any]"):
+        last_event_id = None
+        retry_ms = None
+        attempt = 0
+        try:
+            while True:
+                decoder = SSEDecoder()
+                decoder.last_event_id = last_event_id
+                headers = {"Accept": "text/event-stream", **extra_headers}
+                if last_event_id is not None:
+                    headers["Last-Event-ID"] = last_event_id
+                try:
+                    async with self._client.stream("POST", path, json=payload, headers=headers) as response:
+                        if response.is_error:
+                            await response.aread()
+                            response.raise_for_status()
+                        async for chunk in response.aiter_bytes():
+                            for event in decoder.feed(chunk):
+                                events.put(event)
+                    return
+                except httpx.TransportError as e:
+                    last_event_id, retry_ms = decoder.last_event_id, decoder.retry or retry_ms
+                    # Without an id, sending the request again would start the run over,
+                    # unless the request never reached the backend
+                    resumable = last_event_id is not None or isinstance(e, httpx.ConnectError)
+                    if attempt >= self.max_reconnects or not resumable:
+                        raise
+                    attempt += 1
+                    self.reconnects += 1
+                    delay = retry_ms / 1000 if retry_ms is not None else self.reconnect_delay * 2 ** (attempt - 1)
+                    await asyncio.sleep(delay)
+        except Exception as e:
+            events.put(e)
+        finally:
+            events.put(_END)
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+# --- Rendering ---
+class StreamingMarkdown:
+    """
+    Renders streamed markdown append-only into a Streamlit container.
+    Finished paragraphs are written once into their own element and never re-rendered;
+    only the paragraph in progress is redrawn, at most once per interval.
+    """
+
+    def __init__(self, container: Any, interval: float = 0.1, cursor: str = "▌"):
+        """
+        Initializes the renderer.
+        Args:
+            container: Streamlit container the elements are added to.
+            interval (float): Minimum seconds between redraws of the paragraph in progress.
+            cursor (str): Shown after the paragraph in progress while streaming.
+        """
+        self.container = container
+        self.interval = interval
+        self.cursor = cursor
+        self._chunks: List[str] = []
+        self._tail: List[str] = []
+        self._tail_element = None
+        self._elements: List[Any] = []
+        self._last_render = 0.0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def append(self, text: str):
+        """
+        Adds streamed text, fixing finished paragraphs and redrawing the rest when the interval has passed.
+        """
+        if not text:
+            return
+        self._chunks.append(text)
+        self._tail.append(text)
+        # A paragraph break may be split across chunks, so look again on every line break
+        if "\n" in text:
+            self._settle()
+        if time.monotonic() - self._last_render >= self.interval:
+            self._render_tail(self.cursor)
+
+    def _settle(self):
+        """
+        Moves finished paragraphs out of the paragraph in progress, unless they are inside a code block.
+        """
+        tail = "".join(self._tail)
+        boundary = tail.rfind("\n\n")
+        if boundary < 0 or tail[:boundary].count("```") % 2:
+            self._tail = [tail]
+            return
+        done, rest = tail[:boundary], tail[boundary + 2:]
+        self._tail = [done]
+        self._render_tail("")
+        # The finished paragraphs keep their element; the rest starts a new one
+        self._tail_element = None
+        self._tail = [rest] if rest else []
+
+    def _render_tail(self, cursor: str):
+        if self._tail_element is None:
+            self._tail_element = self.container.empty()
+            self._elements.append(self._tail_element)
+        self._tail_element.markdown("".join(self._tail) + cursor)
+        self._last_render = time.monotonic()
+
+    def finish(self):
+        """
+        Draws the final state of the paragraph in progress, without the cursor.
+        """
+        if self._tail or self._tail_element is not None:
+            self._render_tail("")
+
+    def clear(self):
+        """
+        Removes everything rendered so far and starts over.
+        """
+        for element in self._elements:
+            element.empty()
+        self._chunks, self._tail, self._elements = [], [], []
+        self._tail_element = None
@@ -1,11 +1,26 @@
 import streamlit as st
 import httpx
-import asyncio
+import os
 import uuid
 from utils.models import InvokeRequest, InvokeResponse # Corrected import from ui_models to utils.models
+from sse_client import SSEClient, StreamingMarkdown
 
 # --- Configuration ---
 FASTAPI_BACKEND_URL = "http://localhost:8003"
+# Seconds to connect to the backend, and the longest silence on a stream before it is resumed or given up
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("UI_BACKEND_CONNECT_TIMEOUT", "5"))
+BACKEND_READ_TIMEOUT = float(os.getenv("UI_BACKEND_READ_TIMEOUT", "120"))
+BACKEND_MAX_RECONNECTS = int(os.getenv("UI_BACKEND_MAX_RECONNECTS", "3"))
+
+@st.cache_resource
+def get_backend_client() -> SSEClient:
+    # Shared by all sessions of this process, so connections and the event loop are reused across messages
+    return SSEClient(
+        FASTAPI_BACKEND_URL,
+        connect_timeout=BACKEND_CONNECT_TIMEOUT,
+        read_timeout=BACKEND_READ_TIMEOUT,
+        max_reconnects=BACKEND_MAX_RECONNECTS,
+    )
 
 # --- Streamlit App ---
 st.set_page_config(page_title="MCP Demo", layout="centered")
@@ -31,93 +46,97 @@ for msg in st.session_state.messages:
             st.markdown(msg["content"])
 
 # Function to send messages to FastAPI and stream response
-async def send_chat_message_and_stream(user_message: str, thread_id: str):
+def send_chat_message_and_stream(user_message: str, thread_id: str):
     placeholder = st.empty()
-    main_response_content = ""
-    thinking_process_content = ""
-
-    async with httpx.AsyncClient(timeout=None) as client:
-        try:
-            async with client.stream(
-                "POST",
-                f"{FASTAPI_BACKEND_URL}/invoke",
-                json=InvokeRequest(query=user_message, thread_id=thread_id).model_dump(),
-                headers={"Accept": "text/event-stream"}
-            ) as response:
-                response.raise_for_status()
-
-                buffer = ""
-                async for chunk_bytes in response.aiter_bytes():
-                    chunk_text = chunk_bytes.decode('utf-8')
-                    buffer += chunk_text
-
-                    parts = buffer.split('\n\n')
-                    buffer = parts.pop()
-
-                    for part in parts:
-                        if part.startswith('data: '):
-                            json_string = part[len('data: '):]
-                            if json_string == '[DONE]':
-                                print("Stream DONE signal received.")
-                                placeholder.empty()
-                                return main_response_content, thinking_process_content
-
-                            try:
-                                parsed_data = InvokeResponse.model_validate_json(json_string)
-
-                                if parsed_data.response in ["assistant", "assistant_response", "assistant_final_answer"]:
-                                    if main_response_content:
-                                        main_response_content += "\n\n" + parsed_data.content
-                                    else:
-                                        main_response_content += parsed_data.content
-                                elif parsed_data.response == "agent_tool_planning":
-                                    if thinking_process_content and not thinking_process_content.endswith('\n'):
-                                        thinking_process_content += "\n"
-                                    thinking_process_content += f"\n*Agent is planning: {parsed_data.content}*\n\n"
-                                elif parsed_data.response == "tool_output_received":
-                                    if thinking_process_content and not thinking_process_content.endswith('\n'):
-                                        thinking_process_content += "\n"
-                                    thinking_process_content += f"\n*Tool Output: {parsed_data.content}*\n"
-                                elif parsed_data.response in ["stream_error", "serialization_error", "error"]:
-                                    st.error(f"Agent Error: {parsed_data.content}")
-                                    thinking_process_content += f"\n\n[ERROR: {parsed_data.content}]\n"
-
-                                # Update the temporary placeholder
-                                combined_streaming_display = ""
-                                if thinking_process_content:
-                                    combined_streaming_display += thinking_process_content
-                                if main_response_content:
-                                    if thinking_process_content:
-                                        combined_streaming_display += "\n---\n"
-                                    combined_streaming_display += main_response_content
-
-                                placeholder.markdown(combined_streaming_display + "▌")
-
-                            except Exception as e:
-                                print(f"Error parsing SSE data: {e} | Raw data: {json_string}")
-                                st.error(f"Error processing streamed data: {e}. Raw: {json_string[:100]}...")
-                                combined_streaming_display = ""
-                                if thinking_process_content:
-                                    combined_streaming_display += thinking_process_content
-                                combined_streaming_display += f"\n\n[STREAM PARSE ERROR]\n"
-                                placeholder.markdown(combined_streaming_display + "▌")
-
-
-        except httpx.RequestError as e:
-            st.error(f"Error connecting to backend: {e}. Is the FastAPI server running at {FASTAPI_BACKEND_URL}?")
-            print(f"HTTPX Request Error: {e}")
-            return f"Error connecting to backend: {e}", ""
-        except httpx.HTTPStatusError as e:
-            st.error(f"Backend returned an HTTP error: {e.response.status_code} - {e.response.text}")
-            print(f"HTTPX Status Error: {e}")
-            return f"Backend returned an HTTP error: {e.response.status_code} - {e.response.text}", ""
-        except Exception as e:
-            st.error(f"An unexpected error occurred during streaming: {e}")
-            print(f"Unexpected Streaming Error: {e}")
-            return f"An unexpected error occurred during streaming: {e}", ""
+    # Live view: queue status, the agent's thinking, then the answers, each rendered append-only
+    live = placeholder.container()
+    status = live.empty()
+    thinking_view = StreamingMarkdown(live.container())
+    separator = live.empty()
+    answers_box = live.container()
+    main_response_parts = []
+    # Tokens of the answer being generated, replaced by the complete answer once it arrives
+    draft_view = None
+
+    def show_answer(content: str):
+        nonlocal draft_view
+        if draft_view is not None and draft_view.text == content:
+            draft_view.finish()
+        else:
+            if draft_view is not None:
+                draft_view.clear()
+            answer_view = StreamingMarkdown(answers_box)
+            answer_view.append(content)
+            answer_view.finish()
+        draft_view = None
+        main_response_parts.append(content)
+
+    # W3C trace context, so that the backend's spans of this message share one trace id
+    trace_id = uuid.uuid4().hex
+    headers = {"traceparent": f"00-{trace_id}-{uuid.uuid4().hex[:16]}-01"}
+    try:
+        for event in get_backend_client().stream("/invoke", InvokeRequest(query=user_message, thread_id=thread_id).model_dump(), headers):
+            if event.data == '[DONE]':
+                print("Stream DONE signal received.")
+                placeholder.empty()
+                return "\n\n".join(main_response_parts), thinking_view.text
+
+            try:
+                parsed_data = InvokeResponse.model_validate_json(event.data)
+            except Exception as e:
+                print(f"Error parsing SSE data: {e} | Raw data: {event.data}")
+                st.error(f"Error processing streamed data: {e}. Raw: {event.data[:100]}...")
+                thinking_view.append("\n\n[STREAM PARSE ERROR]\n")
+                continue
+
+            if parsed_data.response == "queued":
+                status.markdown(f"*{parsed_data.content}*")
+                continue
+            status.empty()
+
+            if parsed_data.response == "assistant_token":
+                if draft_view is None:
+                    draft_view = StreamingMarkdown(answers_box)
+                draft_view.append(parsed_data.content)
+            elif parsed_data.response in ["assistant", "assistant_response", "assistant_final_answer"]:
+                show_answer(parsed_data.content)
+            elif parsed_data.response == "agent_tool_planning":
+                # Text streamed before the tool calls is part of the agent's reasoning
+                if draft_view is not None:
+                    thinking_view.append(f"\n{draft_view.text}\n")
+                    draft_view.clear()
+                    draft_view = None
+                thinking_view.append(f"\n*Agent is planning: {parsed_data.content}*\n\n")
+            elif parsed_data.response == "tool_output_received":
+                thinking_view.append(f"\n*Tool Output: {parsed_data.content}*\n")
+            elif parsed_data.response in ["stream_error", "serialization_error", "error"]:
+                st.error(f"Agent Error: {parsed_data.content}")
+                thinking_view.append(f"\n\n[ERROR: {parsed_data.content}]\n")
+
+            if thinking_view.text and (main_response_parts or draft_view is not None):
+                separator.markdown("---")
+
+    except httpx.RequestError as e:
+        st.error(f"Error connecting to backend: {e}. Is the FastAPI server running at {FASTAPI_BACKEND_URL}?")
+        print(f"HTTPX Request Error: {e}")
+        return f"Error connecting to backend: {e}", ""
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code in (429, 503):
+            # The backend is at capacity; it tells us when to retry
+            retry_after = e.response.headers.get("Retry-After", "a few")
+            message = f"The agent is busy ({e.response.json().get('detail', e.response.status_code)}). Please retry in {retry_after} seconds."
+            st.warning(message)
+            return message, ""
+        st.error(f"Backend returned an HTTP error: {e.response.status_code} - {e.response.text}")
+        print(f"HTTPX Status Error: {e}")
+        return f"Backend returned an HTTP error: {e.response.status_code} - {e.response.text}", ""
+    except Exception as e:
+        st.error(f"An unexpected error occurred during streaming: {e}")
+        print(f"Unexpected Streaming Error: {e}")
+        return f"An unexpected error occurred during streaming: {e}", ""
 
     # Fallback
-    return main_response_content, thinking_process_content
+    return "\n\n".join(main_response_parts), thinking_view.text
 
 
 # --- Main Streamlit Chat Input and Display Logic ---
@@ -127,7 +146,7 @@ if prompt := st.chat_input("Ask me about repositories or anything else..."):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        main_content, thinking_content = asyncio.run(send_chat_message_and_stream(prompt, st.session_state.thread_id))
+        main_content, thinking_content = send_chat_message_and_stream(prompt, st.session_state.thread_id)
 
         # Render the thinking content
         if thinking_content: